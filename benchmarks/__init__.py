@@ -0,0 +1 @@
+"""Offline benchmarks for the research graph (fake chat model and search backend)."""
@@ -0,0 +1,203 @@
+"""Scripted chat model and search backend for running the graph offline.
+
+Select them with ``LLM_PROVIDER=benchmarks.fakes:make_chat_model``,
+``SEARCH_BACKEND=benchmarks.fakes:make_search`` and
+``EMBEDDINGS_PROVIDER=benchmarks.fakes:make_embeddings``. Latency per call comes from
+``BENCH_LLM_LATENCY`` / ``BENCH_SEARCH_LATENCY`` (seconds). Responses depend
+only on the input, so the LLM and search caches behave as they would with real
+backends.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from langchain_agent.utils.response_utils import get_text
+
+# Tools the scripted agents call; the rest need the network or matplotlib
+SAFE_TOOLS = (
+    "evaluate_idea",
+    "web_search",
+    "competitor_analysis",
+    "review_analysis",
+    "market_size_research",
+    "analyze_pain_killer_vitamin",
+    "analyze_bootstrapping_feasibility",
+    "analyze_payment_willingness",
+    "generate_distribution_strategy",
+)
+
+_FILLER = (
+    "Small teams report spending hours on manual follow-ups, pricing pages show incumbents at $49-$199 per seat, "
+    "and reviews repeatedly mention missing integrations and slow support. "
+)
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:8]
+
+
+def _fake_value(name: str, spec: dict, text: str) -> Any:
+    """A schema-shaped value for a tool or structured-output field; enums pick FINISH when allowed."""
+    options = spec.get("enum") or []
+    if options:
+        return "FINISH" if "FINISH" in options else options[0]
+    kind = spec.get("type")
+    if kind == "boolean":
+        return True
+    if kind in ("integer", "number"):
+        return 1
+    if kind == "array":
+        return [f"{text} (option {i})" for i in range(1, 4)]
+    return text
+
+
+def _text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(get_text(m)) for m in messages)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model that plays the router, planner, agents and tools.
+
+    - structured output requests (router/planner) get a schema-shaped answer,
+      with ``FINISH`` chosen wherever it is allowed;
+    - an agent turn with tools bound first calls up to ``tool_calls_per_turn``
+      tools at once, then answers with findings and the trailing JSON block;
+    - anything else (analysis tools, compaction, synthesis) gets plain text.
+    """
+
+    latency: float = 0.0
+    tool_calls_per_turn: int = 2
+    answer_chars: int = 1200
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": "scripted", "tool_calls_per_turn": self.tool_calls_per_turn, "answer_chars": self.answer_chars}
+
+    def bind_tools(self, tools, *, tool_choice: Optional[str] = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], tool_choice=tool_choice, **kwargs)
+
+    def _structured(self, tool: dict) -> AIMessage:
+        function = tool["function"]
+        args = {}
+        for name, spec in function.get("parameters", {}).get("properties", {}).items():
+            args[name] = _fake_value(name, spec, f"Research the {name} angle of the request")
+        return AIMessage(content="", tool_calls=[{"name": function["name"], "args": args, "id": f"call_{_digest(json.dumps(args))}"}])
+
+    def _agent_turn(self, messages: List[BaseMessage], tools: List[dict]) -> AIMessage:
+        if isinstance(messages[-1], ToolMessage):
+            findings = [f"{m.name}: {str(get_text(m))[:80]}" for m in messages if isinstance(m, ToolMessage)][-3:]
+            summary = {"summary": f"Findings {_digest(_text(messages))}", "findings": findings, "next": "FINISH", "confidence": "medium"}
+            body = (_FILLER * (self.answer_chars // len(_FILLER) + 1))[: self.answer_chars]
+            return AIMessage(content=f"{body}\n{json.dumps(summary)}")
+
+        calls = []
+        topic = str(get_text(messages[-1]))[:120]
+        for tool in tools:
+            function = tool["function"]
+            if function["name"] not in SAFE_TOOLS:
+                continue
+            required = function.get("parameters", {}).get("required") or list(function.get("parameters", {}).get("properties", {}))
+            properties = function.get("parameters", {}).get("properties", {})
+            args = {name: _fake_value(name, properties.get(name, {}), topic) for name in required}
+            calls.append({"name": function["name"], "args": args, "id": f"call_{len(calls)}_{_digest(topic)}"})
+            if len(calls) >= self.tool_calls_per_turn:
+                break
+        if not calls:
+            return AIMessage(content=f"No tools needed.\n{json.dumps({'summary': 'done', 'findings': [], 'next': 'FINISH', 'confidence': 'low'})}")
+        return AIMessage(content="", tool_calls=calls)
+
+    def _respond(self, messages: List[BaseMessage], **kwargs: Any) -> ChatResult:
+        tools = kwargs.get("tools") or []
+        # with_structured_output forces a tool call; langchain-core does not always pass ls_structured_output_format down
+        if tools and (kwargs.get("ls_structured_output_format") or kwargs.get("tool_choice") not in (None, "auto")):
+            message = self._structured(tools[0])
+        elif tools:
+            message = self._agent_turn(messages, tools)
+        else:
+            text = f"Analysis {_digest(_text(messages))}: " + _FILLER * 4
+            message = AIMessage(content=text)
+        prompt_tokens = len(_text(messages)) // 4 + 4 * len(messages)
+        completion_tokens = max(len(str(message.content)) // 4, 1)
+        message.usage_metadata = {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages, **kwargs)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, **kwargs)
+
+
+class _FakeSearchAPI:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def results(self, query: str, max_results: int = 5) -> List[dict]:
+        if self.latency:
+            time.sleep(self.latency)
+        return [
+            {"title": f"Result {i} for {query[:40]}", "link": f"https://example.com/{_digest(query)}/{i}", "snippet": _FILLER}
+            for i in range(max_results)
+        ]
+
+
+class FakeSearch:
+    """Search backend with the ``run``/``api_wrapper.results`` interface of ``DuckDuckGoSearchRun``."""
+
+    def __init__(self, latency: float = 0.0):
+        self.api_wrapper = _FakeSearchAPI(latency)
+
+    def run(self, query: str) -> str:
+        return " ".join(r["snippet"] for r in self.api_wrapper.results(query, max_results=4))
+
+
+class HashingEmbeddings(Embeddings):
+    """Bag-of-words embeddings: each lowercase word adds 1 to a hashed dimension."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+        self.calls = 0
+
+    def _embed(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for word in re.findall(r"[a-z0-9$%]+", text.lower()):
+            vector[int(_digest(word), 16) % self.dim] += 1.0
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.calls += 1
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def make_chat_model() -> ScriptedChatModel:
+    return ScriptedChatModel(latency=float(os.getenv("BENCH_LLM_LATENCY", "0")))
+
+
+def make_search() -> FakeSearch:
+    return FakeSearch(latency=float(os.getenv("BENCH_SEARCH_LATENCY", "0")))
+
+
+def make_embeddings() -> HashingEmbeddings:
+    return HashingEmbeddings()
@@ -0,0 +1,270 @@
+"""Run the research graph end-to-end offline and record orchestration costs.
+
+Every scenario runs in a fresh subprocess with the scripted chat model and fake
+search backend from ``benchmarks.fakes`` and its own temporary output/cache
+directories, so configuration read at import time and peak memory are
+isolated per scenario. Results are written as JSON for comparison across
+commits::
+
+    python -m benchmarks.run                              # all scenarios
+    python -m benchmarks.run --scenarios router,planner --llm-latency 0.2
+    python -m benchmarks.run --compare output/benchmarks/<previous>.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# mode: orchestration mode; async: use ainvoke; iterations: runs in one process (cold, then warm caches);
+# history: prior worker outputs seeded into the conversation; env: config overrides
+SCENARIOS: Dict[str, dict] = {
+    "router": {"mode": "router"},
+    "planner": {"mode": "planner"},
+    "router_async": {"mode": "router", "async": True},
+    "planner_async": {"mode": "planner", "async": True},
+    "router_cached": {"mode": "router", "iterations": 2, "env": {"SEARCH_CACHE_ENABLED": "true", "LLM_CACHE_ENABLED": "true"}},
+    "planner_cached": {"mode": "planner", "iterations": 2, "env": {"SEARCH_CACHE_ENABLED": "true", "LLM_CACHE_ENABLED": "true"}},
+    "long_history": {"mode": "router", "history": 60},
+    "long_history_uncompacted": {"mode": "router", "history": 60, "env": {"CONTEXT_COMPACTION_ENABLED": "false"}},
+    "router_evidence": {"mode": "router", "env": {"EVIDENCE_ENABLED": "true"}},
+    "long_history_evidence": {"mode": "router", "history": 60, "env": {"EVIDENCE_ENABLED": "true"}},
+    "router_known_niche": {"mode": "router", "iterations": 2, "env": {"KNOWLEDGE_ENABLED": "true"}},
+    "planner_known_niche": {"mode": "planner", "iterations": 2, "env": {"KNOWLEDGE_ENABLED": "true"}},
+}
+
+# Caches are off unless a scenario turns them on, so runs do not depend on earlier ones; the fake
+# search backend is not rate-limited
+_BASE_ENV = {
+    "LLM_PROVIDER": "benchmarks.fakes:make_chat_model",
+    "SEARCH_BACKEND": "benchmarks.fakes:make_search",
+    "EMBEDDINGS_PROVIDER": "benchmarks.fakes:make_embeddings",
+    "SEARCH_CACHE_ENABLED": "false",
+    "KNOWLEDGE_ENABLED": "false",
+    "SEARCH_RATE_PER_SECOND": "0",
+    "LLM_CACHE_ENABLED": "false",
+    "LLM_CACHE_SCOPES": "router,planner,synthesis,compaction,evaluate_idea,analyze_pain_killer_vitamin,analyze_bootstrapping_feasibility,"
+    "analyze_payment_willingness,generate_distribution_strategy",
+    "TRACE_ENABLED": "false",
+    "LOG_LEVEL": "WARNING",
+}
+
+PROMPT = "I want to build a SaaS product for appointment scheduling in small dental clinics"
+
+
+def _history(count: int) -> list:
+    from langchain_core.messages import HumanMessage
+
+    workers = ["saas_finder", "market", "research"]
+    body = "Earlier finding: clinics lose 10-15% of appointments to no-shows; incumbents charge $99-$299 per month. " * 12
+    messages = [HumanMessage(content=PROMPT)]
+    for i in range(count):
+        name = workers[i % len(workers)]
+        trailer = json.dumps({"summary": f"{name} pass {i}", "findings": [f"finding {i}"], "next": "FINISH", "confidence": "medium"})
+        messages.append(HumanMessage(content=f"{body}\n{trailer}", name=name))
+    return messages
+
+
+def _read_trace(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _run_once(graph, scenario: dict, index: int, trace_dir: str) -> dict:
+    from langchain_agent.utils.checkpoint import run_config
+    from langchain_agent.utils.instrumentation import RunTracer
+    from langchain_agent.utils.knowledge_base import initial_state
+
+    trace_path = os.path.join(trace_dir, f"run{index}.jsonl")
+    tracer = RunTracer(f"bench-{index}", trace_path)
+    graph_input = {"messages": _history(scenario["history"])} if scenario.get("history") else initial_state(PROMPT)
+    config = {**run_config(f"bench-{index}", [tracer]), "recursion_limit": 100}
+
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    with tracer.activate():
+        if scenario.get("async"):
+            result = asyncio.run(graph.ainvoke(graph_input, config=config))
+        else:
+            result = graph.invoke(graph_input, config=config)
+    wall = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracer.close()
+
+    spans = _read_trace(trace_path)
+    llm_spans = [s for s in spans if s["kind"] == "llm"]
+    hops: Dict[str, dict] = {}
+    for span in llm_spans:
+        hop = hops.setdefault(span["name"], {"calls": 0, "prompt_tokens": [], "cache_hits": 0})
+        hop["calls"] += 1
+        hop["prompt_tokens"].append(span.get("prompt_tokens", 0))
+        hop["cache_hits"] += int(bool(span.get("cache_hit")))
+    router_stats = result.get("router_stats") or {}
+    return {
+        "wall_s": round(wall, 4),
+        "peak_python_mb": round(peak / 2**20, 2),
+        "steps": result.get("steps", 0),
+        "router_fast_path": router_stats.get("fast_path", 0),
+        "router_llm_calls": router_stats.get("llm_calls", 0),
+        "llm_calls": len(llm_spans),
+        "llm_cache_hits": sum(int(bool(s.get("cache_hit"))) for s in llm_spans),
+        "tool_calls": sum(1 for s in spans if s["kind"] == "tool"),
+        "tool_cache_hits": sum(1 for s in spans if s["kind"] == "cache_hit"),
+        "prompt_tokens": sum(s.get("prompt_tokens", 0) for s in llm_spans),
+        "completion_tokens": sum(s.get("completion_tokens", 0) for s in llm_spans),
+        "max_prompt_tokens": max((s.get("prompt_tokens", 0) for s in llm_spans), default=0),
+        "prompt_tokens_per_hop": hops,
+        "final_report": any(getattr(m, "name", None) == "final_report" for m in result.get("messages", [])),
+    }
+
+
+def run_scenario_in_process(name: str) -> dict:
+    """Build the graph and run scenario ``name``; expects the fake backends to be configured via env."""
+    scenario = SCENARIOS[name]
+    tracemalloc.start()
+    build_start = time.perf_counter()
+    from langchain_agent.agents.base_agent import build_research_graph
+
+    graph = build_research_graph(scenario["mode"])
+    build_s = time.perf_counter() - build_start
+    trace_dir = os.path.join(os.environ.get("OUTPUT_DIR", tempfile.mkdtemp()), "bench_traces")
+    runs = [_run_once(graph, scenario, i, trace_dir) for i in range(scenario.get("iterations", 1))]
+    return {
+        "scenario": name,
+        "mode": scenario["mode"],
+        "async": bool(scenario.get("async")),
+        "history": scenario.get("history", 0),
+        "env": scenario.get("env", {}),
+        "import_and_build_s": round(build_s, 4),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "runs": runs,
+    }
+
+
+def offline_env(tmp: str, llm_latency: float = 0.0, search_latency: float = 0.0, overrides: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """Environment for a subprocess that uses the fake backends and keeps all output under ``tmp``."""
+    env = {**os.environ, **_BASE_ENV, **(overrides or {})}
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])),
+        "BENCH_LLM_LATENCY": str(llm_latency),
+        "BENCH_SEARCH_LATENCY": str(search_latency),
+        "OUTPUT_DIR": tmp,
+        "CACHE_DIR": os.path.join(tmp, "cache"),
+        "CHARTS_DIR": os.path.join(tmp, "charts"),
+        "GRAPHS_DIR": os.path.join(tmp, "graphs"),
+        "REPORTS_DIR": os.path.join(tmp, "reports"),
+        "EVIDENCE_DIR": os.path.join(tmp, "evidence"),
+        "KNOWLEDGE_PATH": os.path.join(tmp, "knowledge.sqlite"),
+    })
+    return env
+
+
+def run_scenario(name: str, llm_latency: float, search_latency: float) -> dict:
+    """Run one scenario in a fresh interpreter with isolated output and cache directories."""
+    scenario = SCENARIOS[name]
+    with tempfile.TemporaryDirectory(prefix=f"bench-{name}-") as tmp:
+        env = offline_env(tmp, llm_latency, search_latency, scenario.get("env"))
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.run", "--worker", name],
+            cwd=ROOT, env=env, capture_output=True, text=True,
+        )
+    if proc.returncode != 0:
+        return {"scenario": name, "error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else f"exit {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def format_results(results: List[dict], baseline: Optional[dict] = None) -> str:
+    """Render one line per scenario run; with ``baseline``, wall time and prompt tokens show the change."""
+    previous = {}
+    for entry in (baseline or {}).get("scenarios", []):
+        for i, run in enumerate(entry.get("runs", [])):
+            previous[(entry["scenario"], i)] = run
+
+    header = f"{'scenario':<26} {'run':>3} {'wall s':>8} {'steps':>5} {'router llm':>10} {'llm calls':>9} {'prompt tok':>10} {'max prompt':>10} {'cache hits':>10} {'peak MB':>8}"
+    lines = [header, "-" * len(header)]
+    for entry in results:
+        if "error" in entry:
+            lines.append(f"{entry['scenario']:<26} error: {entry['error']}")
+            continue
+        for i, run in enumerate(entry["runs"]):
+            wall = f"{run['wall_s']:.3f}"
+            tokens = str(run["prompt_tokens"])
+            old = previous.get((entry["scenario"], i))
+            if old:
+                wall += f" ({(run['wall_s'] - old['wall_s']) / old['wall_s'] * 100:+.0f}%)" if old["wall_s"] else ""
+                tokens += f" ({run['prompt_tokens'] - old['prompt_tokens']:+d})"
+            hits = run["llm_cache_hits"] + run["tool_cache_hits"]
+            lines.append(
+                f"{entry['scenario']:<26} {i:>3} {wall:>8} {run['steps']:>5} {run['router_llm_calls']:>10} {run['llm_calls']:>9}"
+                f" {tokens:>10} {run['max_prompt_tokens']:>10} {hits:>10} {run['peak_python_mb']:>8.1f}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    p = argparse.ArgumentParser(description="Offline benchmarks for the research graph")
+    p.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated scenario names")
+    p.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake model call")
+    p.add_argument("--search-latency", type=float, default=0.05, help="Seconds per fake search call")
+    p.add_argument("--output", default=None, help="Results JSON path (default: output/benchmarks/<timestamp>-<commit>.json)")
+    p.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    p.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_scenario_in_process(args.worker)))
+        return 0
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        p.error(f"unknown scenarios: {', '.join(unknown)} (available: {', '.join(SCENARIOS)})")
+
+    results = []
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        results.append(run_scenario(name, args.llm_latency, args.search_latency))
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "llm_latency": args.llm_latency,
+        "search_latency": args.search_latency,
+        "scenarios": results,
+    }
+    output = args.output or os.path.join(ROOT, "output", "benchmarks", f"{time.strftime('%Y%m%d_%H%M%S')}-{commit or 'nogit'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+    print(f"\nResults written to {output}")
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
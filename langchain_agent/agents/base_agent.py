@@ -1,44 +1,87 @@
 from langgraph.graph import StateGraph
 from langchain_agent.utils.agents import State
-from langchain_agent.utils.agents import make_supervisor_node
+from langchain_agent.utils.agents import make_supervisor_node, make_planner_node, make_synthesis_node
 from langchain_agent.utils.config import Config
-from langchain_agent.agents.saas_finder_agent import saas_finder_node
-from langchain_agent.agents.market_agent import market_node
-from langchain_agent.agents.researcher_agent import researcher_node
-from langgraph.graph import START
+from langchain_agent.agents.saas_finder_agent import saas_finder_node, make_saas_finder_node
+from langchain_agent.agents.market_agent import market_node, make_market_node
+from langchain_agent.agents.researcher_agent import researcher_node, make_researcher_node
+from langgraph.graph import START, END
 from langchain_agent.utils.logger import setup_logger
 import sys
 
 logger = setup_logger(__name__, level=Config.LOG_LEVEL)
 
-try:
-    logger.info("Initializing LLM provider=%s", Config.LLM_PROVIDER)
-    llm = Config.get_chat_llm()
-    logger.info("LLM initialized successfully.")
-except Exception as e:
-    logger.exception("Failed to initialize LLM: %s", e)
-    # Re-raise to make failure explicit to caller
-    raise
 
 
+def get_llm(role: str | None = None):
+    """Return the chat model for ``role``; it is created when the first graph is built, not at import."""
+    try:
+        settings = Config.llm_settings(role)
+        logger.info("Initializing %s LLM provider=%s model=%s", role or "default", settings["provider"], settings["model"])
+        llm = Config.get_chat_llm(role)
+        logger.info("LLM initialized successfully.")
+        return llm
+    except Exception as e:
+        logger.exception("Failed to initialize LLM: %s", e)
+        # Re-raise to make failure explicit to caller
+        raise
+
+
+MEMBERS = ["saas_finder", "market", "research"]
+
+
+def build_research_graph(mode: str | None = None, checkpointer=None):
+    """Build the research graph.
+
+    ``mode`` is ``"router"`` (an LLM supervisor visits the workers one at a time)
+    or ``"planner"`` (one planning step fans out to all workers in parallel and a
+    join node synthesizes the report). Defaults to ``Config.ORCHESTRATION_MODE``.
+    """
+    mode = (mode or Config.ORCHESTRATION_MODE).lower()
+    if mode == "planner":
+        return build_planner_graph(checkpointer)
+    if mode != "router":
+        raise ValueError(f"Unsupported orchestration mode: {mode}")
 
-def build_research_graph():
     logger.info("Building research graph")
-    saas_finder_supervisor_node = make_supervisor_node(llm, ["saas_finder", "market", "research"])
+    saas_finder_supervisor_node = make_supervisor_node(get_llm("router"), MEMBERS, synthesis_llm=get_llm("synthesis"))
     research_builder = StateGraph(State)
 
-    research_builder.add_node("supervisor", saas_finder_supervisor_node)
+    research_builder.add_node("supervisor", saas_finder_supervisor_node, destinations=(*MEMBERS, END))
     logger.debug("Added node: supervisor")
-    research_builder.add_node("saas_finder", saas_finder_node)
+    research_builder.add_node("saas_finder", saas_finder_node, destinations=("supervisor",))
     logger.debug("Added node: saas_finder")
-    research_builder.add_node("market", market_node)
+    research_builder.add_node("market", market_node, destinations=("supervisor",))
     logger.debug("Added node: market")
-    research_builder.add_node("research", researcher_node)
+    research_builder.add_node("research", researcher_node, destinations=("supervisor",))
     logger.debug("Added node: research")
 
     research_builder.add_edge(START, "supervisor")
     logger.debug("Added start edge -> supervisor")
 
-    research_graph = research_builder.compile()
+    research_graph = research_builder.compile(checkpointer=checkpointer)
+    logger.info("Research graph built successfully")
+    return research_graph
+
+
+def build_planner_graph(checkpointer=None):
+    logger.info("Building research graph in planner mode")
+    research_builder = StateGraph(State)
+
+    research_builder.add_node("planner", make_planner_node(get_llm("router"), MEMBERS), destinations=(*MEMBERS, "synthesize"))
+    logger.debug("Added node: planner")
+    research_builder.add_node("saas_finder", make_saas_finder_node(goto="synthesize"), destinations=("synthesize",))
+    logger.debug("Added node: saas_finder")
+    research_builder.add_node("market", make_market_node(goto="synthesize"), destinations=("synthesize",))
+    logger.debug("Added node: market")
+    research_builder.add_node("research", make_researcher_node(goto="synthesize"), destinations=("synthesize",))
+    logger.debug("Added node: research")
+    research_builder.add_node("synthesize", make_synthesis_node(get_llm("synthesis")), destinations=(END,))
+    logger.debug("Added node: synthesize")
+
+    research_builder.add_edge(START, "planner")
+    logger.debug("Added start edge -> planner")
+
+    research_graph = research_builder.compile(checkpointer=checkpointer)
     logger.info("Research graph built successfully")
-    return research_graph
\ No newline at end of file
+    return research_graph
@@ -1,43 +1,30 @@
 """Researcher Agent - Conducts deep research on markets, competitors, and products using LangGraph."""
 
-from langchain_agent.tools.web_search import web_search, market_size_research
+from functools import cache
+
+from langchain_agent.tools.web_search import web_search, market_size_research, find_pages
+from langchain_agent.tools.web_fetch import fetch_page
 from langchain_agent.utils.config import Config
 from langchain_agent.tools.analysis import generate_chart, generate_distribution_strategy
 from langchain_agent.lib.prompts.market_analysis import SYSTEM_PROMPT as MARKET_SYSTEM
-from langchain_agent.utils.agents import State
-from langchain.agents import create_agent
-from langgraph.types import Command
-from langchain_core.messages import HumanMessage
-from typing import Literal
-llm = Config.get_chat_llm()
-
-
-market_agent = create_agent(
-    model=llm,
-    tools=[web_search, generate_distribution_strategy, market_size_research, generate_chart],
-)
-
-
-
-
-def market_node(state: State) -> Command[Literal["supervisor"]]:
-    from langchain_agent.utils.logger import setup_logger
-    logger = setup_logger(__name__, level=Config.LOG_LEVEL)
-
-    logger.info("Market node invoked")
-    try:
-        # Ensure the agent receives its system prompt and context (prevent missing role instructions)
-        state_with_system = state.copy()
-        state_with_system["messages"] = ([{"role": "system", "content": MARKET_SYSTEM}] + state_with_system.get("messages", []))
-        result = market_agent.invoke(state_with_system)
-        logger.debug("Market agent returned result: %s", result)
-        messages = [HumanMessage(content=result["messages"][-1].content, name="market")]
-        Command(
-            update={"messages": messages},
-            # We want our workers to ALWAYS "report back" to the supervisor when done
-            goto="supervisor",
-        )
-    except Exception as e:
-        logger.exception("Error running market agent: %s", e)
-        return Command(update={"messages": [HumanMessage(content=f"market failed: {e}", name="market")]}, goto="supervisor")
+from langchain_agent.utils.agents import make_worker_node
+from langchain_agent.utils.evidence import evidence_prompt, evidence_tools
+
+
+@cache
+def get_market_agent():
+    """Create the agent (and the worker chat model) on first use."""
+    from langchain.agents import create_agent
+
+    return create_agent(
+        model=Config.get_chat_llm("worker"),
+        tools=[web_search, generate_distribution_strategy, market_size_research, find_pages, fetch_page, generate_chart] + evidence_tools(),
+    )
+
+
+def make_market_node(goto: str = "supervisor"):
+    """Build the market worker node; ``goto`` is where it reports back when done."""
+    return make_worker_node("market", get_market_agent, evidence_prompt(MARKET_SYSTEM), goto=goto)
+
 
+market_node = make_market_node()
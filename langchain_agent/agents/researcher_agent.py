@@ -1,43 +1,30 @@
 """Researcher Agent - Conducts deep research on markets, competitors, and products using LangGraph."""
 
-from langchain_agent.tools.web_search import web_search, competitor_analysis, review_analysis, market_size_research
+from functools import cache
+
+from langchain_agent.tools.web_search import web_search, competitor_analysis, review_analysis, market_size_research, find_pages
+from langchain_agent.tools.web_fetch import fetch_page
 from langchain_agent.utils.config import Config
 from langchain_agent.tools.analysis import generate_chart
-from langchain_agent.utils.agents import State
+from langchain_agent.utils.agents import make_worker_node
+from langchain_agent.utils.evidence import evidence_prompt, evidence_tools
 from langchain_agent.lib.prompts.research import SYSTEM_PROMPT as RESEARCH_SYSTEM
-from langchain.agents import create_agent
-from langgraph.types import Command
-from langchain_core.messages import HumanMessage
-from typing import Literal
-llm = Config.get_chat_llm()
-
-
-research_agent = create_agent(
-    model=llm,
-    tools=[web_search, competitor_analysis, review_analysis, generate_chart],
-)
-
-
-
-
-def researcher_node(state: State) -> Command[Literal["supervisor"]]:
-    from langchain_agent.utils.logger import setup_logger
-    logger = setup_logger(__name__, level=Config.LOG_LEVEL)
-    from langchain_agent.lib.prompts.research import SYSTEM_PROMPT as RESEARCH_SYSTEM
-
-    logger.info("Researcher node invoked")
-    try:
-        # Ensure the agent receives its system prompt and context
-        state_with_system = state.copy()
-        state_with_system["messages"] = ([{"role": "system", "content": RESEARCH_SYSTEM}] + state_with_system.get("messages", []))
-        result = research_agent.invoke(state_with_system)
-        logger.debug("Research agent returned result: %s", result)
-        messages = [HumanMessage(content=result["messages"][-1].content, name="research")]
-        return Command( 
-            update={"messages": messages},
-            goto="supervisor",
-        )
-    except Exception as e:
-        logger.exception("Error running research agent: %s", e)
-        return Command(update={"messages": [HumanMessage(content=f"research failed: {e}", name="research")]}, goto="supervisor")
 
+
+@cache
+def get_research_agent():
+    """Create the agent (and the worker chat model) on first use."""
+    from langchain.agents import create_agent
+
+    return create_agent(
+        model=Config.get_chat_llm("worker"),
+        tools=[web_search, competitor_analysis, review_analysis, find_pages, fetch_page, generate_chart] + evidence_tools(),
+    )
+
+
+def make_researcher_node(goto: str = "supervisor"):
+    """Build the research worker node; ``goto`` is where it reports back when done."""
+    return make_worker_node("research", get_research_agent, evidence_prompt(RESEARCH_SYSTEM), goto=goto)
+
+
+researcher_node = make_researcher_node()
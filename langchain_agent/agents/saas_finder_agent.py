@@ -1,41 +1,29 @@
 """Researcher Agent - Conducts deep research on markets, competitors, and products using LangGraph."""
 
+from functools import cache
+
 from langchain_agent.utils.config import Config
-from langchain_agent.tools.analysis import analyze_pain_killer_vitamin, analyze_bootstrapping_feasibility, analyze_payment_willingness
+from langchain_agent.tools.analysis import evaluate_idea
 from langchain_agent.tools.web_search import web_search
-from langchain_agent.utils.agents import State
+from langchain_agent.utils.agents import make_worker_node
+from langchain_agent.utils.evidence import evidence_prompt, evidence_tools
 from langchain_agent.lib.prompts.saas_finder import SYSTEM_PROMPT as SAAS_FINDER_SYSTEM
-from langchain.agents import create_agent
-from langgraph.types import Command
-from langchain_core.messages import HumanMessage
-from typing import Literal
-llm = Config.get_chat_llm()
-
-
-saas_finder_agent = create_agent(
-    model=llm,
-    tools=[ analyze_pain_killer_vitamin, analyze_bootstrapping_feasibility, analyze_payment_willingness, web_search],
-)
-
-
-
-
-def saas_finder_node(state: State) -> Command[Literal["supervisor"]]:
-    from langchain_agent.utils.logger import setup_logger
-    logger = setup_logger(__name__, level=Config.LOG_LEVEL)
-
-    logger.info("SaaS finder node invoked")
-    try:
-        # Ensure the agent receives its system prompt and context
-        state_with_system = state.copy()
-        state_with_system["messages"] = ([{"role": "system", "content": SAAS_FINDER_SYSTEM}] + state_with_system.get("messages", []))
-        result = saas_finder_agent.invoke(state_with_system)
-        logger.debug("SaaS finder agent returned result: %s", result)
-        messages = [HumanMessage(content=result["messages"][-1].content, name="saas_finder")]
-        return Command(
-            update={"messages": messages},
-            goto="supervisor",
-        )
-    except Exception as e:
-        logger.exception("Error running saas_finder agent: %s", e)
-        return Command(update={"messages": [HumanMessage(content=f"saas_finder failed: {e}", name="saas_finder")]}, goto="supervisor")
+
+
+@cache
+def get_saas_finder_agent():
+    """Create the agent (and the worker chat model) on first use."""
+    from langchain.agents import create_agent
+
+    return create_agent(
+        model=Config.get_chat_llm("worker"),
+        tools=[evaluate_idea, web_search] + evidence_tools(),
+    )
+
+
+def make_saas_finder_node(goto: str = "supervisor"):
+    """Build the saas_finder worker node; ``goto`` is where it reports back when done."""
+    return make_worker_node("saas_finder", get_saas_finder_agent, evidence_prompt(SAAS_FINDER_SYSTEM), goto=goto)
+
+
+saas_finder_node = make_saas_finder_node()
@@ -0,0 +1,173 @@
+"""Batch research mode: run many niches through the research graph on a worker pool.
+
+Reports are written to ``Config.REPORTS_DIR`` (one file per niche, see
+``report_path``). Niches that already have a report are skipped, so re-running
+the same batch after a crash resumes where it stopped; a niche that was
+interrupted mid-run continues from its last checkpoint. Thread and process
+workers share the on-disk search and LLM caches.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+
+from langchain_agent.utils.checkpoint import get_checkpointer, reset_finished_run, run_config
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.instrumentation import RunTracer
+from langchain_agent.utils.knowledge_base import forget_run, initial_state
+from langchain_agent.utils.logger import log_context, setup_logger
+from langchain_agent.utils.reports import final_report_text, normalize_niche, report_path, save_report
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+_GRAPH = None
+_GRAPH_MODE: Optional[str] = None
+_GRAPH_LOCK = threading.Lock()
+
+
+def read_niches(source: str) -> List[str]:
+    """Read one niche per line from a file path, or from stdin when ``source`` is ``-``.
+
+    Blank lines and ``#`` comments are ignored, and niches that would share a
+    report (same words, ignoring case and spacing) are dropped after the first.
+    """
+    if source == "-":
+        lines: Iterable[str] = sys.stdin.read().splitlines()
+    else:
+        with open(source, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    niches: List[str] = []
+    seen = set()
+    for line in lines:
+        niche = line.strip()
+        if not niche or niche.startswith("#") or normalize_niche(niche) in seen:
+            continue
+        seen.add(normalize_niche(niche))
+        niches.append(niche)
+    return niches
+
+
+def _get_graph(mode: Optional[str]):
+    """Build the research graph once per process and share it across worker threads.
+
+    The graph has no checkpointer of its own; each niche attaches one for the length of its run.
+    """
+    global _GRAPH, _GRAPH_MODE
+    with _GRAPH_LOCK:
+        if _GRAPH is None or _GRAPH_MODE != mode:
+            from langchain_agent.agents.base_agent import build_research_graph
+
+            _GRAPH = build_research_graph(mode)
+            _GRAPH_MODE = mode
+        return _GRAPH
+
+
+def _init_worker(mode: Optional[str]) -> None:
+    Config.ensure_directories()
+    _get_graph(mode)
+
+
+def _run_niche(graph, niche: str, path: str) -> None:
+    """Run (or resume) the research for one niche and save its report to ``path``."""
+    # One checkpoint thread per niche: a niche that crashed mid-run resumes from its last completed step
+    thread_id = f"batch-{os.path.splitext(os.path.basename(path))[0]}"
+    tracer = RunTracer(thread_id, os.path.join(Config.TRACE_DIR, f"{thread_id}.jsonl")) if Config.TRACE_ENABLED else None
+    config = run_config(thread_id, [tracer] if tracer else None)
+    # A finished thread whose report was deleted starts over rather than replaying its final state
+    if reset_finished_run(graph, thread_id):
+        logger.info("Restarting %r: its earlier run finished but the report is gone", niche)
+    graph_input = None if graph.get_state(config).next else initial_state(niche)
+    try:
+        with tracer.activate() if tracer else nullcontext(), log_context(thread_id):
+            result = graph.invoke(graph_input, config=config)
+    finally:
+        forget_run(thread_id)
+        if tracer:
+            tracer.close()
+            logger.debug("Trace for %r:\n%s", niche, tracer.format_summary())
+    report = final_report_text(result)
+    if not report:
+        raise RuntimeError("graph finished without a final report")
+    save_report(path, report)
+
+
+def research_niche(niche: str, mode: Optional[str] = None) -> Dict:
+    """Research a single niche and write its report; returns a status record."""
+    path = report_path(niche)
+    record = {"niche": niche, "report_path": path, "status": "skipped", "duration": 0.0, "error": None}
+    if os.path.exists(path):
+        logger.info("Skipping %r: report already exists at %s", niche, path)
+        return record
+
+    start = time.perf_counter()
+    try:
+        with get_checkpointer() as checkpointer:
+            _run_niche(_get_graph(mode).copy(update={"checkpointer": checkpointer}), niche, path)
+        record["status"] = "finished"
+    except Exception as e:
+        logger.exception("Research failed for %r: %s", niche, e)
+        record["status"] = "failed"
+        record["error"] = str(e)
+    record["duration"] = round(time.perf_counter() - start, 3)
+    logger.info("Niche %r %s in %.1fs", niche, record["status"], record["duration"])
+    return record
+
+
+def run_batch(niches: List[str], workers: int = 2, executor: str = "thread", mode: Optional[str] = None) -> List[Dict]:
+    """Research ``niches`` concurrently and return one status record per niche, in input order."""
+    pending = [n for n in niches if not os.path.exists(report_path(n))]
+    results: Dict[str, Dict] = {
+        n: {"niche": n, "report_path": report_path(n), "status": "skipped", "duration": 0.0, "error": None}
+        for n in niches
+        if n not in pending
+    }
+    logger.info("Batch: %d niches, %d already done, %d %s workers", len(niches), len(results), workers, executor)
+
+    if pending:
+        pool: Executor
+        if executor == "process":
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(mode,))
+        elif executor == "thread":
+            pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="research")
+        else:
+            raise ValueError(f"Unsupported executor: {executor}")
+
+        with pool:
+            futures = {pool.submit(research_niche, niche, mode): niche for niche in pending}
+            for future in as_completed(futures):
+                niche = futures[future]
+                try:
+                    results[niche] = future.result()
+                except Exception as e:
+                    # A crashed worker process surfaces here rather than inside research_niche
+                    logger.exception("Worker crashed for %r: %s", niche, e)
+                    results[niche] = {"niche": niche, "report_path": report_path(niche), "status": "failed", "duration": 0.0, "error": str(e)}
+
+    return [results[n] for n in niches]
+
+
+def format_summary(results: List[Dict]) -> str:
+    """Render per-niche status and duration as a plain-text table."""
+    width = max([len("niche")] + [min(len(r["niche"]), 60) for r in results])
+    lines = [f"{'niche':<{width}}  {'status':<8}  {'seconds':>8}", "-" * (width + 20)]
+    for r in results:
+        lines.append(f"{r['niche'][:60]:<{width}}  {r['status']:<8}  {r['duration']:>8.1f}")
+    counts: Dict[str, int] = {}
+    for r in results:
+        counts[r["status"]] = counts.get(r["status"], 0) + 1
+    lines.append("-" * (width + 20))
+    lines.append(", ".join(f"{status}: {count}" for status, count in sorted(counts.items())))
+    return "\n".join(lines)
+
+
+def write_summary(results: List[Dict], reports_dir: Optional[str] = None) -> str:
+    """Write the batch summary as JSON next to the reports and return its path."""
+    path = os.path.join(reports_dir or Config.REPORTS_DIR, f"batch_summary_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    return path
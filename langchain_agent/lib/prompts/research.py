@@ -19,5 +19,6 @@ SYSTEM_PROMPT = (
 	"  - `findings`: list of 3 short bullet points (strings) highlighting key competitor facts or observations.\n"
 	"  - `next`: one of ['saas_finder','market','research','FINISH'] indicating suggested next worker (or FINISH).\n"
 	"  - `confidence`: one of ['low','medium','high'] indicating your confidence in these findings.\n"
+	"  - `competitors`: list of the competitor product names you found (empty list if none).\n"
 	"When you are done with your assigned analysis, stop and return your result; do NOT attempt to route or synthesize a final report — the Supervisor will handle next steps and final synthesis.\n"
 )
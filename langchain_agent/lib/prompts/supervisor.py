@@ -53,3 +53,29 @@ SYNTHESIS_PROMPT = (
     "## Actionable Next Steps (3-5 items)\n"
     "## Final Recommendation (build/validate/wait)\n\n"
     "Be concise, use bullet lists where appropriate, and include citations or data points when available. Output ONLY the Markdown report.")
+
+
+REPORT_SECTION_PROMPT = (
+    "You are writing ONE section of a Markdown SaaS research report. The messages below are the user's request and the worker\n"
+    "findings this section draws on (each message includes the worker name).\n\n"
+    "Write only this section, starting with:\n{heading}\n\n"
+    "{guidance}\n"
+    "Do not write any other section. Be concise, use bullet lists where appropriate, and include citations or data points when available.\n"
+    "Output ONLY the Markdown section.")
+
+
+
+PLANNER_PROMPT = (
+    "You are the Planner coordinating three specialist agents that will work IN PARALLEL on the user's request:\n"
+    "- `saas_finder`: Finds promising SaaS ideas and evaluates painkiller/vitamin, willingness to pay and bootstrapping feasibility.\n"
+    "- `market`: Performs market sizing (TAM/SAM/SOM), growth trends and distribution strategy.\n"
+    "- `research`: Conducts deep dives into competitors, reviews, and technical feasibility.\n\n"
+    "Write ONE self-contained sub-task for EACH specialist. The specialists cannot see each other's work, so every task must\n"
+    "restate the niche, target customer and any constraints from the user request. Together the tasks must cover everything\n"
+    "needed for the final report: recommended idea, market size, top 3 competitors, pain points, monetization, bootstrap\n"
+    "feasibility and next steps.\n\n"
+    "Return ONLY a JSON object with exactly the fields `saas_finder`, `market` and `research`, each a short task description. Example:\n"
+    "```\n"
+    "{\"saas_finder\": \"Propose 3 SaaS ideas for ...\", \"market\": \"Estimate TAM/SAM/SOM for ...\", \"research\": \"Identify the top competitors in ...\"}\n"
+    "```\n"
+)
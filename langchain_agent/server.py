@@ -0,0 +1,508 @@
+"""HTTP service mode: research jobs on a warm graph, with live progress over server-sent events.
+
+``python main.py --serve`` starts a long-running asyncio HTTP server (standard
+library only) that builds the research graph and the model client once and
+keeps them, and an async checkpointer, open for its lifetime. Submitted jobs
+wait in a bounded priority queue and run ``Config.SERVER_CONCURRENCY`` at a
+time; submissions beyond ``Config.SERVER_QUEUE_SIZE`` waiting jobs get HTTP 429.
+
+Endpoints::
+
+    POST   /jobs              {"prompt": "...", "priority": 0, "mode": "router"} -> 202 with the job
+    GET    /jobs              every known job, plus queue metrics
+    GET    /jobs/{id}         job status, with the report once finished
+    GET    /jobs/{id}/events  server-sent events: status, progress and report tokens
+    DELETE /jobs/{id}         cancel a queued or running job
+    GET    /metrics           queue depth, running and finished jobs, and call metrics (Prometheus text)
+    GET    /healthz
+
+Higher priorities run first; equal priorities run in submission order. The
+event stream replays a job's events from the start (or after ``Last-Event-ID``)
+and ends with the job's final status event.
+"""
+import asyncio
+import itertools
+import json
+import os
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from langchain_agent.streaming import STREAM_MODES, ProgressRenderer
+from langchain_agent.utils.checkpoint import aget_checkpointer, new_run_id, run_config
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.logger import log_context, setup_logger
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+QUEUED, RUNNING, FINISHED, FAILED, CANCELLED = "queued", "running", "finished", "failed", "cancelled"
+DONE = frozenset({FINISHED, FAILED, CANCELLED})
+
+_MAX_BODY_BYTES = 64 * 1024
+# Comment lines sent on idle event streams so proxies do not time them out
+_KEEPALIVE_SECONDS = 15.0
+_CANCEL_WAIT_SECONDS = 5.0
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted while ``max_queued`` jobs are already waiting."""
+
+
+class Event(NamedTuple):
+    id: int
+    name: str
+    data: dict
+
+
+@dataclass
+class Job:
+    """One research request and everything published about it so far."""
+
+    id: str
+    prompt: str
+    priority: int = 0
+    mode: Optional[str] = None
+    status: str = QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    report: Optional[str] = None
+    report_path: Optional[str] = None
+    error: Optional[str] = None
+    events: List[Event] = field(default_factory=list)
+    _subscribers: Set[asyncio.Queue] = field(default_factory=set, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def publish(self, name: str, data: dict) -> None:
+        event = Event(len(self.events) + 1, name, data)
+        self.events.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def subscribe(self, after: int = 0) -> Tuple[asyncio.Queue, List[Event]]:
+        """Return a queue of future events and the past events with ids above ``after``."""
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        return queue, self.events[after:]
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the job is finished, failed or cancelled; False on timeout."""
+        queue, _ = self.subscribe(len(self.events))
+        try:
+            await asyncio.wait_for(self._until_done(queue), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.unsubscribe(queue)
+
+    async def _until_done(self, queue: asyncio.Queue) -> None:
+        while self.status not in DONE:
+            await queue.get()
+
+    def set_status(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        now = time.time()
+        if status == RUNNING:
+            self.started_at = now
+        elif status in DONE:
+            self.finished_at = now
+        self.publish("status", self.to_dict())
+
+    def to_dict(self, include_report: bool = False) -> Dict[str, Any]:
+        record = {
+            "id": self.id,
+            "prompt": self.prompt,
+            "priority": self.priority,
+            "mode": self.mode,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "report_path": self.report_path,
+            "error": self.error,
+            "events": len(self.events),
+        }
+        if include_report:
+            record["report"] = self.report
+        return record
+
+
+class JobScheduler:
+    """Bounded priority queue of jobs served by ``concurrency`` worker tasks.
+
+    ``runner(job)`` does the work and returns the report text; it may publish
+    events on the job while it runs. Cancelled queued jobs are skipped when
+    they reach the front of the queue, so they do not count against the bound.
+    """
+
+    def __init__(self, runner: Callable[[Job], Awaitable[str]], concurrency: int = 2, max_queued: int = 32, history: int = 100):
+        self.runner = runner
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max(1, max_queued)
+        self.history = max(0, history)
+        self.jobs: Dict[str, Job] = {}
+        self.totals: Dict[str, int] = {FINISHED: 0, FAILED: 0, CANCELLED: 0}
+        self.wait_seconds = 0.0
+        self._queue: "asyncio.PriorityQueue[Tuple[int, int, str]]" = asyncio.PriorityQueue()
+        self._order = itertools.count()
+        self._queued = 0
+        self._running = 0
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        for i in range(self.concurrency - len(self._workers)):
+            self._workers.append(asyncio.create_task(self._work(), name=f"research-job-{i}"))
+
+    async def stop(self) -> None:
+        for job in self.jobs.values():
+            if job.status == RUNNING and job._task is not None:
+                job._task.cancel()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+
+    def submit(self, prompt: str, priority: int = 0, mode: Optional[str] = None) -> Job:
+        if self._queued >= self.max_queued:
+            raise QueueFull(f"{self._queued} jobs are already queued")
+        job = Job(id=new_run_id(), prompt=prompt, priority=priority, mode=mode)
+        self.jobs[job.id] = job
+        self._queued += 1
+        # PriorityQueue pops the smallest entry: negate so higher priorities run first, FIFO within one
+        self._queue.put_nowait((-priority, next(self._order), job.id))
+        job.publish("status", job.to_dict())
+        logger.info("Job %s queued (priority %d, %d waiting): %s", job.id, priority, self._queued, prompt)
+        return job
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; returns None for unknown ids. Finished jobs are left as they are."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if job.status == QUEUED:
+            self._queued -= 1
+            self._finish(job, CANCELLED)
+        elif job.status == RUNNING and job._task is not None:
+            job._task.cancel()
+        return job
+
+    def position(self, job: Job) -> Optional[int]:
+        """1-based place of a queued job in the run order, or None when it is not queued."""
+        if job.status != QUEUED:
+            return None
+        # jobs is in submission order and sorted() is stable, so this matches the queue's run order
+        queued = sorted((j for j in self.jobs.values() if j.status == QUEUED), key=lambda j: -j.priority)
+        return queued.index(job) + 1
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queued,
+            "running": self._running,
+            "max_queued": self.max_queued,
+            "concurrency": self.concurrency,
+            "totals": dict(self.totals),
+            "wait_seconds_total": round(self.wait_seconds, 3),
+        }
+
+    async def _work(self) -> None:
+        while True:
+            _, _, job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                continue
+            self._queued -= 1
+            self._running += 1
+            try:
+                await self._run(job)
+            finally:
+                self._running -= 1
+
+    async def _run(self, job: Job) -> None:
+        job.set_status(RUNNING)
+        self.wait_seconds += job.started_at - job.created_at
+        job._task = asyncio.create_task(self.runner(job))
+        try:
+            await asyncio.wait({job._task})
+        except asyncio.CancelledError:
+            # The scheduler is stopping: take the job down with it
+            job._task.cancel()
+            await asyncio.gather(job._task, return_exceptions=True)
+            self._finish(job, CANCELLED)
+            raise
+        if job._task.cancelled():
+            self._finish(job, CANCELLED)
+        elif job._task.exception() is not None:
+            error = job._task.exception()
+            logger.error("Job %s failed: %s", job.id, error, exc_info=error)
+            self._finish(job, FAILED, str(error) or type(error).__name__)
+        else:
+            job.report = job._task.result()
+            self._finish(job, FINISHED)
+
+    def _finish(self, job: Job, status: str, error: Optional[str] = None) -> None:
+        job._task = None
+        job.set_status(status, error)
+        self.totals[status] += 1
+        logger.info("Job %s %s", job.id, status)
+        done = [j for j in self.jobs.values() if j.status in DONE]
+        for old in done[: max(0, len(done) - self.history)]:
+            if not old._subscribers:
+                del self.jobs[old.id]
+
+
+class _JobRenderer(ProgressRenderer):
+    """Publish the progress lines and report tokens of a streamed run as job events."""
+
+    def __init__(self, job: Job):
+        super().__init__(out=None)
+        self.job = job
+
+    def _print(self, text: str) -> None:
+        self.job.publish("progress", {"text": text})
+
+    def _emit_report(self, token: Any) -> None:
+        if not isinstance(token, str) or not token:
+            return
+        self.report_parts.append(token)
+        self.job.publish("token", {"text": token})
+
+
+class ResearchService:
+    """Runs jobs on research graphs built once per orchestration mode and shared by every job."""
+
+    def __init__(self, checkpointer, default_mode: Optional[str] = None):
+        self.checkpointer = checkpointer
+        self.default_mode = (default_mode or Config.ORCHESTRATION_MODE).lower()
+        self._graphs: Dict[str, Any] = {}
+        self._graphs_lock = asyncio.Lock()
+
+    async def warm_up(self) -> None:
+        """Create the model clients and build the default graph before the first job arrives."""
+        for role in Config.LLM_ROLE_SETTINGS:
+            await asyncio.to_thread(Config.get_chat_llm, role)
+        await self.graph(self.default_mode)
+
+    async def graph(self, mode: Optional[str] = None):
+        mode = (mode or self.default_mode).lower()
+        async with self._graphs_lock:
+            if mode not in self._graphs:
+                from langchain_agent.agents.base_agent import build_research_graph
+
+                self._graphs[mode] = await asyncio.to_thread(build_research_graph, mode, self.checkpointer)
+            return self._graphs[mode]
+
+    async def run(self, job: Job) -> str:
+        from langchain_agent.utils.instrumentation import RunTracer
+        from langchain_agent.utils.knowledge_base import forget_run, initial_state
+        from langchain_agent.utils.reports import report_path, save_report
+
+        graph = await self.graph(job.mode)
+        thread_id = f"job-{job.id}"
+        tracer = RunTracer(thread_id, os.path.join(Config.TRACE_DIR, f"{thread_id}.jsonl")) if Config.TRACE_ENABLED else None
+        config = run_config(thread_id, [tracer] if tracer else None)
+        renderer = _JobRenderer(job)
+        try:
+            with tracer.activate() if tracer else nullcontext(), log_context(thread_id):
+                async for namespace, mode, chunk in graph.astream(initial_state(job.prompt), config=config, stream_mode=STREAM_MODES, subgraphs=True):
+                    renderer.handle(namespace, mode, chunk)
+        finally:
+            forget_run(thread_id)
+            if tracer:
+                tracer.close()
+        if not renderer.report:
+            raise RuntimeError("graph finished without a final report")
+        job.report_path = save_report(report_path(job.prompt), renderer.report)
+        return renderer.report
+
+
+class ResearchServer:
+    """Minimal HTTP/1.1 front end for a :class:`JobScheduler` (one request per connection)."""
+
+    def __init__(self, scheduler: JobScheduler):
+        self.scheduler = scheduler
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await _read_request(reader)
+            if request is not None:
+                await self._route(writer, *request)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            logger.exception("Request failed: %s", e)
+            try:
+                _write_json(writer, HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+                await writer.drain()
+            except ConnectionError:
+                pass
+        finally:
+            writer.close()
+
+    async def _route(self, writer: asyncio.StreamWriter, method: str, path: str, headers: Dict[str, str], body: bytes) -> None:
+        parts = [p for p in path.split("?", 1)[0].split("/") if p]
+        if parts == ["healthz"] and method == "GET":
+            _write_json(writer, HTTPStatus.OK, {"status": "ok"})
+        elif parts == ["metrics"] and method == "GET":
+            _write(writer, HTTPStatus.OK, self.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8")
+        elif parts == ["jobs"] and method == "POST":
+            self._submit(writer, body)
+        elif parts == ["jobs"] and method == "GET":
+            jobs = [job.to_dict() for job in self.scheduler.jobs.values()]
+            _write_json(writer, HTTPStatus.OK, {"jobs": jobs, "queue": self.scheduler.metrics()})
+        elif len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.scheduler.jobs.get(parts[1])
+            if job is None:
+                _write_json(writer, HTTPStatus.NOT_FOUND, {"error": f"unknown job {parts[1]}"})
+            elif len(parts) == 3 and parts[2] == "events" and method == "GET":
+                await self._stream_events(writer, job, _int(headers.get("last-event-id"), 0))
+                return
+            elif len(parts) == 2 and method == "GET":
+                _write_json(writer, HTTPStatus.OK, {**job.to_dict(include_report=True), "position": self.scheduler.position(job)})
+            elif len(parts) == 2 and method == "DELETE":
+                self.scheduler.cancel(job.id)
+                # A running job stops at its next await; answer with its final status when that is quick
+                await job.wait(_CANCEL_WAIT_SECONDS)
+                _write_json(writer, HTTPStatus.OK, job.to_dict())
+            else:
+                _write_json(writer, HTTPStatus.METHOD_NOT_ALLOWED, {"error": f"{method} not allowed on {path}"})
+        else:
+            _write_json(writer, HTTPStatus.NOT_FOUND, {"error": f"no route for {method} {path}"})
+        await writer.drain()
+
+    def _submit(self, writer: asyncio.StreamWriter, body: bytes) -> None:
+        try:
+            payload = json.loads(body or b"{}")
+            prompt = str(payload.get("prompt") or "").strip()
+            priority = int(payload.get("priority", 0))
+            mode = payload.get("mode")
+        except (ValueError, TypeError, AttributeError):
+            _write_json(writer, HTTPStatus.BAD_REQUEST, {"error": "expected a JSON object with 'prompt', optional 'priority' and 'mode'"})
+            return
+        if not prompt:
+            _write_json(writer, HTTPStatus.BAD_REQUEST, {"error": "'prompt' is required"})
+            return
+        if mode not in (None, "router", "planner"):
+            _write_json(writer, HTTPStatus.BAD_REQUEST, {"error": f"unsupported mode {mode!r}"})
+            return
+        try:
+            job = self.scheduler.submit(prompt, priority=priority, mode=mode)
+        except QueueFull as e:
+            _write_json(writer, HTTPStatus.TOO_MANY_REQUESTS, {"error": str(e), "queue": self.scheduler.metrics()})
+            return
+        _write_json(writer, HTTPStatus.ACCEPTED, {**job.to_dict(), "position": self.scheduler.position(job)})
+
+    async def _stream_events(self, writer: asyncio.StreamWriter, job: Job, after: int) -> None:
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\nConnection: close\r\n\r\n"
+        )
+        queue, past = job.subscribe(after)
+        try:
+            for event in past:
+                writer.write(_sse(event))
+            await writer.drain()
+            if job.status in DONE:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), _KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    writer.write(b": keepalive\n\n")
+                    await writer.drain()
+                    continue
+                writer.write(_sse(event))
+                await writer.drain()
+                if _is_final(event):
+                    return
+        finally:
+            job.unsubscribe(queue)
+
+    def prometheus_text(self) -> str:
+        from langchain_agent.utils.instrumentation import prometheus_text
+
+        metrics = self.scheduler.metrics()
+        lines = []
+        for metric, metric_type, help_text, value in (
+            ("saas_research_jobs_queued", "gauge", "Research jobs waiting in the service queue", metrics["queued"]),
+            ("saas_research_jobs_running", "gauge", "Research jobs running", metrics["running"]),
+            ("saas_research_job_queue_capacity", "gauge", "Most jobs that may wait in the queue", metrics["max_queued"]),
+            ("saas_research_job_concurrency", "gauge", "Most jobs that run at once", metrics["concurrency"]),
+            ("saas_research_job_wait_seconds_total", "counter", "Time started jobs spent queued", metrics["wait_seconds_total"]),
+        ):
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {metric_type}", f"{metric} {value:g}"]
+        lines += ["# HELP saas_research_jobs_total Research jobs by final status", "# TYPE saas_research_jobs_total counter"]
+        lines += [f'saas_research_jobs_total{{status="{status}"}} {count}' for status, count in sorted(metrics["totals"].items())]
+        return "\n".join(lines) + "\n" + prometheus_text()
+
+
+def _is_final(event: Event) -> bool:
+    return event.name == "status" and event.data.get("status") in DONE
+
+
+def _sse(event: Event) -> bytes:
+    return f"id: {event.id}\nevent: {event.name}\ndata: {json.dumps(event.data)}\n\n".encode("utf-8")
+
+
+def _int(value: Optional[str], default: int) -> int:
+    try:
+        return int(value) if value is not None else default
+    except ValueError:
+        return default
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    """Parse one request into (method, path, lower-cased headers, body); None when the client sent nothing."""
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial:
+            return None
+        raise
+    lines = head.decode("latin-1").split("\r\n")
+    method, path, _ = (lines[0].split(" ", 2) + ["", ""])[:3]
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    length = min(_int(headers.get("content-length"), 0), _MAX_BODY_BYTES)
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method.upper(), path, headers, body
+
+
+def _write(writer: asyncio.StreamWriter, status: HTTPStatus, body: bytes, content_type: str) -> None:
+    writer.write(
+        f"HTTP/1.1 {status.value} {status.phrase}\r\nContent-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+    )
+
+
+def _write_json(writer: asyncio.StreamWriter, status: HTTPStatus, payload: Any) -> None:
+    _write(writer, status, json.dumps(payload).encode("utf-8"), "application/json")
+
+
+async def serve(host: Optional[str] = None, port: Optional[int] = None, mode: Optional[str] = None, ready: Optional[Callable[[str], None]] = None) -> None:
+    """Run the research service until cancelled; ``ready`` is called with the base URL once it is listening."""
+    async with aget_checkpointer() as checkpointer:
+        service = ResearchService(checkpointer, default_mode=mode)
+        logger.info("Warming up the %s research graph", service.default_mode)
+        await service.warm_up()
+        scheduler = JobScheduler(service.run, Config.SERVER_CONCURRENCY, Config.SERVER_QUEUE_SIZE, Config.SERVER_JOB_HISTORY)
+        scheduler.start()
+        server = await asyncio.start_server(ResearchServer(scheduler).handle, host or Config.SERVER_HOST, Config.SERVER_PORT if port is None else port)
+        bound_host, bound_port = server.sockets[0].getsockname()[:2]
+        url = f"http://{bound_host}:{bound_port}"
+        logger.info("Serving research jobs on %s (%d concurrent, up to %d queued)", url, scheduler.concurrency, scheduler.max_queued)
+        if ready is not None:
+            ready(url)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await scheduler.stop()
@@ -0,0 +1,134 @@
+"""Live progress and token streaming for research runs.
+
+Node starts, worker tool calls and the final report are rendered as they
+happen instead of after the whole run. Report tokens come from the synthesis
+model call (tagged ``final_report``) and are also written incrementally to a
+``.partial`` file that is renamed into place once the report is complete.
+"""
+import os
+import sys
+from typing import Any, Optional, TextIO
+
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+
+from langchain_agent.utils.knowledge_base import initial_state
+from langchain_agent.utils.response_utils import get_text
+
+STREAM_MODES = ["tasks", "updates", "messages"]
+
+
+class ProgressRenderer:
+    """Render ``(namespace, mode, chunk)`` stream items to a console and a report file."""
+
+    def __init__(self, out: TextIO = sys.stdout, report_file: Optional[str] = None):
+        self.out = out
+        self.report_file = report_file
+        self.report_parts: list[str] = []
+        self._partial = None
+        self._in_report = False
+
+    def __enter__(self):
+        if self.report_file:
+            os.makedirs(os.path.dirname(self.report_file) or ".", exist_ok=True)
+            self._partial = open(f"{self.report_file}.partial", "w", encoding="utf-8")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._partial is not None:
+            self._partial.close()
+            if exc_type is None:
+                if self.report_parts:
+                    os.replace(f"{self.report_file}.partial", self.report_file)
+                else:
+                    os.remove(f"{self.report_file}.partial")
+        return False
+
+    @property
+    def report(self) -> str:
+        return "".join(self.report_parts)
+
+    def _print(self, text: str) -> None:
+        if self._in_report:
+            self.out.write("\n")
+            self._in_report = False
+        self.out.write(text + "\n")
+        self.out.flush()
+
+    def handle(self, namespace: tuple, mode: str, chunk: Any) -> None:
+        worker = namespace[0].split(":", 1)[0] if namespace else None
+        if mode == "tasks":
+            self._on_task(worker, chunk)
+        elif mode == "updates":
+            self._on_update(worker, chunk)
+        elif mode == "messages":
+            self._on_message(*chunk)
+
+    def _on_task(self, worker: Optional[str], task: dict) -> None:
+        # Only top-level node starts; a task event without "result" is a start
+        if worker is None and "result" not in task:
+            self._print(f"▶ {task['name']} started")
+
+    def _on_update(self, worker: Optional[str], update: dict) -> None:
+        for node, payload in (update or {}).items():
+            messages = payload.get("messages", []) if isinstance(payload, dict) else []
+            if worker is None:
+                for message in messages:
+                    # Cached or non-streaming synthesis produces no tokens; emit the report in one piece
+                    if getattr(message, "name", None) == "final_report" and not self.report_parts:
+                        self._emit_report(get_text(message))
+                goto = payload.get("next") if isinstance(payload, dict) else None
+                self._print(f"✔ {node} finished" + (f" → {goto}" if goto else ""))
+                continue
+            for message in messages:
+                if isinstance(message, AIMessage):
+                    for call in message.tool_calls:
+                        self._print(f"  [{worker}] tool call: {call['name']}({_preview(call['args'])})")
+                elif isinstance(message, ToolMessage):
+                    self._print(f"  [{worker}] tool result: {message.name} ({len(get_text(message))} chars)")
+
+    def _on_message(self, message: Any, metadata: dict) -> None:
+        if "final_report" not in (metadata.get("tags") or []) or not isinstance(message, AIMessageChunk):
+            return
+        self._emit_report(get_text(message))
+
+    def _emit_report(self, token: Any) -> None:
+        if not isinstance(token, str) or not token:
+            return
+        if not self._in_report and not self.report_parts:
+            self.out.write("\n")
+        self._in_report = True
+        self.report_parts.append(token)
+        self.out.write(token)
+        self.out.flush()
+        if self._partial is not None:
+            self._partial.write(token)
+            self._partial.flush()
+
+
+def _preview(value: Any, limit: int = 80) -> str:
+    text = str(value)
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def _graph_input(user_prompt: str, resume: bool) -> Optional[dict]:
+    # None tells a checkpointed graph to continue the thread instead of starting over
+    return None if resume else initial_state(user_prompt)
+
+
+def stream_research(graph, user_prompt: str, report_file: Optional[str] = None, out: TextIO = sys.stdout, config: Optional[dict] = None, resume: bool = False) -> str:
+    """Run ``graph`` with ``graph.stream`` and render progress live; returns the final report text.
+
+    With ``resume=True`` the checkpointed run in ``config`` is continued instead of started.
+    """
+    with ProgressRenderer(out, report_file) as renderer:
+        for namespace, mode, chunk in graph.stream(_graph_input(user_prompt, resume), config=config, stream_mode=STREAM_MODES, subgraphs=True):
+            renderer.handle(namespace, mode, chunk)
+    return renderer.report
+
+
+async def astream_research(graph, user_prompt: str, report_file: Optional[str] = None, out: TextIO = sys.stdout, config: Optional[dict] = None, resume: bool = False) -> str:
+    """Async variant of :func:`stream_research` built on ``graph.astream``."""
+    with ProgressRenderer(out, report_file) as renderer:
+        async for namespace, mode, chunk in graph.astream(_graph_input(user_prompt, resume), config=config, stream_mode=STREAM_MODES, subgraphs=True):
+            renderer.handle(namespace, mode, chunk)
+    return renderer.report
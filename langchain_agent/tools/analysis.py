@@ -1,20 +1,64 @@
 """Analysis tools for agents."""
 
-from langchain_core.tools import tool
+import asyncio
+from functools import cache
+from typing import Callable, List, Literal, TypedDict
+
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import StructuredTool
 from langchain_agent.tools.chart_generator import ChartGenerator
+from langchain_agent.utils.concurrency import alimit, family_limit, limit
+from langchain_agent.utils.llm_cache import cached_llm
 from langchain_agent.utils.config import Config
 from langchain_agent.utils.logger import setup_logger
 from langchain_agent.utils.response_utils import get_text
 
 logger = setup_logger(__name__, level=Config.LOG_LEVEL)
 
-llm = Config.get_chat_llm()
-chart_generator = ChartGenerator(Config.CHARTS_DIR)
 
-@tool
-def analyze_pain_killer_vitamin(description: str) -> str:
-    """This tool returns the analysis of whether a product is a pain killer or a vitamin by taking the product idea as input."""
-    analysis = f"""
+
+@cache
+def get_chart_generator() -> ChartGenerator:
+    """Return the shared chart generator, created (with its output directory) on first use."""
+    return ChartGenerator(
+        Config.CHARTS_DIR, fmt=Config.CHART_FORMAT, dpi=Config.CHART_DPI, process_workers=Config.CHART_PROCESS_WORKERS,
+        max_cached=Config.CHART_CACHE_MAX_FILES,
+    )
+
+
+def _make_analysis_tool(name: str, description: str, build_prompt: Callable[[str], str]) -> StructuredTool:
+    """Build an LLM-backed analysis tool with native sync (``invoke``) and async (``ainvoke``) implementations.
+
+    The tool name doubles as its LLM cache scope.
+    """
+
+    @cache
+    def tool_llm():
+        return cached_llm(Config.get_chat_llm("analysis"), name)
+
+    def run(description: str) -> str:
+        try:
+            with limit("analysis", name):
+                response = tool_llm().invoke(build_prompt(description))
+            return get_text(response)
+        except Exception as e:
+            logger.exception("%s failed: %s", name, e)
+            return f"Error in {name}: {e}"
+
+    async def arun(description: str) -> str:
+        try:
+            async with alimit("analysis", name):
+                response = await tool_llm().ainvoke(build_prompt(description))
+            return get_text(response)
+        except Exception as e:
+            logger.exception("%s failed: %s", name, e)
+            return f"Error in {name}: {e}"
+
+    return StructuredTool.from_function(func=run, coroutine=arun, name=name, description=description)
+
+
+def _analyze_pain_killer_vitamin_prompt(description: str) -> str:
+    return f"""
     Analyze the product idea given in the description and return the analysis by checking the following indicators:
     ```
     Product idea:
@@ -40,17 +84,10 @@ def analyze_pain_killer_vitamin(description: str) -> str:
     - Vitamin: [Yes/No]
     ```
     """
-    try:
-        response = llm.invoke(analysis)
-        return get_text(response)
-    except Exception as e:
-        logger.exception("analyze_pain_killer_vitamin failed: %s", e)
-        return f"Error in analyze_pain_killer_vitamin: {e}"
 
-@tool
-def analyze_bootstrapping_feasibility(description: str) -> str:
-    """This tool returns the analysis of whether a product can be bootstrapped (built without external funding) by taking the product idea as input."""
-    analysis = f"""
+
+def _analyze_bootstrapping_feasibility_prompt(description: str) -> str:
+    return f"""
     Analyze the product idea given in the description and return the analysis by checking the following indicators:
     ```
     Product idea:
@@ -71,18 +108,10 @@ def analyze_bootstrapping_feasibility(description: str) -> str:
     - Bootstrapping Feasibility: [Yes/No]
     ```
     """
-    try:
-        response = llm.invoke(analysis)
-        return get_text(response)
-    except Exception as e:
-        logger.exception("analyze_bootstrapping_feasibility failed: %s", e)
-        return f"Error in analyze_bootstrapping_feasibility: {e}"
 
 
-@tool
-def analyze_payment_willingness(description: str) -> str:
-    """This tool returns the analysis of whether people will pay for a product by taking the product idea as input."""
-    analysis = f"""
+def _analyze_payment_willingness_prompt(description: str) -> str:
+    return f"""
         Payment Willingness Analysis for: {description}
         
         Factors Considered:
@@ -95,41 +124,188 @@ def analyze_payment_willingness(description: str) -> str:
         Assessment: [This would be filled by the agent using LLM reasoning]
     ```
     """
-    try:
-        response = llm.invoke(analysis)
-        return get_text(response)
-    except Exception as e:
-        logger.exception("analyze_payment_willingness failed: %s", e)
-        return f"Error in analyze_payment_willingness: {e}"
 
 
-@tool
-def generate_distribution_strategy(description: str) -> str:
-    """This tool generates a distribution strategy for a product by taking the product idea as input."""
-    analysis = f"""
+def _generate_distribution_strategy_prompt(description: str) -> str:
+    return f"""
     Generate a distribution strategy for the product idea given in the description.
     ```
     Product idea:
     {description}
     ```
     """
-    try:
-        response = llm.invoke(analysis)
-        return get_text(response)
-    except Exception as e:
-        logger.exception("generate_distribution_strategy failed: %s", e)
-        return f"Error in generate_distribution_strategy: {e}"
-    
 
 
-@tool
-def generate_chart(
+analyze_pain_killer_vitamin = _make_analysis_tool(
+    "analyze_pain_killer_vitamin",
+    "This tool returns the analysis of whether a product is a pain killer or a vitamin by taking the product idea as input.",
+    _analyze_pain_killer_vitamin_prompt,
+)
+
+analyze_bootstrapping_feasibility = _make_analysis_tool(
+    "analyze_bootstrapping_feasibility",
+    "This tool returns the analysis of whether a product can be bootstrapped (built without external funding) by taking the product idea as input.",
+    _analyze_bootstrapping_feasibility_prompt,
+)
+
+analyze_payment_willingness = _make_analysis_tool(
+    "analyze_payment_willingness",
+    "This tool returns the analysis of whether people will pay for a product by taking the product idea as input.",
+    _analyze_payment_willingness_prompt,
+)
+
+generate_distribution_strategy = _make_analysis_tool(
+    "generate_distribution_strategy",
+    "This tool generates a distribution strategy for a product by taking the product idea as input.",
+    _generate_distribution_strategy_prompt,
+)
+
+
+class IdeaEvaluation(TypedDict):
+    """Evaluation of one SaaS idea: pain killer or vitamin, bootstrapping feasibility and willingness to pay."""
+
+    pain_killer: bool
+    pain_killer_reasoning: str
+    bootstrappable: bool
+    bootstrapping_reasoning: str
+    willingness_to_pay: Literal["low", "medium", "high"]
+    payment_reasoning: str
+
+
+def _evaluate_idea_prompt(idea: str) -> str:
+    return f"""
+    Evaluate the product idea below on three dimensions and fill in every field of the result.
+    ```
+    Product idea:
+    {idea}
+    ```
+
+    1. Pain killer or vitamin. Pain killers solve urgent, critical problems that users actively seek solutions for and
+       replace expensive or time-consuming alternatives. Vitamins are nice-to-have enhancements with lower urgency.
+    2. Bootstrapping feasibility: development complexity and time, initial capital, time to first revenue,
+       team size and infrastructure costs. Could a small team build it without external funding?
+    3. Willingness to pay: problem severity, free alternatives, the target customer's budget, strength of the
+       value proposition and what the market pays for similar solutions. Be conservative.
+
+    Keep each reasoning field to two or three sentences.
+    """
+
+
+def _idea_key(idea: str) -> str:
+    return " ".join(idea.lower().split())
+
+
+@cache
+def _idea_evaluator():
+    # Repeat evaluations across calls are served by the LLM response cache (scope "evaluate_idea")
+    return cached_llm(Config.get_chat_llm("analysis"), "evaluate_idea").with_structured_output(IdeaEvaluation)
+
+
+def _evaluate_one(prompt: str) -> IdeaEvaluation:
+    with limit("analysis", "evaluate_idea"):
+        return _idea_evaluator().invoke(prompt)
+
+
+async def _aevaluate_one(prompt: str) -> IdeaEvaluation:
+    async with alimit("analysis", "evaluate_idea"):
+        return await _idea_evaluator().ainvoke(prompt)
+
+
+# Each evaluation holds an "analysis" slot, so a batch shares the family limit with the other analysis tools
+_EVALUATE = RunnableLambda(_evaluate_one, afunc=_aevaluate_one, name="evaluate_idea")
+
+
+def _distinct(ideas: List[str]) -> List[str]:
+    """Distinct ideas, first spelling wins, with whitespace normalized so equal ideas build equal prompts."""
+    distinct = {}
+    for idea in ideas:
+        distinct.setdefault(_idea_key(idea), " ".join(idea.split()))
+    return list(distinct.values())
+
+
+def _collect(ideas: List[str], distinct: List[str], results: list) -> List[IdeaEvaluation | None]:
+    evaluations = {}
+    for idea, result in zip(distinct, results):
+        if isinstance(result, dict):
+            evaluations[_idea_key(idea)] = result
+        else:
+            logger.warning("evaluate_idea failed for %r: %s", idea, result)
+    return [evaluations.get(_idea_key(idea)) for idea in ideas]
+
+
+def evaluate_ideas(ideas: List[str]) -> List[IdeaEvaluation | None]:
+    """Evaluate every idea with one structured call each, sent together as a single batch.
+
+    Duplicate ideas are evaluated once; None marks an idea whose evaluation failed.
+    """
+    distinct = _distinct(ideas)
+    results = _EVALUATE.batch(
+        [_evaluate_idea_prompt(idea) for idea in distinct], config={"max_concurrency": family_limit("analysis")}, return_exceptions=True,
+    )
+    return _collect(ideas, distinct, results)
+
+
+async def aevaluate_ideas(ideas: List[str]) -> List[IdeaEvaluation | None]:
+    """Async variant of :func:`evaluate_ideas`."""
+    distinct = _distinct(ideas)
+    results = await _EVALUATE.abatch(
+        [_evaluate_idea_prompt(idea) for idea in distinct], config={"max_concurrency": family_limit("analysis")}, return_exceptions=True,
+    )
+    return _collect(ideas, distinct, results)
+
+
+def format_evaluations(ideas: List[str], evaluations: List[IdeaEvaluation | None]) -> str:
+    """Render evaluations as one Markdown section per idea."""
+    sections = []
+    for i, (idea, result) in enumerate(zip(ideas, evaluations), 1):
+        if result is None:
+            sections.append(f"## Idea {i}: {idea}\nError in evaluate_idea: the evaluation failed; analyze this idea yourself.")
+            continue
+        sections.append(
+            f"## Idea {i}: {idea}\n"
+            f"- Pain killer: {'Yes' if result.get('pain_killer') else 'No (vitamin)'} - {result.get('pain_killer_reasoning', '')}\n"
+            f"- Bootstrapping feasibility: {'Yes' if result.get('bootstrappable') else 'No'} - {result.get('bootstrapping_reasoning', '')}\n"
+            f"- Willingness to pay: {result.get('willingness_to_pay', 'unknown')} - {result.get('payment_reasoning', '')}"
+        )
+    return "\n\n".join(sections)
+
+
+def _evaluate_idea(ideas: List[str]) -> str:
+    """Evaluate one or more SaaS ideas at once: for each, whether it is a pain killer or a vitamin, whether it can be bootstrapped, and how willing customers are to pay. Pass every candidate idea (a one-line description each) in a single call instead of calling the tool once per idea."""
+    ideas = [idea for idea in ideas if idea.strip()]
+    if not ideas:
+        return "Error in evaluate_idea: no idea given"
+    return format_evaluations(ideas, evaluate_ideas(ideas))
+
+
+async def _aevaluate_idea(ideas: List[str]) -> str:
+    ideas = [idea for idea in ideas if idea.strip()]
+    if not ideas:
+        return "Error in evaluate_idea: no idea given"
+    return format_evaluations(ideas, await aevaluate_ideas(ideas))
+
+
+evaluate_idea = StructuredTool.from_function(
+    func=_evaluate_idea,
+    coroutine=_aevaluate_idea,
+    name="evaluate_idea",
+    description=_evaluate_idea.__doc__,
+)
+
+
+def _generate_chart(
     chart_type: str,
     data: str,
     title: str,
     filename: str
 ) -> str:
-    """Generate a chart from data by taking the chart type, data, title, and filename as input."""
+    """Generate a chart from data by taking the chart type, data, title, and filename as input.
+
+    Chart types and the JSON ``data`` they expect:
+    - bar, pie: {"label": value, ...}
+    - line: {"series name": [value, ...], ...}
+    - comparison: {"categories": ["A", "B"], "series": {"series name": [value per category], ...}}
+    """
     try:
         # Parse data (expecting JSON-like string or dict)
         import json
@@ -137,18 +313,47 @@ def generate_chart(
             data_dict = json.loads(data)
         else:
             data_dict = data
-        
-        if chart_type.lower() == "bar":
+
+        chart_generator = get_chart_generator()
+        kind = chart_type.lower()
+        if kind == "bar":
             filepath = chart_generator.create_bar_chart(
                 data_dict, title, "Category", "Value", filename
             )
-        elif chart_type.lower() == "pie":
+        elif kind == "pie":
             filepath = chart_generator.create_pie_chart(
                 data_dict, title, filename
             )
+        elif kind == "line":
+            filepath = chart_generator.create_line_chart(
+                data_dict, title, "Period", "Value", filename
+            )
+        elif kind == "comparison":
+            filepath = chart_generator.create_comparison_chart(
+                data_dict["categories"], data_dict["series"], title, "Category", "Value", filename
+            )
         else:
             return f"Unsupported chart type: {chart_type}"
-        
+
         return f"Chart generated successfully at: {filepath}"
     except Exception as e:
         return f"Error generating chart: {str(e)}"
+
+
+def _run_chart(chart_type: str, data: str, title: str, filename: str) -> str:
+    with limit("chart", "generate_chart"):
+        return _generate_chart(chart_type, data, title, filename)
+
+
+async def _arun_chart(chart_type: str, data: str, title: str, filename: str) -> str:
+    # Rendering is CPU-bound and blocking, so keep it off the event loop
+    async with alimit("chart", "generate_chart"):
+        return await asyncio.to_thread(_generate_chart, chart_type, data, title, filename)
+
+
+generate_chart = StructuredTool.from_function(
+    func=_run_chart,
+    coroutine=_arun_chart,
+    name="generate_chart",
+    description=_generate_chart.__doc__,
+)
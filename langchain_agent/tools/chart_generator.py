@@ -1,20 +1,194 @@
-"""Chart generation utilities for agents."""
+"""Chart generation utilities for agents.
 
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
-import matplotlib.pyplot as plt
-from typing import Dict, List
+Charts are drawn on explicit ``matplotlib.figure.Figure`` objects rather than
+through ``pyplot``, so there is no shared global figure state and concurrent
+tool calls can render safely from threads. Rendering can also be offloaded to a
+process pool. Each chart is rendered once per content hash (chart type, data,
+labels, format and DPI) into ``<output_dir>/.cache``; later requests for the
+same chart only copy the cached file to the requested name. The cache keeps the
+``max_cached`` most recently used charts.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Dict, List, Optional
+
+SUPPORTED_FORMATS = ("png", "svg", "pdf", "jpg")
+# Renders of the same chart serialize on one of these locks, picked by content hash
+_LOCK_STRIPES = 64
+
+
+def _draw_bar(fig, spec: dict) -> None:
+    ax = fig.subplots()
+    keys = list(spec["data"].keys())
+    values = list(spec["data"].values())
+
+    bars = ax.bar(keys, values, color='steelblue', alpha=0.7)
+    ax.set_title(spec["title"], fontsize=14, fontweight='bold')
+    ax.set_xlabel(spec["xlabel"], fontsize=12)
+    ax.set_ylabel(spec["ylabel"], fontsize=12)
+    ax.grid(axis='y', alpha=0.3)
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+
+    # Add value labels on bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2., height, f'{height:.1f}', ha='center', va='bottom')
+
+
+def _draw_pie(fig, spec: dict) -> None:
+    ax = fig.subplots()
+    ax.pie(list(spec["data"].values()), labels=list(spec["data"].keys()), autopct='%1.1f%%', startangle=90)
+    ax.set_title(spec["title"], fontsize=14, fontweight='bold')
+
+
+def _draw_line(fig, spec: dict) -> None:
+    ax = fig.subplots()
+    for label, values in spec["data"].items():
+        ax.plot(range(len(values)), values, marker='o', label=label, linewidth=2)
+
+    ax.set_title(spec["title"], fontsize=14, fontweight='bold')
+    ax.set_xlabel(spec["xlabel"], fontsize=12)
+    ax.set_ylabel(spec["ylabel"], fontsize=12)
+    ax.grid(alpha=0.3)
+    ax.legend()
+
+
+def _draw_comparison(fig, spec: dict) -> None:
+    ax = fig.subplots()
+    categories = spec["categories"]
+    data_series = spec["data"]
+    x = range(len(categories))
+    width = 0.8 / max(len(data_series), 1)
+
+    for i, (label, values) in enumerate(data_series.items()):
+        offset = (i - len(data_series) / 2) * width + width / 2
+        ax.bar([xi + offset for xi in x], values, width, label=label, alpha=0.7)
+
+    ax.set_title(spec["title"], fontsize=14, fontweight='bold')
+    ax.set_xlabel(spec["xlabel"], fontsize=12)
+    ax.set_ylabel(spec["ylabel"], fontsize=12)
+    ax.set_xticks(list(x))
+    ax.set_xticklabels(categories, rotation=45, ha='right')
+    ax.legend()
+    ax.grid(axis='y', alpha=0.3)
+
+
+_DRAWERS = {"bar": _draw_bar, "pie": _draw_pie, "line": _draw_line, "comparison": _draw_comparison}
+_FIGSIZES = {"bar": (10, 6), "pie": (10, 8), "line": (10, 6), "comparison": (12, 6)}
+
+
+def render_chart(kind: str, spec: dict, path: str, fmt: str, dpi: int) -> str:
+    """Render one chart to ``path``; a module-level function so process pool workers can run it."""
+    # matplotlib is slow to import and only needed when a chart is actually drawn
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=_FIGSIZES[kind], layout="tight")
+    _DRAWERS[kind](fig, spec)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fig.savefig(tmp_path, format=fmt, dpi=dpi, bbox_inches='tight')
+    os.replace(tmp_path, path)
+    return path
+
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ProcessPoolExecutor(max_workers=workers)
+        return _POOL
 
 
 class ChartGenerator:
     """Generate charts and save them as images."""
-    
-    def __init__(self, output_dir: str = "output/charts"):
-        """Initialize chart generator with output directory."""
+
+    def __init__(self, output_dir: str = "output/charts", fmt: str = "png", dpi: int = 100, process_workers: int = 0, max_cached: int = 256):
+        """Initialize chart generator with output directory, image format and DPI.
+
+        With ``process_workers > 0`` rendering runs in a shared process pool of that size.
+        ``max_cached <= 0`` leaves the render cache unbounded.
+        """
+        if fmt not in SUPPORTED_FORMATS:
+            raise ValueError(f"Unsupported chart format: {fmt} (expected one of {', '.join(SUPPORTED_FORMATS)})")
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
-    
+        self.cache_dir = self.output_dir / ".cache"
+        self.cache_dir.mkdir(exist_ok=True)
+        self.fmt = fmt
+        self.dpi = dpi
+        self.process_workers = process_workers
+        self.max_cached = max_cached
+        self.renders = 0
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+        self._prune_lock = threading.Lock()
+        self._key_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def _target(self, filename: str) -> Path:
+        # Agents name files freely; keep the stem and use the configured format's extension
+        return self.output_dir / f"{Path(filename).stem or 'chart'}.{self.fmt}"
+
+    def _render(self, kind: str, spec: dict, filename: str) -> str:
+        payload = json.dumps({"kind": kind, "spec": spec, "fmt": self.fmt, "dpi": self.dpi}, sort_keys=True, default=str)
+        key = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:20]
+        cached = self.cache_dir / f"{key}.{self.fmt}"
+
+        target = self._target(filename)
+        tmp_target = f"{target}.{threading.get_ident()}.tmp"
+        # Concurrent requests for the same chart wait for one render instead of duplicating it
+        with self._key_locks[int(key, 16) % _LOCK_STRIPES]:
+            try:
+                # Refresh the mtime: the cache evicts least recently used files first
+                os.utime(cached)
+                rendered = False
+            except FileNotFoundError:
+                if self.process_workers > 0:
+                    _get_pool(self.process_workers).submit(render_chart, kind, spec, str(cached), self.fmt, self.dpi).result()
+                else:
+                    render_chart(kind, spec, str(cached), self.fmt, self.dpi)
+                rendered = True
+            shutil.copyfile(cached, tmp_target)
+        with self._lock:
+            if rendered:
+                self.renders += 1
+            else:
+                self.cache_hits += 1
+        os.replace(tmp_target, target)
+        if rendered:
+            self._prune()
+        return str(target)
+
+    def _prune(self) -> None:
+        """Delete the least recently used cached charts beyond ``max_cached``."""
+        if self.max_cached <= 0:
+            return
+        with self._prune_lock:
+            entries = []
+            for path in self.cache_dir.iterdir():
+                if path.suffix == ".tmp":
+                    continue
+                try:
+                    entries.append((path.stat().st_mtime, path))
+                except FileNotFoundError:
+                    pass
+            entries.sort()
+            for _, path in entries[:max(0, len(entries) - self.max_cached)]:
+                try:
+                    path.unlink()
+                except FileNotFoundError:
+                    pass
+
     def create_bar_chart(
         self,
         data: Dict[str, float],
@@ -24,35 +198,8 @@ class ChartGenerator:
         filename: str
     ) -> str:
         """Create a bar chart from dictionary data."""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        keys = list(data.keys())
-        values = list(data.values())
-        
-        bars = ax.bar(keys, values, color='steelblue', alpha=0.7)
-        ax.set_title(title, fontsize=14, fontweight='bold')
-        ax.set_xlabel(xlabel, fontsize=12)
-        ax.set_ylabel(ylabel, fontsize=12)
-        ax.grid(axis='y', alpha=0.3)
-        
-        # Rotate x-axis labels if needed
-        plt.xticks(rotation=45, ha='right')
-        
-        # Add value labels on bars
-        for bar in bars:
-            height = bar.get_height()
-            ax.text(bar.get_x() + bar.get_width()/2., height,
-                   f'{height:.1f}',
-                   ha='center', va='bottom')
-        
-        plt.tight_layout()
-        
-        filepath = self.output_dir / filename
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return str(filepath)
-    
+        return self._render("bar", {"data": data, "title": title, "xlabel": xlabel, "ylabel": ylabel}, filename)
+
     def create_pie_chart(
         self,
         data: Dict[str, float],
@@ -60,22 +207,8 @@ class ChartGenerator:
         filename: str
     ) -> str:
         """Create a pie chart from dictionary data."""
-        fig, ax = plt.subplots(figsize=(10, 8))
-        
-        keys = list(data.keys())
-        values = list(data.values())
-        
-        ax.pie(values, labels=keys, autopct='%1.1f%%', startangle=90)
-        ax.set_title(title, fontsize=14, fontweight='bold')
-        
-        plt.tight_layout()
-        
-        filepath = self.output_dir / filename
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return str(filepath)
-    
+        return self._render("pie", {"data": data, "title": title}, filename)
+
     def create_line_chart(
         self,
         data: Dict[str, List[float]],
@@ -85,25 +218,8 @@ class ChartGenerator:
         filename: str
     ) -> str:
         """Create a line chart from dictionary data."""
-        fig, ax = plt.subplots(figsize=(10, 6))
-        
-        for label, values in data.items():
-            ax.plot(range(len(values)), values, marker='o', label=label, linewidth=2)
-        
-        ax.set_title(title, fontsize=14, fontweight='bold')
-        ax.set_xlabel(xlabel, fontsize=12)
-        ax.set_ylabel(ylabel, fontsize=12)
-        ax.grid(alpha=0.3)
-        ax.legend()
-        
-        plt.tight_layout()
-        
-        filepath = self.output_dir / filename
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return str(filepath)
-    
+        return self._render("line", {"data": data, "title": title, "xlabel": xlabel, "ylabel": ylabel}, filename)
+
     def create_comparison_chart(
         self,
         categories: List[str],
@@ -114,28 +230,5 @@ class ChartGenerator:
         filename: str
     ) -> str:
         """Create a grouped bar chart for comparison."""
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        x = range(len(categories))
-        width = 0.8 / len(data_series)
-        
-        for i, (label, values) in enumerate(data_series.items()):
-            offset = (i - len(data_series) / 2) * width + width / 2
-            ax.bar([xi + offset for xi in x], values, width, label=label, alpha=0.7)
-        
-        ax.set_title(title, fontsize=14, fontweight='bold')
-        ax.set_xlabel(xlabel, fontsize=12)
-        ax.set_ylabel(ylabel, fontsize=12)
-        ax.set_xticks(x)
-        ax.set_xticklabels(categories, rotation=45, ha='right')
-        ax.legend()
-        ax.grid(axis='y', alpha=0.3)
-        
-        plt.tight_layout()
-        
-        filepath = self.output_dir / filename
-        plt.savefig(filepath, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return str(filepath)
-
+        spec = {"categories": categories, "data": data_series, "title": title, "xlabel": xlabel, "ylabel": ylabel}
+        return self._render("comparison", spec, filename)
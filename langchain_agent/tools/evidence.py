@@ -0,0 +1,41 @@
+"""Evidence retrieval tool for agents."""
+
+import asyncio
+
+from langchain_core.tools import StructuredTool
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.evidence import current_namespace, get_evidence_ingestor
+
+# Longest wait for this run's pending tool outputs to be embedded before searching
+_FLUSH_TIMEOUT_SECONDS = 30.0
+
+
+def _retrieve_evidence(query: str, k: int = 0) -> str:
+    """Search the evidence gathered so far in this research run (search results, fetched pages and analyses from every worker) and return the passages most relevant to the query. Use a specific question, for example "competitor pricing for dental scheduling tools", before searching the web again."""
+    ingestor = get_evidence_ingestor()
+    if ingestor is None:
+        return "Evidence retrieval is disabled."
+    # On timeout, search what is stored so far rather than stall the agent
+    ingestor.flush(_FLUSH_TIMEOUT_SECONDS)
+    try:
+        hits = ingestor.search(query, k=k or Config.EVIDENCE_TOP_K, namespace=current_namespace())
+    except Exception as e:
+        return f"Error retrieving evidence: {e}"
+    if not hits:
+        return "No stored evidence matches this query yet."
+    return "\n\n".join(
+        f"[{i}] (score {hit.score:.2f}, from {hit.metadata.get('source', '?')}: {hit.metadata.get('ref', '')})\n{hit.text}"
+        for i, hit in enumerate(hits, 1)
+    )
+
+
+async def _aretrieve_evidence(query: str, k: int = 0) -> str:
+    return await asyncio.to_thread(_retrieve_evidence, query, k)
+
+
+retrieve_evidence = StructuredTool.from_function(
+    func=_retrieve_evidence,
+    coroutine=_aretrieve_evidence,
+    name="retrieve_evidence",
+    description=_retrieve_evidence.__doc__,
+)
@@ -0,0 +1,51 @@
+"""Page fetching tool for agents."""
+
+import asyncio
+import re
+from typing import List
+
+from langchain_core.tools import StructuredTool
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.instrumentation import record_cache_hit
+from langchain_agent.utils.page_fetcher import FetchedPage, get_page_fetcher
+
+
+def parse_urls(urls: str) -> List[str]:
+    """Split a string of URLs separated by whitespace or commas, dropping duplicates."""
+    seen: List[str] = []
+    for url in re.split(r"[\s,]+", urls or ""):
+        url = url.strip().strip("<>\"'")
+        if url and url not in seen:
+            seen.append(url)
+    return seen
+
+
+def _format_page(page: FetchedPage, max_chars: int) -> str:
+    if page.status == "error":
+        return f"## {page.url}\nError fetching page: {page.error}"
+    text = page.text if len(page.text) <= max_chars else page.text[:max_chars] + "\n...[truncated]"
+    return f"## {page.title or page.url}\nURL: {page.url}\n\n{text}"
+
+
+def _fetch_page(urls: str) -> str:
+    """Download one or more web pages and return their main text. Pass one URL, or several separated by spaces or newlines (for example links returned by find_pages), to read full articles, pricing pages or reviews instead of search snippets."""
+    targets = parse_urls(urls)
+    if not targets:
+        return "Error fetching page: no URL given"
+    pages = get_page_fetcher().fetch_many(targets)
+    for page in pages:
+        if page.status in ("cached", "revalidated"):
+            record_cache_hit("fetch_page")
+    return "\n\n".join(_format_page(page, Config.FETCH_MAX_CHARS) for page in pages)
+
+
+async def _afetch_page(urls: str) -> str:
+    return await asyncio.to_thread(_fetch_page, urls)
+
+
+fetch_page = StructuredTool.from_function(
+    func=_fetch_page,
+    coroutine=_afetch_page,
+    name="fetch_page",
+    description=_fetch_page.__doc__,
+)
@@ -1,50 +1,244 @@
 """Web search tools for agents."""
 
-from langchain_core.tools import tool
-from langchain_community.tools import DuckDuckGoSearchRun
-
-search = DuckDuckGoSearchRun()
-
-
-@tool
-def web_search(query: str) -> str:
-    """Search the web for current information about companies, products, markets, or any topic. Use this to find up-to-date information."""
-    try:
-        results = search.run(query)
-        return results
-    except Exception as e:
-        return f"Error performing search: {str(e)}"
-
-
-@tool
-def competitor_analysis(query: str) -> str:
-    """Analyze competitors in a specific market or niche. Provides information about competitor products, pricing, and positioning."""
-    search_query = f"competitors in {query} market SaaS products"
-    try:
-        results = search.run(search_query)
-        return results
-    except Exception as e:
-        return f"Error analyzing competitors: {str(e)}"
-
-
-@tool
-def review_analysis(query: str) -> str:
-    """Find and analyze reviews for products or services in a specific market. Helps understand user pain points and satisfaction."""
-    search_query = f"{query} reviews user feedback complaints"
-    try:
-        results = search.run(search_query)
-        return results
-    except Exception as e:
-        return f"Error analyzing reviews: {str(e)}"
-
-
-@tool
-def market_size_research(query: str) -> str:
-    """Research market size, TAM (Total Addressable Market), SAM (Serviceable Addressable Market), and growth trends for a specific industry or niche."""
-    search_query = f"{query} market size TAM SAM growth statistics 2024"
-    try:
-        results = search.run(search_query)
-        return results
-    except Exception as e:
-        return f"Error researching market size: {str(e)}"
+import asyncio
+import time
+from functools import cache
+from typing import Callable, Optional
 
+from langchain_core.tools import StructuredTool, ToolException
+from langchain_agent.utils.cassette import get_cassette
+from langchain_agent.utils.concurrency import alimit, limit
+from langchain_agent.utils.config import Config, load_factory
+from langchain_agent.utils.instrumentation import record_cache_hit, record_coalesced, record_rate_limit_wait, record_retry
+from langchain_agent.utils.knowledge_base import get_knowledge_base
+from langchain_agent.utils.logger import setup_logger
+from langchain_agent.utils.rate_limit import SingleFlight, TokenBucket, backoff_delay, is_throttle_error
+from langchain_agent.utils.search_cache import get_search_cache, normalize_query
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+# Identical searches in flight at the same time (e.g. from parallel agents) share one upstream request
+_FLIGHTS = SingleFlight()
+
+
+class SearchThrottled(RuntimeError):
+    """The search provider kept rate-limiting a query after every retry."""
+
+    def __init__(self, tool_name: str, attempts: int):
+        super().__init__(f"{tool_name} was rate-limited on all {attempts} attempts")
+        self.attempts = attempts
+
+
+@cache
+def get_search():
+    """Return the shared search runner, created on first use.
+
+    ``Config.SEARCH_BACKEND`` may name a factory (``package.module:factory``) for
+    an object with the same ``run(query)`` and ``api_wrapper.results(query, max_results)``
+    interface, e.g. an offline fake for benchmarks.
+    """
+    if Config.SEARCH_BACKEND.lower() != "duckduckgo":
+        return load_factory(Config.SEARCH_BACKEND)()
+    from langchain_community.tools import DuckDuckGoSearchRun
+
+    return DuckDuckGoSearchRun()
+
+
+@cache
+def get_search_limiter() -> TokenBucket:
+    """Return the token bucket shared by every search tool (``Config.SEARCH_RATE_PER_SECOND``/``SEARCH_BURST``)."""
+    return TokenBucket(Config.SEARCH_RATE_PER_SECOND, Config.SEARCH_BURST)
+
+
+def search_links(query: str, max_results: int = 5) -> str:
+    """Run ``query`` and list each result's title, URL and snippet."""
+    results = get_search().api_wrapper.results(query, max_results=max_results)
+    return "\n\n".join(f"{r.get('title', '')}\n{r.get('link', '')}\n{r.get('snippet', '')}" for r in results) or "No results found."
+
+
+def cached_search(tool_name: str, query: str, run: Optional[Callable[[str], str]] = None) -> str:
+    """Run ``query`` through the shared search instance (or ``run``), consulting the search cache first.
+
+    With the knowledge base enabled, every result is stored there with its fetch
+    time, and unless ``Config.KNOWLEDGE_SEED`` is off (``--refresh``) results
+    stored by earlier runs are reused while younger than
+    ``Config.KNOWLEDGE_FRESHNESS_SECONDS``.
+
+    Upstream calls share a process-wide rate limiter, are retried with jittered
+    exponential backoff when throttled, and identical concurrent queries are
+    coalesced into one request. With a record/replay cassette active the call
+    is recorded to, or answered from, the cassette. Failed searches raise
+    (:class:`SearchThrottled` once retries are exhausted) and are never cached.
+    """
+    cassette = get_cassette()
+    if cassette is not None:
+        return cassette.search(tool_name, query, lambda: _search(tool_name, query, run))
+    return _search(tool_name, query, run)
+
+
+def _upstream(tool_name: str, query: str, run: Optional[Callable[[str], str]]) -> str:
+    """Call the search backend under the shared rate limiter, retrying throttled calls with backoff."""
+    attempts = Config.SEARCH_MAX_RETRIES + 1
+    for attempt in range(attempts):
+        waited = get_search_limiter().acquire()
+        if waited:
+            record_rate_limit_wait(tool_name, waited)
+        try:
+            with limit("search", tool_name):
+                return (run or get_search().run)(query)
+        except Exception as e:
+            if not is_throttle_error(e):
+                raise
+            if attempt + 1 >= attempts:
+                raise SearchThrottled(tool_name, attempts) from e
+            delay = backoff_delay(attempt, Config.SEARCH_BACKOFF_BASE_SECONDS, Config.SEARCH_BACKOFF_MAX_SECONDS)
+            logger.warning("%s throttled (%s); retrying in %.1fs", tool_name, e, delay)
+            record_retry(tool_name, delay, e)
+            time.sleep(delay)
+
+
+def _search(tool_name: str, query: str, run: Optional[Callable[[str], str]]) -> str:
+    knowledge = get_knowledge_base()
+    if knowledge is not None and Config.KNOWLEDGE_SEED:
+        stored = knowledge.fresh_source(tool_name, query)
+        if stored is not None:
+            record_cache_hit(tool_name)
+            return stored
+    cache = get_search_cache()
+    if cache is not None:
+        cached = cache.get(tool_name, query)
+        if cached is not None:
+            record_cache_hit(tool_name)
+            if knowledge is not None:
+                knowledge.record_source(tool_name, query, cached)
+            return cached
+    results, shared = _FLIGHTS.do((tool_name, normalize_query(query)), lambda: _upstream(tool_name, query, run))
+    if shared:
+        record_coalesced(tool_name)
+    elif cache is not None:
+        cache.set(tool_name, query, results)
+    if knowledge is not None:
+        knowledge.record_source(tool_name, query, results)
+    return results
+
+
+async def acached_search(tool_name: str, query: str, run: Optional[Callable[[str], str]] = None) -> str:
+    """Async variant of :func:`cached_search`; the blocking DuckDuckGo call runs in a worker thread."""
+    cassette = get_cassette()
+    if cassette is not None:
+        return await cassette.asearch(tool_name, query, lambda: _asearch(tool_name, query, run))
+    return await _asearch(tool_name, query, run)
+
+
+async def _aupstream(tool_name: str, query: str, run: Optional[Callable[[str], str]]) -> str:
+    attempts = Config.SEARCH_MAX_RETRIES + 1
+    for attempt in range(attempts):
+        waited = await get_search_limiter().aacquire()
+        if waited:
+            record_rate_limit_wait(tool_name, waited)
+        try:
+            async with alimit("search", tool_name):
+                return await asyncio.to_thread(run or get_search().run, query)
+        except Exception as e:
+            if not is_throttle_error(e):
+                raise
+            if attempt + 1 >= attempts:
+                raise SearchThrottled(tool_name, attempts) from e
+            delay = backoff_delay(attempt, Config.SEARCH_BACKOFF_BASE_SECONDS, Config.SEARCH_BACKOFF_MAX_SECONDS)
+            logger.warning("%s throttled (%s); retrying in %.1fs", tool_name, e, delay)
+            record_retry(tool_name, delay, e)
+            await asyncio.sleep(delay)
+
+
+async def _asearch(tool_name: str, query: str, run: Optional[Callable[[str], str]]) -> str:
+    # The knowledge base and the search cache are SQLite: their reads and writes run in worker threads, off the event loop
+    knowledge = get_knowledge_base()
+    if knowledge is not None and Config.KNOWLEDGE_SEED:
+        stored = await asyncio.to_thread(knowledge.fresh_source, tool_name, query)
+        if stored is not None:
+            record_cache_hit(tool_name)
+            return stored
+    cache = get_search_cache()
+    if cache is not None:
+        cached = await asyncio.to_thread(cache.get, tool_name, query)
+        if cached is not None:
+            record_cache_hit(tool_name)
+            if knowledge is not None:
+                await asyncio.to_thread(knowledge.record_source, tool_name, query, cached)
+            return cached
+    results, shared = await _FLIGHTS.ado((tool_name, normalize_query(query)), lambda: _aupstream(tool_name, query, run))
+    if shared:
+        record_coalesced(tool_name)
+    elif cache is not None:
+        await asyncio.to_thread(cache.set, tool_name, query, results)
+    if knowledge is not None:
+        await asyncio.to_thread(knowledge.record_source, tool_name, query, results)
+    return results
+
+
+def search_error_message(tool_name: str, error: Exception) -> str:
+    """Explain a failed search to the agent in a way that discourages blind retries."""
+    if isinstance(error, SearchThrottled):
+        return (
+            f"{tool_name} is unavailable: the search provider is rate-limiting requests "
+            f"(gave up after {error.attempts} attempts with backoff). Do not retry this search now; "
+            "continue with the information you already have or use a different tool."
+        )
+    return (
+        f"{tool_name} failed: {error}. Retrying the same query is unlikely to help; "
+        "rephrase it or continue with the information you already have."
+    )
+
+
+def _make_search_tool(name: str, description: str, query_template: str, search_fn: Optional[Callable[[str], str]] = None) -> StructuredTool:
+    """Build a search tool with native sync and async implementations.
+
+    Failures come back to the agent as an error tool message (``status="error"``)
+    explaining whether retrying makes sense, rather than as search results.
+    """
+
+    def run(query: str) -> str:
+        try:
+            return cached_search(name, query_template.format(query=query), search_fn)
+        except Exception as e:
+            raise ToolException(search_error_message(name, e)) from e
+
+    async def arun(query: str) -> str:
+        try:
+            return await acached_search(name, query_template.format(query=query), search_fn)
+        except Exception as e:
+            raise ToolException(search_error_message(name, e)) from e
+
+    return StructuredTool.from_function(func=run, coroutine=arun, name=name, description=description, handle_tool_error=True)
+
+
+web_search = _make_search_tool(
+    "web_search",
+    "Search the web for current information about companies, products, markets, or any topic. Use this to find up-to-date information.",
+    "{query}",
+)
+
+competitor_analysis = _make_search_tool(
+    "competitor_analysis",
+    "Analyze competitors in a specific market or niche. Provides information about competitor products, pricing, and positioning.",
+    "competitors in {query} market SaaS products",
+)
+
+review_analysis = _make_search_tool(
+    "review_analysis",
+    "Find and analyze reviews for products or services in a specific market. Helps understand user pain points and satisfaction.",
+    "{query} reviews user feedback complaints",
+)
+
+market_size_research = _make_search_tool(
+    "market_size_research",
+    "Research market size, TAM (Total Addressable Market), SAM (Serviceable Addressable Market), and growth trends for a specific industry or niche.",
+    "{query} market size TAM SAM growth statistics 2024",
+)
+
+find_pages = _make_search_tool(
+    "find_pages",
+    "Search the web and return the title, URL and snippet of the top results. Use this to find pages worth reading in full with fetch_page.",
+    "{query}",
+    search_fn=search_links,
+)
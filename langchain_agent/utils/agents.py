@@ -1,24 +1,232 @@
-from typing import Literal, TypedDict, Any
+from typing import Annotated, Callable, Literal, Optional, TypedDict, Any, Union
+import operator
+import asyncio
 
 from langgraph.graph import MessagesState, END
-from langgraph.types import Command
+from langgraph.types import Command, Send
 from langchain_core.messages import HumanMessage
 from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.runnables import Runnable, RunnableLambda
 
-from langchain_agent.lib.prompts.supervisor import SYSTEM_PROMPT, SYNTHESIS_PROMPT
+from langchain_agent.lib.prompts.supervisor import SYSTEM_PROMPT, SYNTHESIS_PROMPT, PLANNER_PROMPT
 from langchain_agent.utils.logger import setup_logger
 from langchain_agent.utils.config import Config
+from langchain_agent.utils.response_utils import get_text, parse_trailing_json
+from langchain_agent.utils.llm_cache import cached_llm
+from langchain_agent.utils.llm_pool import hedged_llm
+from langchain_agent.utils.compaction import acompact_messages, compact_messages
+from langchain_agent.utils.evidence import current_namespace, get_evidence_ingestor
+from langchain_agent.utils.knowledge_base import remember_run
+from langchain_agent.utils.report_sections import REPORT_SECTIONS, asection_messages, merge_sections, section_messages
 from langchain_core.exceptions import OutputParserException
 import json
 import re
 
-logger = setup_logger(__name__)
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+
+def merge_counts(left: dict, right: dict) -> dict:
+    """Reducer that sums per-key counters."""
+    merged = dict(left or {})
+    for key, value in (right or {}).items():
+        merged[key] = merged.get(key, 0) + value
+    return merged
 
 
 class State(MessagesState):
     next: str
+    # Coverage tracker: every worker the supervisor has routed to, in order
+    visited: Annotated[list[str], operator.add]
+    # Number of routing decisions taken so far (bounded by Config.MAX_STEPS)
+    steps: int
+    # Per-run routing counters: {"fast_path": n, "llm_calls": m}
+    router_stats: Annotated[dict, merge_counts]
+
+
+def _latest_worker_output(state: State, members: list[str]) -> Optional[HumanMessage]:
+    for message in reversed(state.get("messages", [])):
+        if getattr(message, "name", None) in members:
+            return message
+    return None
+
+
+def _is_loop(visited: list[str], candidate: str) -> bool:
+    """A worker that ran in either of the last two hops, or was already revisited once, is looping."""
+    return candidate in visited[-2:] or visited.count(candidate) >= 2
+
+
+def _repeated_output(state: State, members: list[str]) -> bool:
+    """True when the latest worker output is identical to that worker's previous output."""
+    latest = _latest_worker_output(state, members)
+    if latest is None:
+        return False
+    same_worker = [m for m in state.get("messages", []) if getattr(m, "name", None) == latest.name]
+    return len(same_worker) >= 2 and get_text(same_worker[-2]).strip() == get_text(latest).strip()
+
+
+def fast_route(state: State, members: list[str], max_steps: Optional[int] = None) -> tuple[Optional[str], str]:
+    """Make the mechanical routing decisions without a model call.
+
+    Returns ``(goto, reason)``; ``goto`` is None when the choice is genuinely
+    ambiguous and the LLM router should decide.
+    """
+    max_steps = Config.MAX_STEPS if max_steps is None else max_steps
+    visited = state.get("visited") or []
+    if state.get("steps", 0) >= max_steps:
+        return "FINISH", f"step budget of {max_steps} reached"
+    for member in members:
+        if member not in visited:
+            return member, "not visited yet"
+    if _repeated_output(state, members):
+        return "FINISH", "no new information"
+
+    latest = _latest_worker_output(state, members)
+    suggestion = parse_trailing_json(get_text(latest)) if latest is not None else None
+    suggested = suggestion.get("next") if isinstance(suggestion, dict) else None
+    if suggested == "FINISH":
+        return "FINISH", f"{latest.name} suggested FINISH and every worker has run"
+    if suggested in members and not _is_loop(visited, suggested):
+        return suggested, f"{latest.name} suggested {suggested}"
+    return None, "ambiguous"
+
+
+def guard_route(state: State, goto: str) -> str:
+    """Veto an LLM routing decision that would run the same worker three times in a row."""
+    visited = state.get("visited") or []
+    if goto != "FINISH" and visited[-2:] == [goto, goto]:
+        logger.info("Router chose %s a third time in a row; finishing instead", goto)
+        return "FINISH"
+    return goto
+
+
+def make_worker_node(name: str, agent: Union[Runnable, Callable[[], Runnable]], system_prompt: str, goto: str = "supervisor") -> RunnableLambda:
+    """Wrap a specialist agent as a graph node that reports back to ``goto`` when done.
+
+    The node runs the agent with ``invoke`` under a sync graph run and with
+    ``ainvoke`` under ``ainvoke``/``astream``, so tool calls from one model turn
+    execute concurrently. ``agent`` may be a zero-argument factory, in which case
+    the agent is only created when the node first runs.
+    """
+
+    def _agent() -> Runnable:
+        return agent if isinstance(agent, Runnable) else agent()
+
+    def _with_system(state: State, view: list) -> dict:
+        # Ensure the agent receives its system prompt and context (prevent missing role instructions)
+        state_with_system = state.copy()
+        state_with_system["messages"] = [{"role": "system", "content": system_prompt}] + view
+        return state_with_system
+
+    def _report(result: Any) -> Command:
+        logger.debug("%s agent returned %d messages; report: %s", name, len(result["messages"]), result["messages"][-1].content)
+        messages = [HumanMessage(content=result["messages"][-1].content, name=name)]
+        ingestor = get_evidence_ingestor()
+        if ingestor is not None:
+            # Other workers see only a digest of this report; keep the full text retrievable
+            ingestor.ingest(str(get_text(messages[0])), source=name, ref="report", namespace=current_namespace())
+        # We want our workers to ALWAYS "report back" when done
+        return Command(update={"messages": messages}, goto=goto)
+
+    def _failed(e: Exception) -> Command:
+        logger.exception("Error running %s agent: %s", name, e)
+        return Command(update={"messages": [HumanMessage(content=f"{name} failed: {e}", name=name)]}, goto=goto)
+
+    def worker_node(state: State) -> Command:
+        logger.info("%s node invoked", name)
+        try:
+            return _report(_agent().invoke(_with_system(state, compact_messages(state.get("messages", []), name))))
+        except Exception as e:
+            return _failed(e)
+
+    async def aworker_node(state: State) -> Command:
+        logger.info("%s node invoked (async)", name)
+        try:
+            return _report(await _agent().ainvoke(_with_system(state, await acompact_messages(state.get("messages", []), name))))
+        except Exception as e:
+            return _failed(e)
+
+    return RunnableLambda(worker_node, afunc=aworker_node, name=f"{name}_node")
+
+
+# Marks the synthesis model call so streaming consumers can tell report tokens from routing/tool chatter
+SYNTHESIS_RUN_CONFIG = {"run_name": "final_report", "tags": ["final_report"]}
+
+
+def _synthesis_messages(view: list) -> list:
+    return [
+        {"role": "system", "content": SYNTHESIS_PROMPT},
+    ] + view
+
+
+# Tags the per-section calls of parallel synthesis; their tokens are drafts, not the report
+SECTION_TAG = "report_section"
+
+
+def _section_configs() -> list:
+    return [
+        {"run_name": f"{SECTION_TAG}:{section.key}", "tags": [SECTION_TAG], "max_concurrency": Config.SYNTHESIS_CONCURRENCY}
+        for section in REPORT_SECTIONS
+    ]
+
+
+def _merge_drafts(messages: list, results: list) -> str:
+    errors = [r for r in results if isinstance(r, Exception)]
+    if len(errors) == len(results):
+        raise errors[0]
+    drafts = []
+    for section, result in zip(REPORT_SECTIONS, results):
+        if isinstance(result, Exception):
+            logger.warning("Report section %s failed: %s", section.key, result)
+            drafts.append("")
+        else:
+            drafts.append(str(get_text(result)))
+    request = get_text(messages[0]) if messages else ""
+    return merge_sections(drafts, request if isinstance(request, str) else "")
 
-def make_supervisor_node(llm: BaseChatModel, members: list[str]) -> str:
+
+def _write_report(llm: BaseChatModel, messages: list) -> str:
+    model = cached_llm(llm, "synthesis")
+    if not Config.SYNTHESIS_PARALLEL:
+        return get_text(model.invoke(_synthesis_messages(compact_messages(messages, "synthesis")), config=SYNTHESIS_RUN_CONFIG))
+    inputs = [section_messages(section, messages) for section in REPORT_SECTIONS]
+    return _merge_drafts(messages, model.batch(inputs, config=_section_configs(), return_exceptions=True))
+
+
+async def _awrite_report(llm: BaseChatModel, messages: list) -> str:
+    model = cached_llm(llm, "synthesis")
+    if not Config.SYNTHESIS_PARALLEL:
+        return get_text(await model.ainvoke(_synthesis_messages(await acompact_messages(messages, "synthesis")), config=SYNTHESIS_RUN_CONFIG))
+    # Section prompts may each need a compaction summary; build them concurrently too
+    inputs = await asyncio.gather(*(asection_messages(section, messages) for section in REPORT_SECTIONS))
+    return _merge_drafts(messages, await model.abatch(inputs, config=_section_configs(), return_exceptions=True))
+
+
+def synthesize_report(llm: BaseChatModel, messages: list) -> HumanMessage:
+    """Produce the final Markdown report from the worker messages and store the run in the knowledge base.
+
+    With ``Config.SYNTHESIS_PARALLEL`` the report sections are written concurrently and merged
+    (see ``report_sections``); otherwise one streamed call writes the whole report.
+    """
+    report = _write_report(llm, messages)
+    remember_run(messages, report)
+    return HumanMessage(content=report, name="final_report")
+
+
+async def asynthesize_report(llm: BaseChatModel, messages: list) -> HumanMessage:
+    """Async variant of :func:`synthesize_report`."""
+    report = await _awrite_report(llm, messages)
+    remember_run(messages, report)
+    return HumanMessage(content=report, name="final_report")
+
+
+def make_supervisor_node(llm: BaseChatModel, members: list[str], synthesis_llm: Optional[BaseChatModel] = None) -> RunnableLambda:
+    """Build the router node; use ``destinations=(*members, END)`` when adding it.
+
+    Mechanical decisions (coverage, step budget, loops, worker suggestions) are
+    made by :func:`fast_route`; the LLM is only asked when that is ambiguous.
+    The report is written with ``synthesis_llm`` (default: ``llm``) on FINISH.
+    """
+    synthesis_llm = synthesis_llm or llm
     options = ["FINISH"] + members
 
     class Router(TypedDict):
@@ -26,23 +234,105 @@ def make_supervisor_node(llm: BaseChatModel, members: list[str]) -> str:
 
         next: Literal[*options]
 
-    def supervisor_node(state: State) -> Command[Literal[*members, "__end__"]]:
-        """An LLM-based router."""
-        messages = [
+    router = cached_llm(hedged_llm(llm, "router"), "router").with_structured_output(Router)
+
+    def _router_messages(view: list) -> list:
+        return [
             {"role": "system", "content": SYSTEM_PROMPT},
-        ] + state["messages"]
-        response = llm.with_structured_output(Router).invoke(messages)
-        goto = response["next"]
+        ] + view
+
+    def _update(state: State, goto: str, reason: str, used_llm: bool) -> dict:
+        logger.info("Routing to %s (%s)%s", goto, reason, "" if used_llm else " [fast path]")
+        update = {
+            "steps": state.get("steps", 0) + 1,
+            "router_stats": {"llm_calls" if used_llm else "fast_path": 1},
+        }
+        if goto != "FINISH":
+            update.update({"next": goto, "visited": [goto]})
+        return update
+
+    def supervisor_node(state: State) -> Command:
+        """Route deterministically when possible, otherwise ask the LLM router."""
+        goto, reason = fast_route(state, members)
+        used_llm = goto is None
+        if used_llm:
+            goto, reason = guard_route(state, router.invoke(_router_messages(compact_messages(state["messages"], "supervisor")))["next"]), "LLM router"
+        update = _update(state, goto, reason, used_llm)
+        if goto == "FINISH":
+            update["messages"] = [synthesize_report(synthesis_llm, state["messages"])]
+            return Command(update=update, goto=END)
+
+        return Command(goto=goto, update=update)
+
+    async def asupervisor_node(state: State) -> Command:
+        goto, reason = fast_route(state, members)
+        used_llm = goto is None
+        if used_llm:
+            goto, reason = guard_route(state, (await router.ainvoke(_router_messages(await acompact_messages(state["messages"], "supervisor"))))["next"]), "LLM router"
+        update = _update(state, goto, reason, used_llm)
         if goto == "FINISH":
-            synth_messages = [
-                {"role": "system", "content": SYNTHESIS_PROMPT},
-            ] + state["messages"]
-            synth_response = llm.invoke(synth_messages)
-            return Command(
-                update={"messages": [HumanMessage(content=synth_response, name="final_report")]},
-                goto=END,
-            )
-
-        return Command(goto=goto, update={"next": goto})
-
-    return supervisor_node
\ No newline at end of file
+            update["messages"] = [await asynthesize_report(synthesis_llm, state["messages"])]
+            return Command(update=update, goto=END)
+
+        return Command(goto=goto, update=update)
+
+    return RunnableLambda(supervisor_node, afunc=asupervisor_node, name="supervisor_node")
+
+
+def make_planner_node(llm: BaseChatModel, members: list[str], join: str = "synthesize") -> RunnableLambda:
+    """Build a node that writes one sub-task per member and dispatches them all concurrently.
+
+    Each member receives the conversation so far plus its own task; the members
+    run as parallel branches of the same step and must all ``goto`` the join node.
+    Members already in ``visited`` (seeded from the knowledge base) are skipped;
+    when none are left the planner goes straight to ``join`` without a model call.
+    """
+    Plan = TypedDict("Plan", {member: str for member in members})
+    Plan.__doc__ = "Sub-task for each worker, keyed by worker name."
+    planner = cached_llm(hedged_llm(llm, "planner"), "planner").with_structured_output(Plan)
+
+    def _planner_messages(view: list) -> list:
+        return [
+            {"role": "system", "content": PLANNER_PROMPT},
+        ] + view
+
+    def _pending(state: State) -> list[str]:
+        visited = state.get("visited") or []
+        return [member for member in members if member not in visited]
+
+    def _dispatch(state: State, plan: dict | None) -> Command:
+        sends = []
+        for member in _pending(state):
+            task = (plan or {}).get(member) or "Complete your part of the user's request."
+            logger.info("Planner task for %s: %s", member, task)
+            sends.append(Send(member, {"messages": state["messages"] + [HumanMessage(content=task, name="planner")]}))
+        return Command(goto=sends)
+
+    def planner_node(state: State) -> Command:
+        """An LLM-based planner that fans out to every worker at once."""
+        if not _pending(state):
+            logger.info("Every worker has fresh stored findings; skipping to %s", join)
+            return Command(goto=join)
+        return _dispatch(state, planner.invoke(_planner_messages(compact_messages(state["messages"], "planner"))))
+
+    async def aplanner_node(state: State) -> Command:
+        if not _pending(state):
+            logger.info("Every worker has fresh stored findings; skipping to %s", join)
+            return Command(goto=join)
+        return _dispatch(state, await planner.ainvoke(_planner_messages(await acompact_messages(state["messages"], "planner"))))
+
+    return RunnableLambda(planner_node, afunc=aplanner_node, name="planner_node")
+
+
+def make_synthesis_node(llm: BaseChatModel) -> RunnableLambda:
+    """Build the join node that synthesizes the final report once all parallel workers return."""
+
+    def synthesize_node(state: State) -> Command:
+        logger.info("Synthesizing final report from %d messages", len(state["messages"]))
+        return Command(update={"messages": [synthesize_report(llm, state["messages"])]}, goto=END)
+
+    async def asynthesize_node(state: State) -> Command:
+        logger.info("Synthesizing final report from %d messages (async)", len(state["messages"]))
+        return Command(update={"messages": [await asynthesize_report(llm, state["messages"])]}, goto=END)
+
+    return RunnableLambda(synthesize_node, afunc=asynthesize_node, name="synthesize_node")
@@ -0,0 +1,224 @@
+"""Record/replay cassettes for chat model and search calls.
+
+In ``record`` mode every chat model call (agent turns, router/planner
+structured output, analysis tools, compaction, synthesis) and every search
+call is written to a gzip-compressed JSON-lines file together with its inputs.
+In ``replay`` mode the same calls are answered from that file without touching
+the model or the network, so a research session can be re-run instantly and
+deterministically while prompts and orchestration are tuned.
+
+Model calls are matched on the serialized messages and the model's
+``llm_string`` (the same inputs LangChain's ``BaseCache`` sees), with message
+ids and response metadata stripped because those differ between runs. Search
+calls are matched on the tool name and normalized query. Identical requests
+made several times are answered in recording order. Requests that are not on
+the cassette are counted as misses; in strict mode they raise
+:class:`CassetteMiss`, otherwise they fall through to the live backend.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.llm_cache import dump_generations, load_generations, mark_cache_hit
+from langchain_agent.utils.search_cache import normalize_query
+
+FORMAT_VERSION = 1
+# Characters of each request kept on the cassette (and in miss reports) to identify it
+PREVIEW_CHARS = 160
+# Fields that vary between otherwise identical runs (uuid message ids, provider timings, cache markers)
+_VOLATILE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+class CassetteMiss(LookupError):
+    """Raised in strict replay mode when a request is not on the cassette."""
+
+
+def _strip_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        if value.get("lc") == 1 and isinstance(value.get("kwargs"), dict):
+            kwargs = {k: _strip_volatile(v) for k, v in value["kwargs"].items() if k not in _VOLATILE_FIELDS}
+            return {**value, "kwargs": kwargs}
+        return {k: _strip_volatile(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_strip_volatile(v) for v in value]
+    return value
+
+
+def _preview(text: Any) -> str:
+    return " ".join(str(text).split())[:PREVIEW_CHARS]
+
+
+def _llm_request(prompt: str) -> tuple:
+    """Return (normalized prompt, preview of the last message) for a serialized ``BaseCache`` prompt."""
+    try:
+        messages = _strip_volatile(json.loads(prompt))
+    except ValueError:
+        return prompt, _preview(prompt)
+    last = messages[-1] if isinstance(messages, list) and messages else messages
+    content = last.get("kwargs", {}).get("content", "") if isinstance(last, dict) else last
+    return json.dumps(messages, sort_keys=True), _preview(content)
+
+
+def _key(kind: str, *parts: str) -> str:
+    return hashlib.sha256("\x00".join((kind,) + parts).encode("utf-8")).hexdigest()
+
+
+class Cassette(BaseCache):
+    """Recorder/player for model and search calls; attach it to a chat model as its ``cache``."""
+
+    def __init__(self, path: str, mode: str = "replay", strict: bool = True):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Cassette mode must be 'record' or 'replay', got {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.strict = strict
+        self.served = 0
+        self.recorded = 0
+        self.misses: List[Dict[str, str]] = []
+
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Deque[dict]] = defaultdict(deque)
+        self._file = None
+        if mode == "replay":
+            self._load()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = gzip.open(path, "wt", encoding="utf-8")
+            self._write({"version": FORMAT_VERSION, "created_at": time.strftime("%Y-%m-%dT%H:%M:%S")})
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self) -> None:
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported cassette version {header.get('version')!r} in {self.path}")
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def _record(self, kind: str, name: str, key: str, preview: str, response: str) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._write({"kind": kind, "name": name, "key": key, "request": preview, "response": response})
+            self.recorded += 1
+
+    def _next(self, kind: str, name: str, key: str, preview: str) -> Optional[str]:
+        """Pop the next recorded response for ``key``; record a miss (and raise if strict) when there is none."""
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                if len(queue) > 1:
+                    entry = queue.popleft()
+                else:
+                    # Keep the last response so extra repeats of a request still replay
+                    entry = queue[0]
+                    queue[0] = {**entry, "replayed": True}
+                self.served += 1
+                return entry["response"]
+            self.misses.append({"kind": kind, "name": name, "request": preview})
+        if self.strict:
+            raise CassetteMiss(f"{kind} call {name!r} is not on cassette {self.path}: {preview!r}")
+        return None
+
+    # -- chat models (BaseCache interface) ---------------------------------
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        if not self.replaying:
+            return None
+        normalized, preview = _llm_request(prompt)
+        response = self._next("llm", "chat_model", _key("llm", llm_string, normalized), preview)
+        if response is None:
+            return None
+        return mark_cache_hit(load_generations(response), "cassette")
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.replaying:
+            return
+        normalized, preview = _llm_request(prompt)
+        self._record("llm", "chat_model", _key("llm", llm_string, normalized), preview, dump_generations(return_val))
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    # -- search -------------------------------------------------------------
+
+    def search(self, tool_name: str, query: str, run: Callable[[], str]) -> str:
+        """Replay the result of ``tool_name``/``query``, or call ``run()`` and record what it returns."""
+        key = _key("search", tool_name, normalize_query(query))
+        if self.replaying:
+            response = self._next("search", tool_name, key, _preview(query))
+            if response is not None:
+                return response
+            return run()
+        results = run()
+        self._record("search", tool_name, key, _preview(query), results)
+        return results
+
+    async def asearch(self, tool_name: str, query: str, run: Callable[[], Any]) -> str:
+        """Async variant of :meth:`search`; ``run`` returns an awaitable."""
+        key = _key("search", tool_name, normalize_query(query))
+        if self.replaying:
+            response = self._next("search", tool_name, key, _preview(query))
+            if response is not None:
+                return response
+            return await run()
+        results = await run()
+        self._record("search", tool_name, key, _preview(query), results)
+        return results
+
+    # -- reporting ----------------------------------------------------------
+
+    def unused(self) -> int:
+        """Number of recorded responses that were never replayed (the run diverged from the recording)."""
+        with self._lock:
+            return sum(sum(1 for e in queue if not e.get("replayed")) for queue in self._entries.values())
+
+    def report(self) -> str:
+        """One-line summary plus one line per miss, for the end of a run."""
+        if not self.replaying:
+            return f"Cassette {self.path}: recorded {self.recorded} calls"
+        lines = [f"Cassette {self.path}: replayed {self.served} calls, {len(self.misses)} misses, {self.unused()} recorded calls unused"]
+        lines.extend(f"  miss {m['kind']} {m['name']}: {m['request']!r}" for m in self.misses)
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_CASSETTE: Optional[Cassette] = None
+_CASSETTE_LOCK = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Return the process-wide cassette, or None when ``Config.CASSETTE_MODE`` is ``off``."""
+    global _CASSETTE
+    if Config.CASSETTE_MODE == "off":
+        return None
+    if _CASSETTE is None:
+        with _CASSETTE_LOCK:
+            if _CASSETTE is None:
+                _CASSETTE = Cassette(Config.CASSETTE_PATH, mode=Config.CASSETTE_MODE, strict=Config.CASSETTE_STRICT)
+    return _CASSETTE
@@ -0,0 +1,110 @@
+"""Durable SQLite checkpointing so interrupted research runs can resume.
+
+Every completed graph step (including the steps of the specialist agents,
+which run as subgraphs of their worker node) is written to
+``Config.CHECKPOINT_PATH`` under the run's thread id. Invoking the graph again
+with the same thread id and ``None`` as input continues from the last completed
+step instead of starting over.
+"""
+import os
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from typing import List, Optional
+
+from langchain_agent.utils.config import Config
+
+
+def _require_sqlite_saver():
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError as e:
+        raise RuntimeError("Checkpointing requires the 'langgraph-checkpoint-sqlite' package") from e
+    return SqliteSaver
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def run_config(run_id: str, callbacks: Optional[List] = None) -> dict:
+    """Graph config that binds a run to its checkpoint thread (and optional callback handlers).
+
+    When evidence retrieval is enabled, the evidence ingestor is added to the callbacks.
+    """
+    config = {"configurable": {"thread_id": run_id}}
+    if Config.EVIDENCE_ENABLED:
+        from langchain_agent.utils.evidence import get_evidence_ingestor
+
+        callbacks = list(callbacks or []) + [get_evidence_ingestor()]
+    if callbacks:
+        config["callbacks"] = callbacks
+    return config
+
+
+@contextmanager
+def get_checkpointer(path: Optional[str] = None):
+    """Yield a sync SQLite checkpointer and close its connection on exit.
+
+    The connection may be shared across worker threads while it is open.
+    """
+    SqliteSaver = _require_sqlite_saver()
+    path = path or Config.CHECKPOINT_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with SqliteSaver.from_conn_string(path) as saver:
+        yield saver
+
+
+@asynccontextmanager
+async def aget_checkpointer(path: Optional[str] = None):
+    """Yield an async SQLite checkpointer for ``ainvoke``/``astream`` runs."""
+    _require_sqlite_saver()
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    path = path or Config.CHECKPOINT_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    async with AsyncSqliteSaver.from_conn_string(path) as saver:
+        yield saver
+
+
+class RunAlreadyFinished(ValueError):
+    """A run id was reused after its run finished; its saved state would end a new run at once."""
+
+    def __init__(self, run_id: str):
+        super().__init__(f"Run {run_id} already finished; pass a new --run-id (or none) to start another run")
+        self.run_id = run_id
+
+
+def _is_finished(snapshot) -> bool:
+    return bool(snapshot.values) and not snapshot.next
+
+
+def _pending_prompt(snapshot, run_id: str) -> Optional[str]:
+    if _is_finished(snapshot):
+        raise RunAlreadyFinished(run_id)
+    if not snapshot.next:
+        return None
+    for message in snapshot.values.get("messages", []):
+        if getattr(message, "type", None) == "human":
+            return message.content
+    return ""
+
+
+def pending_run_prompt(graph, run_id: str) -> Optional[str]:
+    """Return the original prompt of ``run_id`` if it has unfinished steps, else None for a new run id.
+
+    Raises :class:`RunAlreadyFinished` when ``run_id`` names a run that already finished.
+    """
+    return _pending_prompt(graph.get_state(run_config(run_id)), run_id)
+
+
+async def apending_run_prompt(graph, run_id: str) -> Optional[str]:
+    """Async variant of :func:`pending_run_prompt`."""
+    return _pending_prompt(await graph.aget_state(run_config(run_id)), run_id)
+
+
+def reset_finished_run(graph, run_id: str) -> bool:
+    """Delete the checkpoints of ``run_id`` if that run already finished, so the id can start over."""
+    if not _is_finished(graph.get_state(run_config(run_id))):
+        return False
+    graph.checkpointer.delete_thread(run_id)
+    return True
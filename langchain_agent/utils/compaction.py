@@ -0,0 +1,266 @@
+"""Token-budgeted, per-role views of the shared message history.
+
+Every node used to prepend its system prompt to the entire ``state["messages"]``
+list, so prompts grew with every hop. ``ContextCompactor.compact`` builds a view
+that fits the role's budget from ``Config.CONTEXT_BUDGETS``:
+
+- the user's original request is always kept verbatim;
+- superseded outputs of a worker (all but its latest) are reduced to a digest
+  built from their trailing JSON block;
+- the router and planner see digests of every worker output, since they only
+  need coverage and key findings, not full reports; so do ``retrieval_roles``
+  (workers with the ``retrieve_evidence`` tool) for other workers' outputs,
+  since they can retrieve the underlying evidence on demand;
+- whatever still does not fit is folded, oldest first, into a rolling summary
+  that is cached by the hash of the messages it covers, so each hop only
+  summarizes messages that newly fell out of the window.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.logger import setup_logger
+from langchain_agent.utils.response_utils import get_text, parse_trailing_json
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+SUMMARY_NAME = "context_summary"
+# Roles that route or plan rather than do research; they get digests of worker outputs
+DIGEST_ROLES = {"supervisor", "planner"}
+# Workers that get the retrieve_evidence tool when Config.EVIDENCE_ENABLED is on
+EVIDENCE_ROLES = frozenset({"research", "market", "saas_finder"})
+# Message names that are not worker outputs: the user's request, the plan, the rolling summary and the report
+_NON_WORKER_NAMES = {None, "planner", "final_report", SUMMARY_NAME}
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a multi-agent SaaS research session.\n"
+    "Update the summary with the new messages below. Keep every concrete fact: idea names, market size numbers,\n"
+    "competitor names, prices, pain points and recommendations, and note which worker produced them.\n"
+    "Reply with the updated summary only, as terse bullet points, in at most {max_words} words.\n\n"
+    "Current summary:\n{summary}\n\nNew messages:\n{messages}"
+)
+
+
+def estimate_tokens(messages: Sequence[BaseMessage]) -> int:
+    """Cheap token estimate (~4 characters per token plus per-message overhead)."""
+    return sum(len(str(get_text(m))) // 4 + 4 for m in messages)
+
+
+def is_worker_output(message: BaseMessage) -> bool:
+    """Whether ``message`` is a worker's output, as opposed to the request, plan, summary or final report."""
+    return isinstance(message, HumanMessage) and getattr(message, "name", None) not in _NON_WORKER_NAMES
+
+
+def digest(message: BaseMessage, max_chars: int = 600) -> str:
+    """Compact one worker output to its structured summary and findings."""
+    text = str(get_text(message))
+    parsed = parse_trailing_json(text)
+    name = getattr(message, "name", None) or "message"
+    if isinstance(parsed, dict) and parsed.get("summary"):
+        lines = [f"[{name}] {parsed['summary']}"]
+        findings = parsed.get("findings") or []
+        if isinstance(findings, list):
+            lines.extend(f"- {f}" for f in findings)
+        if parsed.get("confidence"):
+            lines.append(f"(confidence: {parsed['confidence']})")
+        return "\n".join(lines)[:max_chars]
+    snippet = " ".join(text.split())
+    return f"[{name}] " + (snippet if len(snippet) <= max_chars else snippet[: max_chars - 3] + "...")
+
+
+def _digest_message(message: BaseMessage) -> HumanMessage:
+    return HumanMessage(content=digest(message), name=getattr(message, "name", None))
+
+
+def _truncate(message: BaseMessage, max_tokens: int) -> BaseMessage:
+    text = str(get_text(message))
+    max_chars = max(max_tokens, 1) * 4
+    if len(text) <= max_chars:
+        return message
+    return message.model_copy(update={"content": text[: max_chars - 20] + "\n...[truncated]"})
+
+
+class ContextCompactor:
+    """Build per-role, token-budgeted views of a message history."""
+
+    def __init__(self, budgets: Dict[str, int], default_budget: int = 6000, summarizer: Optional[BaseChatModel] = None, max_cached_summaries: int = 256,
+                 retrieval_roles: frozenset = frozenset()):
+        self.budgets = budgets
+        self.retrieval_roles = retrieval_roles
+        self.default_budget = default_budget
+        self.summarizer = summarizer
+        self.max_cached_summaries = max_cached_summaries
+        self.summaries_computed = 0
+        self.summaries_reused = 0
+        self._summaries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def budget_for(self, role: str) -> int:
+        return self.budgets.get(role, self.default_budget)
+
+    def compact(self, messages: Sequence[BaseMessage], role: str) -> List[BaseMessage]:
+        """Return a view of ``messages`` for ``role`` that fits the role's token budget."""
+        pinned, keep, overflow, reserve = self._window(messages, role)
+        summary = self._rolling_summary(overflow, reserve) if overflow else ""
+        return self._assemble(pinned, keep, summary)
+
+    async def acompact(self, messages: Sequence[BaseMessage], role: str) -> List[BaseMessage]:
+        """Async :meth:`compact`: the summary model call is awaited instead of blocking the event loop."""
+        pinned, keep, overflow, reserve = self._window(messages, role)
+        summary = await self._arolling_summary(overflow, reserve) if overflow else ""
+        return self._assemble(pinned, keep, summary)
+
+    def _window(self, messages: Sequence[BaseMessage], role: str) -> Tuple[List[BaseMessage], List[BaseMessage], List[BaseMessage], int]:
+        """Split the role's view into ``(pinned, kept, overflow, summary reserve)``; overflow must be summarized."""
+        messages = list(messages)
+        if not messages:
+            return [], [], [], 0
+        budget = self.budget_for(role)
+
+        pinned: List[BaseMessage] = []
+        rest = messages
+        if isinstance(messages[0], HumanMessage) and not is_worker_output(messages[0]):
+            pinned, rest = [messages[0]], messages[1:]
+
+        latest_index = {}
+        for i, m in enumerate(rest):
+            if is_worker_output(m):
+                latest_index[m.name] = i
+        view = []
+        for i, m in enumerate(rest):
+            if is_worker_output(m) and (role in DIGEST_ROLES or latest_index[m.name] != i or (role in self.retrieval_roles and m.name != role)):
+                view.append(_digest_message(m))
+            else:
+                view.append(m)
+
+        if estimate_tokens(pinned + view) <= budget:
+            return pinned, view, [], 0
+
+        reserve = min(budget // 4, 800)
+        used = estimate_tokens(pinned) + reserve
+        keep: List[BaseMessage] = []
+        for m in reversed(view):
+            cost = estimate_tokens([m])
+            if used + cost > budget:
+                if not keep:
+                    # The newest message alone is over budget: keep a truncated copy rather than nothing
+                    keep.insert(0, _truncate(m, budget - used))
+                break
+            keep.insert(0, m)
+            used += cost
+        overflow = view[: len(view) - len(keep)]
+        logger.debug("Compacted %d messages for %s: kept %d, summarized %d", len(messages), role, len(keep), len(overflow))
+        return pinned, keep, overflow, reserve
+
+    @staticmethod
+    def _assemble(pinned: List[BaseMessage], keep: List[BaseMessage], summary: str) -> List[BaseMessage]:
+        summary_messages = [HumanMessage(content=f"Summary of earlier work:\n{summary}", name=SUMMARY_NAME)] if summary else []
+        return pinned + summary_messages + keep
+
+    def _cached_prefix(self, overflow: List[BaseMessage]) -> Tuple[List[str], int, str]:
+        """Return the overflow's prefix hashes and the longest already-summarized prefix ``(length, summary)``."""
+        # Chain hashes over the overflow so the summary of any already-seen prefix can be reused
+        prefix_hashes = []
+        h = hashlib.sha256()
+        for m in overflow:
+            h.update(f"{getattr(m, 'name', '')}\x00{get_text(m)}\x01".encode("utf-8"))
+            prefix_hashes.append(h.hexdigest())
+
+        with self._lock:
+            for i in range(len(prefix_hashes) - 1, -1, -1):
+                cached = self._summaries.get(prefix_hashes[i])
+                if cached is not None:
+                    self._summaries.move_to_end(prefix_hashes[i])
+                    return prefix_hashes, i + 1, cached
+        return prefix_hashes, 0, ""
+
+    def _store_summary(self, key: str, summary: str) -> str:
+        self.summaries_computed += 1
+        with self._lock:
+            self._summaries[key] = summary
+            while len(self._summaries) > self.max_cached_summaries:
+                self._summaries.popitem(last=False)
+        return summary
+
+    def _rolling_summary(self, overflow: List[BaseMessage], reserve_tokens: int) -> str:
+        prefix_hashes, start, summary = self._cached_prefix(overflow)
+        if start == len(overflow):
+            self.summaries_reused += 1
+            return summary
+        return self._store_summary(prefix_hashes[-1], self._summarize(summary, overflow[start:], reserve_tokens))
+
+    async def _arolling_summary(self, overflow: List[BaseMessage], reserve_tokens: int) -> str:
+        prefix_hashes, start, summary = self._cached_prefix(overflow)
+        if start == len(overflow):
+            self.summaries_reused += 1
+            return summary
+        return self._store_summary(prefix_hashes[-1], await self._asummarize(summary, overflow[start:], reserve_tokens))
+
+    def _summary_prompt(self, summary: str, new_messages: List[BaseMessage], reserve_tokens: int) -> str:
+        rendered = "\n\n".join(f"[{getattr(m, 'name', None) or m.type}] {str(get_text(m))[:4000]}" for m in new_messages)
+        return SUMMARY_PROMPT.format(max_words=max(reserve_tokens * 3 // 4, 50), summary=summary or "(empty)", messages=rendered)
+
+    def _summarize(self, summary: str, new_messages: List[BaseMessage], reserve_tokens: int) -> str:
+        if self.summarizer is not None:
+            try:
+                response = self.summarizer.invoke(self._summary_prompt(summary, new_messages, reserve_tokens))
+                return str(get_text(response))[: reserve_tokens * 4]
+            except Exception as e:
+                logger.warning("Context summarization failed, falling back to digests: %s", e)
+        return self._digest_summary(summary, new_messages, reserve_tokens)
+
+    async def _asummarize(self, summary: str, new_messages: List[BaseMessage], reserve_tokens: int) -> str:
+        if self.summarizer is not None:
+            try:
+                response = await self.summarizer.ainvoke(self._summary_prompt(summary, new_messages, reserve_tokens))
+                return str(get_text(response))[: reserve_tokens * 4]
+            except Exception as e:
+                logger.warning("Context summarization failed, falling back to digests: %s", e)
+        return self._digest_summary(summary, new_messages, reserve_tokens)
+
+    @staticmethod
+    def _digest_summary(summary: str, new_messages: List[BaseMessage], reserve_tokens: int) -> str:
+        parts = [summary] if summary else []
+        parts.extend(digest(m, max_chars=300) for m in new_messages)
+        combined = "\n".join(parts)
+        # Keep the most recent part when the deterministic summary outgrows its reserve
+        return combined[-reserve_tokens * 4:]
+
+
+_COMPACTOR: Optional[ContextCompactor] = None
+_COMPACTOR_LOCK = threading.Lock()
+
+
+def get_compactor() -> ContextCompactor:
+    """Return the process-wide compactor configured from Config."""
+    global _COMPACTOR
+    if _COMPACTOR is None:
+        with _COMPACTOR_LOCK:
+            if _COMPACTOR is None:
+                summarizer = None
+                if Config.CONTEXT_SUMMARY_WITH_LLM:
+                    from langchain_agent.utils.llm_cache import cached_llm
+
+                    summarizer = cached_llm(Config.get_chat_llm("analysis"), "compaction")
+                retrieval_roles = EVIDENCE_ROLES if Config.EVIDENCE_ENABLED else frozenset()
+                _COMPACTOR = ContextCompactor(Config.CONTEXT_BUDGETS, Config.CONTEXT_BUDGET_DEFAULT, summarizer, retrieval_roles=retrieval_roles)
+    return _COMPACTOR
+
+
+def compact_messages(messages: Sequence[BaseMessage], role: str) -> List[BaseMessage]:
+    """Compact ``messages`` for ``role``, or return them unchanged when compaction is disabled."""
+    if not Config.CONTEXT_COMPACTION_ENABLED:
+        return list(messages)
+    return get_compactor().compact(messages, role)
+
+
+async def acompact_messages(messages: Sequence[BaseMessage], role: str) -> List[BaseMessage]:
+    """Async :func:`compact_messages`, for nodes running on an event loop."""
+    if not Config.CONTEXT_COMPACTION_ENABLED:
+        return list(messages)
+    return await get_compactor().acompact(messages, role)
@@ -0,0 +1,137 @@
+"""Bounded concurrency per tool family.
+
+Each tool family (``search``, ``analysis``, ``chart``) gets a limit from
+``Config.TOOL_CONCURRENCY``. The limit is process-wide: sync callers (threads)
+and async callers (on any event loop) draw from the same pool of slots, so a
+mix of both never runs more than the limit at once. Slots are handed to
+waiters in arrival order.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Deque, Dict, Optional, Union
+
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.instrumentation import record_queue_wait
+
+_LOCK = threading.Lock()
+
+
+class _Slots:
+    """A counting semaphore shared by threads and event loops.
+
+    A sync waiter blocks on a ``threading.Event``; an async waiter awaits a
+    future on its own loop, so waiting never blocks an event loop. A released
+    slot goes straight to the first waiter rather than back to the pool.
+    """
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._free = size
+        self._waiters: Deque[Union[threading.Event, asyncio.Future]] = deque()
+
+    def _take(self) -> bool:
+        # Caller holds the lock; queued waiters go first
+        if self._free and not self._waiters:
+            self._free -= 1
+            return True
+        return False
+
+    def acquire(self) -> None:
+        with self._lock:
+            if self._take():
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def aacquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._take():
+                return
+            future = loop.create_future()
+            self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+                    raise
+            # The slot was handed over as the waiter was cancelled; pass it on
+            self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if isinstance(waiter, threading.Event):
+                    waiter.set()
+                    return
+                try:
+                    waiter.get_loop().call_soon_threadsafe(_grant, waiter)
+                    return
+                except RuntimeError:
+                    continue  # its loop is closed; nobody is left to take the slot
+            self._free += 1
+
+
+def _grant(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+_SLOTS: Dict[str, _Slots] = {}
+
+
+def family_limit(family: str) -> int:
+    """Return the configured concurrency limit for a tool family."""
+    return max(1, Config.TOOL_CONCURRENCY.get(family, Config.TOOL_CONCURRENCY_DEFAULT))
+
+
+def _slots(family: str) -> _Slots:
+    with _LOCK:
+        slots = _SLOTS.get(family)
+        if slots is None:
+            slots = _SLOTS[family] = _Slots(family_limit(family))
+        return slots
+
+
+def _waited(name: str, started: float) -> None:
+    waited = time.perf_counter() - started
+    # Uncontended acquisitions are not worth a trace record
+    if waited >= 0.001:
+        record_queue_wait(name, waited)
+
+
+@contextmanager
+def limit(family: str, name: Optional[str] = None):
+    """Hold one of the family's slots for the duration of a sync call.
+
+    Time spent waiting for the slot is reported to the active tracer under ``name`` (default: the family).
+    """
+    slots = _slots(family)
+    started = time.perf_counter()
+    slots.acquire()
+    try:
+        _waited(name or family, started)
+        yield
+    finally:
+        slots.release()
+
+
+@asynccontextmanager
+async def alimit(family: str, name: Optional[str] = None):
+    """Hold one of the family's slots for the duration of an async call."""
+    slots = _slots(family)
+    started = time.perf_counter()
+    await slots.aacquire()
+    try:
+        _waited(name or family, started)
+        yield
+    finally:
+        slots.release()
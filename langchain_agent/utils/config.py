@@ -2,12 +2,23 @@
 
 from typing import Optional
 import os
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 
+def load_factory(spec: str):
+    """Import the callable named by a ``package.module:attribute`` spec."""
+    import importlib
+
+    module_name, _, attr = spec.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"Expected 'package.module:factory', got {spec!r}")
+    return getattr(importlib.import_module(module_name), attr)
+
+
 class Config:
     """Configuration settings for the agent system."""
     
@@ -21,19 +32,184 @@ class Config:
     CHARTS_DIR: str = os.getenv("CHARTS_DIR", "output/charts")
     GRAPHS_DIR: str = os.getenv("GRAPHS_DIR", "output/graphs")
     REPORTS_DIR: str = os.getenv("REPORTS_DIR", "output/reports")
+    CACHE_DIR: str = os.getenv("CACHE_DIR", "output/cache")
+
+    # Chart rendering: image format (png, svg, pdf, jpg), DPI, and process pool size (0 renders in the calling thread)
+    CHART_FORMAT: str = os.getenv("CHART_FORMAT", "png").lower()
+    CHART_DPI: int = int(os.getenv("CHART_DPI", "100"))
+    CHART_PROCESS_WORKERS: int = int(os.getenv("CHART_PROCESS_WORKERS", "0"))
+    # Rendered charts kept in <CHARTS_DIR>/.cache, least recently used evicted first (0 = unbounded)
+    CHART_CACHE_MAX_FILES: int = int(os.getenv("CHART_CACHE_MAX_FILES", "256"))
+
+    # Instrumentation: per-run JSON-lines traces, and a Prometheus /metrics endpoint when METRICS_PORT > 0
+    TRACE_ENABLED: bool = os.getenv("TRACE_ENABLED", "true").lower() in ("1", "true", "yes")
+    TRACE_DIR: str = os.getenv("TRACE_DIR", os.path.join(OUTPUT_DIR, "traces"))
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "0"))
+
+    # Render the graph PNG on startup (re-rendered only when the graph structure changes)
+    GRAPH_IMAGE_ENABLED: bool = os.getenv("GRAPH_IMAGE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    # Durable run checkpoints (resume with main.py --run-id)
+    CHECKPOINT_PATH: str = os.getenv("CHECKPOINT_PATH", os.path.join(OUTPUT_DIR, "checkpoints.sqlite"))
+
+    # Search cache settings (set SEARCH_CACHE_ENABLED=false to bypass)
+    SEARCH_CACHE_ENABLED: bool = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    SEARCH_CACHE_PATH: str = os.getenv("SEARCH_CACHE_PATH", os.path.join(CACHE_DIR, "search_cache.sqlite"))
+    SEARCH_CACHE_TTL_SECONDS: int = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", str(24 * 60 * 60)))
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
     
+    # Search rate limiting shared by all search tools: token bucket (requests/second, 0 disables; burst size),
+    # and retries of throttled searches with exponential backoff and full jitter
+    SEARCH_RATE_PER_SECOND: float = float(os.getenv("SEARCH_RATE_PER_SECOND", "1"))
+    SEARCH_BURST: int = int(os.getenv("SEARCH_BURST", "3"))
+    SEARCH_MAX_RETRIES: int = int(os.getenv("SEARCH_MAX_RETRIES", "3"))
+    SEARCH_BACKOFF_BASE_SECONDS: float = float(os.getenv("SEARCH_BACKOFF_BASE_SECONDS", "1"))
+    SEARCH_BACKOFF_MAX_SECONDS: float = float(os.getenv("SEARCH_BACKOFF_MAX_SECONDS", "20"))
+
+    # Page fetching (fetch_page tool): pooled HTTP session, per-host limits, compressed page store
+    PAGE_STORE_PATH: str = os.getenv("PAGE_STORE_PATH", os.path.join(CACHE_DIR, "pages.sqlite"))
+    PAGE_STORE_MAX_BYTES: int = int(os.getenv("PAGE_STORE_MAX_BYTES", str(128 * 1024 * 1024)))
+    PAGE_TTL_SECONDS: int = int(os.getenv("PAGE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+    FETCH_TIMEOUT_SECONDS: float = float(os.getenv("FETCH_TIMEOUT_SECONDS", "10"))
+    FETCH_MAX_PER_HOST: int = int(os.getenv("FETCH_MAX_PER_HOST", "2"))
+    FETCH_WORKERS: int = int(os.getenv("FETCH_WORKERS", "8"))
+    FETCH_MAX_BYTES: int = int(os.getenv("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+    # Let fetch_page reach loopback, private and link-local addresses (e.g. an intranet); off by default
+    FETCH_ALLOW_PRIVATE: bool = os.getenv("FETCH_ALLOW_PRIVATE", "false").lower() in ("1", "true", "yes")
+    # Characters of page text returned to the agent per page
+    FETCH_MAX_CHARS: int = int(os.getenv("FETCH_MAX_CHARS", "6000"))
+
+    # LLM response cache (opt-in per call site via LLM_CACHE_SCOPES)
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+    LLM_CACHE_PATH: str = os.getenv("LLM_CACHE_PATH", os.path.join(CACHE_DIR, "llm_cache.sqlite"))
+    LLM_CACHE_MAX_BYTES: int = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    LLM_CACHE_MEMORY_ENTRIES: int = int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))
+    LLM_CACHE_SCOPES: frozenset = frozenset(
+        scope.strip()
+        for scope in os.getenv(
+            "LLM_CACHE_SCOPES",
+            "router,planner,evaluate_idea,analyze_pain_killer_vitamin,analyze_bootstrapping_feasibility,"
+            "analyze_payment_willingness,generate_distribution_strategy",
+        ).split(",")
+        if scope.strip()
+    )
+
+    # Record/replay cassette for model and search calls: 'off', 'record' or 'replay' (main.py --record/--replay).
+    # Strict replay raises on calls missing from the cassette instead of falling through to the live backend.
+    CASSETTE_MODE: str = os.getenv("CASSETTE_MODE", "off").lower()
+    CASSETTE_PATH: str = os.getenv("CASSETTE_PATH", os.path.join(OUTPUT_DIR, "cassettes", "session.jsonl.gz"))
+    CASSETTE_STRICT: bool = os.getenv("CASSETTE_STRICT", "true").lower() in ("1", "true", "yes")
+
+    # Knowledge base of earlier runs (opt-in: reports, worker findings, competitors, timestamped search results).
+    # A run on a known niche reuses stored worker findings and search results younger than KNOWLEDGE_FRESHNESS_SECONDS;
+    # KNOWLEDGE_MATCH_THRESHOLD is the word overlap a request needs with a stored niche to count as the same niche.
+    # KNOWLEDGE_SEED=false (main.py --refresh) still stores runs but reuses neither stored findings nor stored search results.
+    KNOWLEDGE_ENABLED: bool = os.getenv("KNOWLEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+    KNOWLEDGE_PATH: str = os.getenv("KNOWLEDGE_PATH", os.path.join(OUTPUT_DIR, "knowledge.sqlite"))
+    KNOWLEDGE_FRESHNESS_SECONDS: int = int(os.getenv("KNOWLEDGE_FRESHNESS_SECONDS", str(7 * 24 * 60 * 60)))
+    KNOWLEDGE_MATCH_THRESHOLD: float = float(os.getenv("KNOWLEDGE_MATCH_THRESHOLD", "0.6"))
+    KNOWLEDGE_SEED: bool = os.getenv("KNOWLEDGE_SEED", "true").lower() in ("1", "true", "yes")
+
+    # Evidence store: tool outputs are chunked, embedded in batches and kept in a memory-mapped vector index per run,
+    # which research/market/saas_finder query with the retrieve_evidence tool (workers then see digests of each other).
+    # Chunks with cosine similarity >= EVIDENCE_DEDUPE_THRESHOLD to a stored chunk of the same run are dropped.
+    EVIDENCE_ENABLED: bool = os.getenv("EVIDENCE_ENABLED", "false").lower() in ("1", "true", "yes")
+    EVIDENCE_DIR: str = os.getenv("EVIDENCE_DIR", os.path.join(OUTPUT_DIR, "evidence"))
+    EVIDENCE_CHUNK_CHARS: int = int(os.getenv("EVIDENCE_CHUNK_CHARS", "1000"))
+    EVIDENCE_CHUNK_OVERLAP: int = int(os.getenv("EVIDENCE_CHUNK_OVERLAP", "150"))
+    EVIDENCE_DEDUPE_THRESHOLD: float = float(os.getenv("EVIDENCE_DEDUPE_THRESHOLD", "0.95"))
+    EVIDENCE_EMBED_BATCH: int = int(os.getenv("EVIDENCE_EMBED_BATCH", "32"))
+    EVIDENCE_TOP_K: int = int(os.getenv("EVIDENCE_TOP_K", "5"))
+    # Embedding model provider: 'ollama' (OLLAMA_EMBEDDING_MODEL), 'openai' (OPENAI_EMBEDDING_MODEL)
+    # or a 'package.module:factory' path to a zero-argument factory returning LangChain Embeddings
+    EMBEDDINGS_PROVIDER: str = os.getenv("EMBEDDINGS_PROVIDER", "ollama")
+    OPENAI_EMBEDDING_MODEL: str = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+
     # Agent settings
     TEMPERATURE: float = float(os.getenv("TEMPERATURE", "0.2"))
-    # Generic LLM provider selection: 'ollama' or 'openai'
+    # Generic LLM provider selection: 'ollama', 'openai', a name registered with
+    # register_llm_provider, or a 'package.module:factory' path to a factory that takes the
+    # resolved settings dict (a zero-argument factory is accepted while no role overrides its model settings)
     LLM_PROVIDER: str = os.getenv("LLM_PROVIDER", "ollama")
+    # Per-role model tiers, so cheap decisions can use a small model: 'router' (supervisor routing and the planner),
+    # 'worker' (the specialist agents), 'analysis' (analysis tools and context summaries) and 'synthesis' (the final
+    # report). <ROLE>_LLM_PROVIDER, <ROLE>_LLM_MODEL, <ROLE>_LLM_TEMPERATURE and <ROLE>_LLM_NUM_CTX (Ollama context
+    # window) fall back to LLM_PROVIDER, OLLAMA_MODEL/OPENAI_MODEL, TEMPERATURE and LLM_NUM_CTX (0: provider default)
+    LLM_NUM_CTX: int = int(os.getenv("LLM_NUM_CTX", "0"))
+    LLM_ROLE_SETTINGS: dict = {
+        role: {key: os.getenv(f"{role.upper()}_LLM_{key.upper()}", "") for key in ("provider", "model", "temperature", "num_ctx")}
+        for role in ("router", "worker", "analysis", "synthesis")
+    }
+    # Search backend for the search tools: 'duckduckgo' or a 'package.module:factory' path
+    SEARCH_BACKEND: str = os.getenv("SEARCH_BACKEND", "duckduckgo")
+
+    # Model server pool: comma-separated base URLs for LLM_PROVIDER when it is 'ollama' or 'openai' (default:
+    # OLLAMA_BASE_URL, or the OpenAI default). Roles that switch to another provider use that provider's default URL.
+    # With several, each call goes to the least busy healthy endpoint and fails over.
+    LLM_ENDPOINTS: list = [u.strip() for u in os.getenv("LLM_ENDPOINTS", "").split(",") if u.strip()]
+    LLM_ENDPOINT_MAX_CONCURRENCY: int = int(os.getenv("LLM_ENDPOINT_MAX_CONCURRENCY", "4"))
+    LLM_POOL_ATTEMPTS: int = int(os.getenv("LLM_POOL_ATTEMPTS", "3"))
+    LLM_EJECT_AFTER_FAILURES: int = int(os.getenv("LLM_EJECT_AFTER_FAILURES", "2"))
+    LLM_EJECT_SECONDS: float = float(os.getenv("LLM_EJECT_SECONDS", "30"))
+    # Ejected endpoints are probed with GET <url><LLM_HEALTH_PATH> every interval (0: readmit after the cooldown unprobed)
+    LLM_HEALTH_CHECK_INTERVAL: float = float(os.getenv("LLM_HEALTH_CHECK_INTERVAL", "15"))
+    LLM_HEALTH_PATH: str = os.getenv("LLM_HEALTH_PATH", "/api/tags")
+    # Hedged requests: resend to a second endpoint when no answer arrives within this many seconds (0 disables)
+    LLM_HEDGE_AFTER_SECONDS: float = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+    LLM_HEDGE_SCOPES: frozenset = frozenset(s.strip() for s in os.getenv("LLM_HEDGE_SCOPES", "router,planner").split(",") if s.strip())
 
     # OpenAI settings (when provider is 'openai')
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
     OPENAI_API_KEY: Optional[str] = os.getenv("OPENAI_API_KEY")
     MAX_ITERATIONS: int = 50
     MAX_STEPS: int = int(os.getenv("MAX_STEPS", "15"))
+    # Max concurrent tool calls per tool family (search, analysis, chart)
+    TOOL_CONCURRENCY: dict = {
+        "search": int(os.getenv("SEARCH_CONCURRENCY", "4")),
+        "analysis": int(os.getenv("ANALYSIS_CONCURRENCY", "2")),
+        "chart": int(os.getenv("CHART_CONCURRENCY", "2")),
+    }
+    TOOL_CONCURRENCY_DEFAULT: int = 4
+    # Context compaction: approximate prompt-token budget per role for the history each node sees
+    CONTEXT_COMPACTION_ENABLED: bool = os.getenv("CONTEXT_COMPACTION_ENABLED", "true").lower() in ("1", "true", "yes")
+    CONTEXT_SUMMARY_WITH_LLM: bool = os.getenv("CONTEXT_SUMMARY_WITH_LLM", "true").lower() in ("1", "true", "yes")
+    CONTEXT_BUDGET_DEFAULT: int = int(os.getenv("CONTEXT_BUDGET_DEFAULT", "6000"))
+    CONTEXT_BUDGETS: dict = {
+        "supervisor": int(os.getenv("CONTEXT_BUDGET_SUPERVISOR", "2000")),
+        "planner": int(os.getenv("CONTEXT_BUDGET_PLANNER", "2000")),
+        "saas_finder": int(os.getenv("CONTEXT_BUDGET_SAAS_FINDER", "6000")),
+        "market": int(os.getenv("CONTEXT_BUDGET_MARKET", "6000")),
+        "research": int(os.getenv("CONTEXT_BUDGET_RESEARCH", "6000")),
+        "synthesis": int(os.getenv("CONTEXT_BUDGET_SYNTHESIS", "12000")),
+        "report_section": int(os.getenv("CONTEXT_BUDGET_REPORT_SECTION", "4000")),
+    }
+    # Final report: with SYNTHESIS_PARALLEL each fixed section is written by its own model call (at most
+    # SYNTHESIS_CONCURRENCY at once) from only the worker outputs it needs, and the drafts are merged without
+    # another call; false writes the whole report in one call, which --stream shows token by token
+    SYNTHESIS_PARALLEL: bool = os.getenv("SYNTHESIS_PARALLEL", "true").lower() in ("1", "true", "yes")
+    SYNTHESIS_CONCURRENCY: int = int(os.getenv("SYNTHESIS_CONCURRENCY", "8"))
+    # Batch mode defaults (main.py --batch)
+    BATCH_WORKERS: int = int(os.getenv("BATCH_WORKERS", "2"))
+    BATCH_EXECUTOR: str = os.getenv("BATCH_EXECUTOR", "thread")
+    # HTTP service mode (main.py --serve): jobs run SERVER_CONCURRENCY at a time and at most SERVER_QUEUE_SIZE may wait
+    # (further submissions get HTTP 429); the last SERVER_JOB_HISTORY finished jobs stay queryable with their events
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_CONCURRENCY: int = int(os.getenv("SERVER_CONCURRENCY", "2"))
+    SERVER_QUEUE_SIZE: int = int(os.getenv("SERVER_QUEUE_SIZE", "32"))
+    SERVER_JOB_HISTORY: int = int(os.getenv("SERVER_JOB_HISTORY", "100"))
+    # Orchestration: 'router' (serial LLM supervisor) or 'planner' (parallel fan-out to all workers)
+    ORCHESTRATION_MODE: str = os.getenv("ORCHESTRATION_MODE", "router")
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # Records are written by a background thread: to stderr, and as JSON lines to LOG_FILE (rotated at
+    # LOG_FILE_MAX_BYTES, keeping LOG_FILE_BACKUPS files) when it is set. Messages longer than LOG_MAX_CHARS are
+    # truncated and tagged with the SHA-1 of the full text, which is saved to LOG_PAYLOAD_DIR when that is set.
+    LOG_FILE: str = os.getenv("LOG_FILE", "")
+    LOG_FILE_MAX_BYTES: int = int(os.getenv("LOG_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+    LOG_FILE_BACKUPS: int = int(os.getenv("LOG_FILE_BACKUPS", "3"))
+    LOG_MAX_CHARS: int = int(os.getenv("LOG_MAX_CHARS", "4000"))
+    LOG_PAYLOAD_DIR: str = os.getenv("LOG_PAYLOAD_DIR", "")
     
     @classmethod
     def ensure_directories(cls):
@@ -42,6 +218,7 @@ class Config:
         os.makedirs(cls.CHARTS_DIR, exist_ok=True)
         os.makedirs(cls.GRAPHS_DIR, exist_ok=True)
         os.makedirs(cls.REPORTS_DIR, exist_ok=True)
+        os.makedirs(cls.CACHE_DIR, exist_ok=True)
 
     @classmethod
     def validate(cls):
@@ -52,38 +229,141 @@ class Config:
         cls.ensure_directories()
         # Additional validation could be added here in future
 
-    # LLM instance cache
-    _LLM_INSTANCE = None
+    # LLM instance cache, keyed by resolved model settings
+    _LLM_INSTANCES: dict = {}
+    _LLM_LOCK = threading.Lock()
+    _EMBEDDINGS_INSTANCE = None
+    # Extra providers registered at runtime (e.g. a fake model for benchmarks)
+    _LLM_PROVIDERS: dict = {}
 
     @classmethod
-    def get_chat_llm(cls):
-        """Return a chat-capable LLM instance based on current configuration.
+    def register_llm_provider(cls, name: str, factory) -> None:
+        """Register a factory returning a chat model under ``name`` for ``LLM_PROVIDER``.
+
+        The factory is called with the role's resolved settings (see :meth:`llm_settings`).
+        """
+        cls._LLM_PROVIDERS[name.lower()] = factory
+
+    @classmethod
+    def llm_settings(cls, role: Optional[str] = None) -> dict:
+        """Resolve the provider, model, temperature and context size for ``role`` (None: the defaults)."""
+        if role is not None and role not in cls.LLM_ROLE_SETTINGS:
+            raise ValueError(f"Unknown LLM role: {role}")
+        overrides = cls.LLM_ROLE_SETTINGS.get(role) or {}
+        provider = overrides.get("provider") or cls.LLM_PROVIDER
+        return {
+            "provider": provider,
+            "model": overrides.get("model") or (cls.OPENAI_MODEL if provider.lower() == "openai" else cls.OLLAMA_MODEL),
+            "temperature": float(overrides.get("temperature") or cls.TEMPERATURE),
+            "num_ctx": int(overrides.get("num_ctx") or cls.LLM_NUM_CTX),
+        }
+
+    @classmethod
+    def get_chat_llm(cls, role: Optional[str] = None):
+        """Return a chat-capable LLM instance for ``role`` (see ``LLM_ROLE_SETTINGS``) based on current configuration.
 
         This centralizes LLM creation so agents and tools call a single factory.
-        The instance is cached on the class so it's only created once.
+        Each instance is cached on the class so it's only created once; roles
+        whose settings resolve to the same model share one instance.
         """
-        if cls._LLM_INSTANCE is not None:
-            return cls._LLM_INSTANCE
+        settings = cls.llm_settings(role)
+        key = tuple(sorted(settings.items()))
+        llm = cls._LLM_INSTANCES.get(key)
+        if llm is not None:
+            return llm
+
+        with cls._LLM_LOCK:
+            if key not in cls._LLM_INSTANCES:
+                llm = cls._create_chat_llm(settings, role)
+                if cls.CASSETTE_MODE != "off":
+                    from langchain_agent.utils.cassette import get_cassette
+
+                    llm = llm.model_copy(update={"cache": get_cassette()})
+                cls._LLM_INSTANCES[key] = llm
+        return cls._LLM_INSTANCES[key]
 
-        provider = cls.LLM_PROVIDER.lower()
+    @classmethod
+    def _create_chat_llm(cls, settings: dict, role: Optional[str] = None):
+        provider = settings["provider"].lower()
+        if provider in cls._LLM_PROVIDERS or ":" in provider:
+            factory = cls._LLM_PROVIDERS.get(provider) or load_factory(settings["provider"])
+            return cls._call_factory(factory, settings, role)
+        endpoints = cls.llm_endpoints(provider)
+        if len(endpoints) > 1:
+            from langchain_agent.utils.llm_pool import build_pool
+
+            return build_pool(endpoints, lambda url: cls._create_provider_llm(settings, url))
+        return cls._create_provider_llm(settings, endpoints[0] if endpoints else None)
+
+    @classmethod
+    def llm_endpoints(cls, provider: str) -> list:
+        """Return the ``LLM_ENDPOINTS`` base URLs for ``provider``: they belong to ``LLM_PROVIDER`` only."""
+        return list(cls.LLM_ENDPOINTS) if provider.lower() == cls.LLM_PROVIDER.lower() else []
+
+    @classmethod
+    def _call_factory(cls, factory, settings: dict, role: Optional[str]):
+        import inspect
+
+        if inspect.signature(factory).parameters:
+            return factory(settings)
+        # A zero-argument factory builds the same model whatever the role asks for
+        overridden = [key for key, value in (cls.LLM_ROLE_SETTINGS.get(role) or {}).items() if value and key != "provider"]
+        if overridden:
+            names = ", ".join(f"{role.upper()}_LLM_{key.upper()}" for key in overridden)
+            raise ValueError(f"{settings['provider']} takes no settings, so {names} cannot be applied; make the factory accept the settings dict")
+        return factory()
+
+    @classmethod
+    def _create_provider_llm(cls, settings: dict, base_url: Optional[str] = None):
+        provider = settings["provider"].lower()
         if provider == "ollama":
             try:
                 from langchain_ollama import ChatOllama
 
-                llm = ChatOllama(model=cls.OLLAMA_MODEL, base_url=cls.OLLAMA_BASE_URL, temperature=cls.TEMPERATURE)
-                cls._LLM_INSTANCE = llm
-                return llm
+                return ChatOllama(
+                    model=settings["model"], base_url=base_url or cls.OLLAMA_BASE_URL, temperature=settings["temperature"], num_ctx=settings["num_ctx"] or None
+                )
             except Exception as e:
                 raise RuntimeError(f"Failed to initialize Ollama LLM: {e}")
         elif provider == "openai":
             try:
                 from langchain_openai import ChatOpenAI
 
-                llm = ChatOpenAI(model_name=cls.OPENAI_MODEL, temperature=cls.TEMPERATURE, openai_api_key=cls.OPENAI_API_KEY)
-                cls._LLM_INSTANCE = llm
-                return llm
+                return ChatOpenAI(model_name=settings["model"], temperature=settings["temperature"], openai_api_key=cls.OPENAI_API_KEY, base_url=base_url)
             except Exception as e:
                 raise RuntimeError(f"Failed to initialize OpenAI LLM: {e}")
         else:
-            raise ValueError(f"Unsupported LLM_PROVIDER: {cls.LLM_PROVIDER}")
+            raise ValueError(f"Unsupported LLM_PROVIDER: {settings['provider']}")
+
+    @classmethod
+    def get_embeddings(cls):
+        """Return the embedding model for ``EMBEDDINGS_PROVIDER``, created once and shared."""
+        if cls._EMBEDDINGS_INSTANCE is not None:
+            return cls._EMBEDDINGS_INSTANCE
 
+        with cls._LLM_LOCK:
+            if cls._EMBEDDINGS_INSTANCE is None:
+                cls._EMBEDDINGS_INSTANCE = cls._create_embeddings()
+        return cls._EMBEDDINGS_INSTANCE
+
+    @classmethod
+    def _create_embeddings(cls):
+        provider = cls.EMBEDDINGS_PROVIDER.lower()
+        if ":" in provider:
+            return load_factory(cls.EMBEDDINGS_PROVIDER)()
+        if provider == "ollama":
+            try:
+                from langchain_ollama import OllamaEmbeddings
+
+                return OllamaEmbeddings(model=cls.OLLAMA_EMBEDDING_MODEL, base_url=cls.OLLAMA_BASE_URL)
+            except Exception as e:
+                raise RuntimeError(f"Failed to initialize Ollama embeddings: {e}")
+        elif provider == "openai":
+            try:
+                from langchain_openai import OpenAIEmbeddings
+
+                return OpenAIEmbeddings(model=cls.OPENAI_EMBEDDING_MODEL, openai_api_key=cls.OPENAI_API_KEY)
+            except Exception as e:
+                raise RuntimeError(f"Failed to initialize OpenAI embeddings: {e}")
+        else:
+            raise ValueError(f"Unsupported EMBEDDINGS_PROVIDER: {cls.EMBEDDINGS_PROVIDER}")
@@ -0,0 +1,200 @@
+"""Evidence ingestion: tool outputs become embedded, searchable chunks.
+
+``EvidenceIngestor`` is a LangChain callback handler added to every run's
+config (see :func:`langchain_agent.utils.checkpoint.run_config`). When a tool
+finishes, its output is split into overlapping chunks and queued. A background
+thread embeds queued chunks in batches of ``Config.EVIDENCE_EMBED_BATCH`` and
+appends them to the :class:`~langchain_agent.utils.vector_store.VectorStore`,
+namespaced by the run's ``thread_id``. Near-duplicate chunks are dropped there.
+The ``retrieve_evidence`` tool calls :meth:`EvidenceIngestor.flush` before it
+searches, so a worker can retrieve what it fetched moments earlier.
+
+Embedding or storage failures are logged and never fail the run.
+"""
+import queue
+import threading
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import ensure_config
+
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.logger import setup_logger
+from langchain_agent.utils.response_utils import get_text
+from langchain_agent.utils.vector_store import Hit, VectorStore
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+# Tools whose output is not evidence (retrieval results are already stored; charts return a file path)
+SKIP_TOOLS = {"retrieve_evidence", "generate_chart"}
+
+RETRIEVAL_HINT = (
+    "\n\nOther workers' findings appear in the conversation as short digests. Their full search results, "
+    "fetched pages and analyses are stored as evidence: call retrieve_evidence with a specific question "
+    "to get the most relevant passages instead of repeating a search."
+)
+
+
+def chunk_text(text: str, size: int, overlap: int = 0) -> List[str]:
+    """Split ``text`` into chunks of at most ``size`` characters, overlapping by ``overlap``.
+
+    Chunks end at the last paragraph break, line break or space within the
+    window when there is one, so words are not cut in half.
+    """
+    text = text.strip()
+    if len(text) <= size:
+        return [text] if text else []
+    overlap = min(overlap, size // 2)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            for separator in ("\n\n", "\n", " "):
+                cut = text.rfind(separator, start + overlap + 1, end)
+                if cut > start:
+                    end = cut
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def current_namespace() -> str:
+    """Namespace of the run executing the caller: its checkpoint ``thread_id``, or '' outside a threaded run."""
+    config = ensure_config()
+    return str((config.get("configurable") or {}).get("thread_id") or (config.get("metadata") or {}).get("thread_id") or "")
+
+
+class EvidenceIngestor(BaseCallbackHandler):
+    """Queue tool outputs for batched embedding into a vector store."""
+
+    def __init__(self, store: VectorStore, embeddings, batch_size: int = 32, chunk_chars: int = 1000, chunk_overlap: int = 150):
+        self.store = store
+        self.embeddings = embeddings
+        self.batch_size = max(1, batch_size)
+        self.chunk_chars = chunk_chars
+        self.chunk_overlap = chunk_overlap
+        self.embedded = 0
+        self.failures = 0
+        self._tools: Dict[UUID, Tuple[str, str, str]] = {}
+        self._queue: "queue.Queue[Tuple[str, str, dict]]" = queue.Queue()
+        self._pending = 0
+        self._idle = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+    # -- callbacks ---------------------------------------------------------
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, metadata=None, inputs=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        if name not in SKIP_TOOLS:
+            ref = " ".join(str(v) for v in inputs.values()) if isinstance(inputs, dict) and inputs else str(input_str)
+            self._tools[run_id] = (name, ref, str((metadata or {}).get("thread_id") or ""))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        started = self._tools.pop(run_id, None)
+        if started is None or getattr(output, "status", "success") == "error":
+            return
+        name, ref, namespace = started
+        self.ingest(str(get_text(output)), source=name, ref=ref, namespace=namespace)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._tools.pop(run_id, None)
+
+    # -- ingestion ---------------------------------------------------------
+
+    def ingest(self, text: str, source: str, ref: str = "", namespace: str = "") -> int:
+        """Chunk ``text`` and queue it for embedding; returns the number of chunks queued."""
+        chunks = chunk_text(text, self.chunk_chars, self.chunk_overlap)
+        if not chunks:
+            return 0
+        with self._idle:
+            self._pending += len(chunks)
+        for i, chunk in enumerate(chunks):
+            self._queue.put((namespace, chunk, {"source": source, "ref": ref[:200], "part": i}))
+        self._ensure_worker()
+        return len(chunks)
+
+    def _ensure_worker(self) -> None:
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="evidence-ingest", daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._store(batch)
+            except Exception as e:
+                self.failures += 1
+                logger.warning("Evidence ingestion failed for %d chunks: %s", len(batch), e)
+            finally:
+                with self._idle:
+                    self._pending -= len(batch)
+                    self._idle.notify_all()
+
+    def _store(self, batch: List[Tuple[str, str, dict]]) -> None:
+        vectors = self.embeddings.embed_documents([text for _, text, _ in batch])
+        self.embedded += len(batch)
+        by_namespace: Dict[str, List[int]] = {}
+        for i, (namespace, _, _) in enumerate(batch):
+            by_namespace.setdefault(namespace, []).append(i)
+        for namespace, rows in by_namespace.items():
+            self.store.add([vectors[i] for i in rows], [batch[i][1] for i in rows], [batch[i][2] for i in rows], namespace=namespace)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued chunk is stored (or dropped); False on timeout."""
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout=timeout)
+
+    def search(self, query: str, k: int = 5, namespace: Optional[str] = None) -> List[Hit]:
+        """Embed ``query`` and return the ``k`` most similar stored chunks in ``namespace``."""
+        return self.store.search(self.embeddings.embed_query(query), k=k, namespace=namespace)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.store.stats(), "embedded": self.embedded, "failures": self.failures, "pending": self._pending}
+
+
+_INGESTOR: Optional[EvidenceIngestor] = None
+_INGESTOR_LOCK = threading.Lock()
+
+
+def get_evidence_ingestor() -> Optional[EvidenceIngestor]:
+    """Return the process-wide ingestor, or None when ``Config.EVIDENCE_ENABLED`` is off."""
+    global _INGESTOR
+    if not Config.EVIDENCE_ENABLED:
+        return None
+    if _INGESTOR is None:
+        with _INGESTOR_LOCK:
+            if _INGESTOR is None:
+                embeddings = Config.get_embeddings()
+                model = getattr(embeddings, "model", None) or Config.EMBEDDINGS_PROVIDER
+                store = VectorStore(Config.EVIDENCE_DIR, model=str(model), dedupe_threshold=Config.EVIDENCE_DEDUPE_THRESHOLD)
+                _INGESTOR = EvidenceIngestor(store, embeddings, Config.EVIDENCE_EMBED_BATCH, Config.EVIDENCE_CHUNK_CHARS, Config.EVIDENCE_CHUNK_OVERLAP)
+    return _INGESTOR
+
+
+def evidence_tools() -> list:
+    """``[retrieve_evidence]`` when evidence retrieval is enabled, else an empty list."""
+    if not Config.EVIDENCE_ENABLED:
+        return []
+    from langchain_agent.tools.evidence import retrieve_evidence
+
+    return [retrieve_evidence]
+
+
+def evidence_prompt(system_prompt: str) -> str:
+    """``system_prompt`` with the retrieval hint appended when evidence retrieval is enabled."""
+    return system_prompt + RETRIEVAL_HINT if Config.EVIDENCE_ENABLED else system_prompt
@@ -0,0 +1,47 @@
+"""Render the research graph to PNG only when its structure changes.
+
+``draw_mermaid_png`` calls a remote renderer, which is slow and fails offline.
+The Mermaid source is generated locally, so its hash identifies the graph
+structure: the PNG is re-rendered only when that hash differs from the one
+recorded next to the existing image.
+"""
+import hashlib
+import os
+from typing import Optional
+
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.logger import setup_logger
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+
+def save_graph_image(graph, path: str) -> Optional[str]:
+    """Write ``graph`` as a PNG to ``path`` unless an image of the same structure is already there.
+
+    Returns the image path, or None when rendering failed (e.g. no network); the
+    Mermaid source is then saved next to it as ``.mmd`` instead.
+    """
+    mermaid = graph.get_graph().draw_mermaid()
+    digest = hashlib.sha256(mermaid.encode("utf-8")).hexdigest()[:16]
+    stamp_path = f"{path}.sha256"
+    if os.path.exists(path) and os.path.exists(stamp_path):
+        with open(stamp_path, encoding="utf-8") as f:
+            if f.read().strip() == digest:
+                logger.info("Graph unchanged; keeping existing image %s", path)
+                return path
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    try:
+        png_bytes = graph.get_graph().draw_mermaid_png()
+    except Exception as e:
+        mmd_path = f"{os.path.splitext(path)[0]}.mmd"
+        with open(mmd_path, "w", encoding="utf-8") as f:
+            f.write(mermaid)
+        logger.warning("Could not render graph image (%s); Mermaid source saved to %s", e, mmd_path)
+        return None
+
+    with open(path, "wb") as f:
+        f.write(png_bytes)
+    with open(stamp_path, "w", encoding="utf-8") as f:
+        f.write(digest)
+    return path
@@ -0,0 +1,360 @@
+"""Latency, token and cache instrumentation for research runs.
+
+``RunTracer`` is a LangChain callback handler. Pass it in the graph config
+(``run_config(run_id, callbacks=[tracer])``) and it records a span for every
+graph node (subgraph nodes are named ``worker/node``), tool call and model
+call, with wall time, prompt/completion tokens and whether the model response
+came from the LLM cache. Tools report time spent waiting for a concurrency slot
+and search/page cache hits through :func:`record_queue_wait` and
+:func:`record_cache_hit`. Those go to the tracer activated for the current
+context, and are attributed to the tool of the same name. Search rate-limit
+waits, retries and coalesced requests (:func:`record_rate_limit_wait`,
+:func:`record_retry`, :func:`record_coalesced`) are reported the same way,
+and reach the process-wide counters even when no tracer is active.
+
+Finished spans are appended to a JSON-lines trace file. ``format_summary``
+aggregates them into a table, and every span also updates process-wide
+counters that :func:`prometheus_text` renders in the Prometheus text format
+(served by :func:`start_metrics_server`).
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from langchain_agent.utils.logger import setup_logger
+from langchain_agent.utils.config import Config
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+_CURRENT_TRACER: ContextVar[Optional["RunTracer"]] = ContextVar("current_tracer", default=None)
+
+
+def _new_totals() -> Dict[str, float]:
+    return {"count": 0, "errors": 0, "wall_s": 0.0, "max_s": 0.0, "queue_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0, "cache_hits": 0,
+            "rate_limit_s": 0.0, "retries": 0, "coalesced": 0}
+
+
+class _Metrics:
+    """Cumulative totals per (kind, name)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals: Dict[tuple, Dict[str, float]] = defaultdict(_new_totals)
+
+    def add(self, kind: str, name: str, **values: float) -> None:
+        with self._lock:
+            totals = self.totals[(kind, name)]
+            for key, value in values.items():
+                totals[key] = max(totals[key], value) if key == "max_s" else totals[key] + value
+
+    def snapshot(self) -> Dict[tuple, Dict[str, float]]:
+        with self._lock:
+            return {key: dict(values) for key, values in self.totals.items()}
+
+
+# Process-wide totals across every tracer, exported by prometheus_text
+METRICS = _Metrics()
+
+
+def _node_name(metadata: dict) -> str:
+    node = metadata.get("langgraph_node", "")
+    # checkpoint_ns is the namespace of the graph running the node, e.g. "market:<task id>" for an agent's node
+    parents = [part.split(":", 1)[0] for part in (metadata.get("checkpoint_ns") or "").split("|") if part]
+    if parents[-1:] == [node]:
+        parents = parents[:-1]
+    return "/".join(parents + [node])
+
+
+def _token_usage(response: Any) -> tuple:
+    prompt = completion = 0
+    cache_hit = False
+    for generations in getattr(response, "generations", []) or []:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None) or {}
+            prompt += usage.get("input_tokens", 0) or 0
+            completion += usage.get("output_tokens", 0) or 0
+            cache_hit = cache_hit or bool((getattr(message, "response_metadata", None) or {}).get("llm_cache"))
+    if not prompt and not completion:
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        prompt = usage.get("prompt_tokens", 0) or 0
+        completion = usage.get("completion_tokens", 0) or 0
+    return prompt, completion, cache_hit
+
+
+class RunTracer(BaseCallbackHandler):
+    """Record node, tool and model spans of one run to a JSON-lines trace."""
+
+    def __init__(self, run_id: str, trace_path: Optional[str] = None):
+        self.run_id = run_id
+        self.trace_path = trace_path
+        self.started = time.time()
+        self.metrics = _Metrics()
+        self._open: Dict[UUID, dict] = {}
+        self._labels: Dict[UUID, tuple] = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if trace_path:
+            os.makedirs(os.path.dirname(trace_path) or ".", exist_ok=True)
+            self._file = open(trace_path, "a", encoding="utf-8")
+
+    # -- context ---------------------------------------------------------------
+
+    @contextmanager
+    def activate(self):
+        """Make this tracer receive queue-wait and cache-hit events from the current context."""
+        token = _CURRENT_TRACER.set(self)
+        try:
+            yield self
+        finally:
+            _CURRENT_TRACER.reset(token)
+
+    # -- recording -------------------------------------------------------------
+
+    def _write(self, record: dict) -> None:
+        if self._file is not None:
+            with self._lock:
+                self._file.write(json.dumps(record, default=str) + "\n")
+                self._file.flush()
+
+    def _add(self, kind: str, name: str, **values: float) -> None:
+        self.metrics.add(kind, name, **values)
+        METRICS.add(kind, name, **values)
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], kind: str, name: str) -> None:
+        with self._lock:
+            self._labels[run_id] = (kind, name)
+            self._open[run_id] = {"kind": kind, "name": name, "start": time.time(), "t0": time.perf_counter(), "parent": self._labels.get(parent_run_id)}
+
+    def _finish(self, run_id: UUID, error: Optional[BaseException] = None, **extra: Any) -> None:
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            self._labels.pop(run_id, None)
+        if span is None:
+            return
+        wall = time.perf_counter() - span["t0"]
+        record = {
+            "run_id": self.run_id,
+            "kind": span["kind"],
+            "name": span["name"],
+            "parent": "/".join(span["parent"]) if span["parent"] else None,
+            "start": round(span["start"], 6),
+            "wall_s": round(wall, 6),
+            **extra,
+        }
+        if error is not None:
+            record["error"] = f"{type(error).__name__}: {error}"
+        self._write(record)
+        self._add(
+            span["kind"], span["name"],
+            count=1, errors=int(error is not None), wall_s=wall, max_s=wall,
+            prompt_tokens=extra.get("prompt_tokens", 0), completion_tokens=extra.get("completion_tokens", 0),
+            cache_hits=int(bool(extra.get("cache_hit"))),
+        )
+
+    def record_queue_wait(self, name: str, seconds: float) -> None:
+        self._write({"run_id": self.run_id, "kind": "queue", "name": name, "start": round(time.time() - seconds, 6), "wait_s": round(seconds, 6)})
+        self._add("tool", name, queue_s=seconds)
+
+    def record_cache_hit(self, name: str) -> None:
+        self._write({"run_id": self.run_id, "kind": "cache_hit", "name": name, "start": round(time.time(), 6)})
+        self._add("tool", name, cache_hits=1)
+
+    def record_rate_limit_wait(self, name: str, seconds: float) -> None:
+        self._write({"run_id": self.run_id, "kind": "rate_limit", "name": name, "start": round(time.time() - seconds, 6), "wait_s": round(seconds, 6)})
+        self._add("tool", name, rate_limit_s=seconds)
+
+    def record_retry(self, name: str, delay: float, error: BaseException) -> None:
+        self._write({"run_id": self.run_id, "kind": "retry", "name": name, "start": round(time.time(), 6), "delay_s": round(delay, 6), "error": f"{type(error).__name__}: {error}"})
+        self._add("tool", name, retries=1)
+
+    def record_coalesced(self, name: str) -> None:
+        self._write({"run_id": self.run_id, "kind": "coalesced", "name": name, "start": round(time.time(), 6)})
+        self._add("tool", name, coalesced=1)
+
+    # -- callbacks -------------------------------------------------------------
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        node = metadata.get("langgraph_node")
+        # A graph node's own run carries its name and a "graph:step:N" tag; inner runnables do not
+        if node and kwargs.get("name") == node and any(t.startswith("graph:step:") for t in tags or []):
+            self._start(run_id, parent_run_id, "node", _node_name(metadata))
+        elif parent_run_id in self._labels:
+            # Keep the enclosing label so model calls inside tools/nodes are attributed to them
+            with self._lock:
+                self._labels[run_id] = self._labels[parent_run_id]
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        if run_id in self._open:
+            self._finish(run_id)
+        else:
+            self._labels.pop(run_id, None)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        if run_id in self._open:
+            self._finish(run_id, error)
+        else:
+            self._labels.pop(run_id, None)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._start(run_id, parent_run_id, "tool", kwargs.get("name") or (serialized or {}).get("name") or "tool")
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    def _model_name(self, serialized: dict, parent_run_id: Optional[UUID], metadata: Optional[dict]) -> str:
+        parent = self._labels.get(parent_run_id)
+        model = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name") or "model"
+        return f"{parent[1]}:{model}" if parent else model
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._start(run_id, parent_run_id, "llm", self._model_name(serialized, parent_run_id, metadata))
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._start(run_id, parent_run_id, "llm", self._model_name(serialized, parent_run_id, metadata))
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        prompt, completion, cache_hit = _token_usage(response)
+        self._finish(run_id, prompt_tokens=prompt, completion_tokens=completion, cache_hit=cache_hit)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, error)
+
+    # -- reporting -------------------------------------------------------------
+
+    def summary(self) -> List[dict]:
+        """Return per-(kind, name) totals sorted by total wall time, slowest first."""
+        rows = [{"kind": kind, "name": name, **values} for (kind, name), values in self.metrics.snapshot().items()]
+        return sorted(rows, key=lambda r: (-r["wall_s"], r["kind"], r["name"]))
+
+    def format_summary(self) -> str:
+        """Render :meth:`summary` as a plain-text table."""
+        rows = self.summary()
+        width = max([len("name")] + [min(len(r["name"]), 48) for r in rows])
+        header = f"{'kind':<5}  {'name':<{width}}  {'calls':>5}  {'total s':>8}  {'mean s':>7}  {'max s':>7}  {'queue s':>7}  {'prompt tok':>10}  {'compl tok':>9}  {'cache':>5}  {'rate s':>6}  {'retry':>5}  {'coal':>4}  {'err':>3}"
+        lines = [f"Run {self.run_id}: {time.time() - self.started:.1f}s wall", header, "-" * len(header)]
+        for r in rows:
+            mean = r["wall_s"] / r["count"] if r["count"] else 0.0
+            lines.append(
+                f"{r['kind']:<5}  {r['name'][:48]:<{width}}  {int(r['count']):>5}  {r['wall_s']:>8.2f}  {mean:>7.2f}  {r['max_s']:>7.2f}"
+                f"  {r['queue_s']:>7.2f}  {int(r['prompt_tokens']):>10}  {int(r['completion_tokens']):>9}  {int(r['cache_hits']):>5}"
+                f"  {r['rate_limit_s']:>6.2f}  {int(r['retries']):>5}  {int(r['coalesced']):>4}  {int(r['errors']):>3}"
+            )
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+                self._file = None
+
+
+def current_tracer() -> Optional[RunTracer]:
+    return _CURRENT_TRACER.get()
+
+
+def record_queue_wait(name: str, seconds: float) -> None:
+    """Report time a tool call spent waiting for a concurrency slot to the active tracer, if any."""
+    tracer = _CURRENT_TRACER.get()
+    if tracer is not None:
+        tracer.record_queue_wait(name, seconds)
+
+
+def record_cache_hit(name: str) -> None:
+    """Report that a tool call was served from a local cache to the active tracer, if any."""
+    tracer = _CURRENT_TRACER.get()
+    if tracer is not None:
+        tracer.record_cache_hit(name)
+
+
+def record_rate_limit_wait(name: str, seconds: float) -> None:
+    """Report time a search call waited for the shared rate limiter."""
+    tracer = _CURRENT_TRACER.get()
+    if tracer is not None:
+        tracer.record_rate_limit_wait(name, seconds)
+    else:
+        METRICS.add("tool", name, rate_limit_s=seconds)
+
+
+def record_retry(name: str, delay: float, error: BaseException) -> None:
+    """Report that a call is being retried after ``delay`` seconds because of ``error``."""
+    tracer = _CURRENT_TRACER.get()
+    if tracer is not None:
+        tracer.record_retry(name, delay, error)
+    else:
+        METRICS.add("tool", name, retries=1)
+
+
+def record_coalesced(name: str) -> None:
+    """Report that a call reused an identical in-flight request instead of making its own."""
+    tracer = _CURRENT_TRACER.get()
+    if tracer is not None:
+        tracer.record_coalesced(name)
+    else:
+        METRICS.add("tool", name, coalesced=1)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def prometheus_text(metrics: _Metrics = METRICS) -> str:
+    """Render cumulative span totals in the Prometheus text exposition format."""
+    series = [
+        ("saas_research_calls_total", "counter", "Completed node, tool and model calls", "count"),
+        ("saas_research_errors_total", "counter", "Failed node, tool and model calls", "errors"),
+        ("saas_research_seconds_total", "counter", "Wall time spent in calls", "wall_s"),
+        ("saas_research_queue_seconds_total", "counter", "Time tool calls waited for a concurrency slot", "queue_s"),
+        ("saas_research_prompt_tokens_total", "counter", "Prompt tokens sent to models", "prompt_tokens"),
+        ("saas_research_completion_tokens_total", "counter", "Completion tokens received from models", "completion_tokens"),
+        ("saas_research_cache_hits_total", "counter", "Calls served from the LLM, search or page cache", "cache_hits"),
+        ("saas_research_rate_limit_seconds_total", "counter", "Time search calls waited for the shared rate limiter", "rate_limit_s"),
+        ("saas_research_retries_total", "counter", "Calls retried after throttling or timeouts", "retries"),
+        ("saas_research_coalesced_total", "counter", "Calls that shared an identical in-flight request", "coalesced"),
+        ("saas_research_max_seconds", "gauge", "Slowest single call", "max_s"),
+    ]
+    snapshot = metrics.snapshot()
+    lines = []
+    for metric, metric_type, help_text, key in series:
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for (kind, name), values in sorted(snapshot.items()):
+            lines.append(f'{metric}{{kind="{_label(kind)}",name="{_label(name)}"}} {values[key]:g}')
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` in the Prometheus text format from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    logger.info("Serving Prometheus metrics on http://%s:%d/metrics", host, server.server_address[1])
+    return server
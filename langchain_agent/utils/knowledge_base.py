@@ -0,0 +1,323 @@
+"""Persistent knowledge base of earlier research runs.
+
+Every finished run is stored in a SQLite database (``Config.KNOWLEDGE_PATH``):
+the final report, each worker's output with its structured findings, the
+competitors it named, and the search results it relied on, each with the time
+it was fetched. Runs are indexed by niche (the user's request reduced to its
+significant words, see :func:`niche_key`) and competitors by name.
+
+A new run on a known niche starts from :func:`initial_state`. It seeds the
+conversation with the stored output of every worker whose sources are all
+younger than ``Config.KNOWLEDGE_FRESHNESS_SECONDS`` and marks those workers as
+visited, so only workers with stale sources run again. Search tools also answer
+from stored results younger than the threshold (:meth:`KnowledgeBase.fresh_source`),
+so a worker that does run again only re-queries stale sources. With
+``Config.KNOWLEDGE_SEED`` off (``--refresh``) runs are stored but nothing stored
+is reused.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from langchain_agent.utils.compaction import is_worker_output
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.logger import setup_logger
+from langchain_agent.utils.response_utils import get_text, parse_trailing_json, split_trailing_json
+from langchain_agent.utils.search_cache import normalize_query
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+# Words that do not tell niches apart ("I want to build a SaaS product for ...")
+_STOPWORDS = {
+    "a", "an", "and", "app", "apps", "at", "build", "building", "business", "for", "i", "idea", "ideas", "in", "into",
+    "is", "market", "me", "my", "niche", "of", "on", "product", "products", "research", "saas", "software", "the",
+    "to", "tool", "tools", "want", "we", "with",
+}
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, niche_key TEXT NOT NULL, niche TEXT NOT NULL,"
+    " report TEXT NOT NULL, created_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS idx_runs_niche ON runs(niche_key)",
+    "CREATE TABLE IF NOT EXISTS findings (run_id TEXT NOT NULL, niche_key TEXT NOT NULL, worker TEXT NOT NULL,"
+    " output TEXT NOT NULL, summary TEXT, findings TEXT, confidence TEXT, fetched_at REAL NOT NULL, created_at REAL NOT NULL,"
+    " PRIMARY KEY (run_id, worker))",
+    "CREATE INDEX IF NOT EXISTS idx_findings_niche ON findings(niche_key, worker, created_at)",
+    "CREATE TABLE IF NOT EXISTS sources (key TEXT PRIMARY KEY, tool TEXT NOT NULL, query TEXT NOT NULL,"
+    " content TEXT NOT NULL, fetched_at REAL NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS run_sources (run_id TEXT NOT NULL, worker TEXT NOT NULL, source_key TEXT NOT NULL,"
+    " PRIMARY KEY (run_id, worker, source_key))",
+    "CREATE TABLE IF NOT EXISTS competitors (name_key TEXT NOT NULL, name TEXT NOT NULL, niche_key TEXT NOT NULL,"
+    " run_id TEXT NOT NULL, worker TEXT NOT NULL, seen_at REAL NOT NULL, PRIMARY KEY (name_key, run_id, worker))",
+    "CREATE INDEX IF NOT EXISTS idx_competitors_niche ON competitors(niche_key)",
+)
+
+
+def niche_key(text: str) -> str:
+    """Reduce a research request to its sorted significant words, so rephrasings share a key."""
+    words = {w for w in re.findall(r"[a-z0-9]+", (text or "").lower()) if w not in _STOPWORDS and len(w) > 1}
+    return " ".join(sorted(words))
+
+
+def _similarity(a: str, b: str) -> float:
+    left, right = set(a.split()), set(b.split())
+    return len(left & right) / len(left | right) if left and right else 0.0
+
+
+def _source_key(tool: str, query: str) -> str:
+    return hashlib.sha256(f"{tool}\x00{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+
+def _current_run() -> Tuple[str, str]:
+    """``(thread_id, worker)`` of the graph run executing the caller ('' outside a run or a worker)."""
+    from langchain_core.runnables import ensure_config
+
+    config = ensure_config()
+    metadata = config.get("metadata") or {}
+    thread_id = (config.get("configurable") or {}).get("thread_id") or metadata.get("thread_id") or ""
+    # A worker's tools run in its agent subgraph, whose checkpoint namespace starts with "<worker>:<task id>"
+    namespace = metadata.get("checkpoint_ns") or ""
+    return str(thread_id), namespace.split("|", 1)[0].split(":", 1)[0]
+
+
+class KnowledgeBase:
+    """SQLite store of earlier runs: reports, worker findings, competitors and timestamped sources."""
+
+    def __init__(self, path: str, freshness_seconds: float = 7 * 24 * 3600, match_threshold: float = 0.6):
+        self.path = path
+        self.freshness_seconds = freshness_seconds
+        self.match_threshold = match_threshold
+        self.source_hits = 0
+        self._lock = threading.Lock()
+        # thread_id -> worker -> keys of the sources it used in the current run
+        self._used: Dict[str, Dict[str, Set[str]]] = defaultdict(lambda: defaultdict(set))
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -- sources -----------------------------------------------------------
+
+    def _note_use(self, key: str) -> None:
+        thread_id, worker = _current_run()
+        if thread_id:
+            with self._lock:
+                self._used[thread_id][worker].add(key)
+
+    def forget_run(self, run_id: str) -> None:
+        """Drop the sources noted for ``run_id``; for runs that end without reaching :meth:`record_run`."""
+        with self._lock:
+            self._used.pop(run_id, None)
+
+    def fresh_source(self, tool: str, query: str) -> Optional[str]:
+        """Return the stored result of ``tool``/``query`` if it was fetched within the freshness threshold."""
+        key = _source_key(tool, query)
+        with self._lock:
+            row = self._conn.execute("SELECT content, fetched_at FROM sources WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.freshness_seconds:
+            return None
+        self.source_hits += 1
+        self._note_use(key)
+        return row[0]
+
+    def record_source(self, tool: str, query: str, content: str, fetched_at: Optional[float] = None) -> None:
+        """Store a freshly fetched result and attribute it to the calling run's worker."""
+        key = _source_key(tool, query)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (key, tool, query, content, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (key, tool, normalize_query(query), content, fetched_at or time.time()),
+            )
+        self._note_use(key)
+
+    # -- runs --------------------------------------------------------------
+
+    def match_niche(self, prompt: str) -> Optional[str]:
+        """Return the stored niche key that best matches ``prompt`` (at least ``match_threshold`` word overlap)."""
+        key = niche_key(prompt)
+        if not key:
+            return None
+        with self._lock:
+            keys = [row[0] for row in self._conn.execute("SELECT DISTINCT niche_key FROM runs")]
+        if key in keys:
+            return key
+        best = max(keys, key=lambda k: _similarity(key, k), default=None)
+        return best if best is not None and _similarity(key, best) >= self.match_threshold else None
+
+    def fresh_findings(self, prompt: str) -> List[dict]:
+        """Latest stored output per worker for the niche of ``prompt`` whose sources are all still fresh."""
+        key = self.match_niche(prompt)
+        if key is None:
+            return []
+        cutoff = time.time() - self.freshness_seconds
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT worker, output, fetched_at, run_id, created_at FROM findings f WHERE niche_key = ? AND created_at = "
+                "(SELECT MAX(created_at) FROM findings g WHERE g.niche_key = f.niche_key AND g.worker = f.worker) ORDER BY created_at, worker",
+                (key,),
+            ).fetchall()
+        return [
+            {"worker": worker, "output": output, "fetched_at": fetched_at, "run_id": run_id, "created_at": created_at}
+            for worker, output, fetched_at, run_id, created_at in rows
+            if fetched_at >= cutoff
+        ]
+
+    def record_run(self, run_id: str, messages: Sequence, report: str) -> None:
+        """Store a finished run: its report, the latest output of each worker, their competitors and sources."""
+        prompt = next((str(get_text(m)) for m in messages if getattr(m, "name", None) is None and getattr(m, "type", "") == "human"), "")
+        key = niche_key(prompt)
+        if not key:
+            return
+        latest = {}
+        for message in messages:
+            if is_worker_output(message):
+                latest[message.name] = message
+        now = time.time()
+        with self._lock:
+            used = self._used.pop(run_id, {})
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)", (run_id, key, prompt, report, now))
+                for worker, message in latest.items():
+                    self._record_worker(run_id, key, worker, message, used.get(worker, set()), now)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _record_worker(self, run_id: str, key: str, worker: str, message, source_keys: Set[str], now: float) -> None:
+        seeded = (getattr(message, "additional_kwargs", None) or {}).get("knowledge")
+        if seeded:
+            # Carried over unchanged from an earlier run: keep its original source age
+            fetched_at = seeded["fetched_at"]
+        else:
+            for source_key in source_keys:
+                self._conn.execute("INSERT OR IGNORE INTO run_sources VALUES (?, ?, ?)", (run_id, worker, source_key))
+            marks = ",".join("?" * len(source_keys))
+            oldest = self._conn.execute(f"SELECT MIN(fetched_at) FROM sources WHERE key IN ({marks})", tuple(source_keys)).fetchone()[0] if source_keys else None
+            fetched_at = oldest or now
+        output = str(get_text(message))
+        parsed = parse_trailing_json(output) or {}
+        findings = parsed.get("findings") if isinstance(parsed.get("findings"), list) else []
+        self._conn.execute(
+            "INSERT OR REPLACE INTO findings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (run_id, key, worker, output, parsed.get("summary"), json.dumps(findings), parsed.get("confidence"), fetched_at, now),
+        )
+        competitors = parsed.get("competitors") if isinstance(parsed.get("competitors"), list) else []
+        for name in competitors:
+            if isinstance(name, str) and name.strip():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO competitors VALUES (?, ?, ?, ?, ?, ?)",
+                    (normalize_query(name), name.strip(), key, run_id, worker, now),
+                )
+
+    # -- lookups -----------------------------------------------------------
+
+    def niches(self) -> List[dict]:
+        """Every stored niche with its number of runs and the time of the latest one."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT niche_key, COUNT(*), MAX(created_at), (SELECT niche FROM runs r WHERE r.niche_key = runs.niche_key"
+                " ORDER BY created_at DESC LIMIT 1) FROM runs GROUP BY niche_key ORDER BY MAX(created_at) DESC"
+            ).fetchall()
+        return [{"niche_key": key, "runs": count, "last_run": last, "niche": niche} for key, count, last, niche in rows]
+
+    def competitor(self, name: str) -> List[dict]:
+        """Niches and runs in which a competitor was named, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.name, c.niche_key, c.run_id, c.worker, c.seen_at, f.summary FROM competitors c"
+                " LEFT JOIN findings f ON f.run_id = c.run_id AND f.worker = c.worker WHERE c.name_key = ? ORDER BY c.seen_at DESC",
+                (normalize_query(name),),
+            ).fetchall()
+        return [dict(zip(("name", "niche_key", "run_id", "worker", "seen_at", "summary"), row)) for row in rows]
+
+    def report(self, prompt: str) -> Optional[str]:
+        """The latest stored report for the niche of ``prompt``."""
+        key = self.match_niche(prompt)
+        if key is None:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT report FROM runs WHERE niche_key = ? ORDER BY created_at DESC LIMIT 1", (key,)).fetchone()
+        return row[0] if row else None
+
+
+_KNOWLEDGE_BASE: Optional[KnowledgeBase] = None
+_KNOWLEDGE_LOCK = threading.Lock()
+
+
+def get_knowledge_base() -> Optional[KnowledgeBase]:
+    """Return the process-wide knowledge base, or None when ``Config.KNOWLEDGE_ENABLED`` is off."""
+    global _KNOWLEDGE_BASE
+    if not Config.KNOWLEDGE_ENABLED:
+        return None
+    if _KNOWLEDGE_BASE is None:
+        with _KNOWLEDGE_LOCK:
+            if _KNOWLEDGE_BASE is None:
+                _KNOWLEDGE_BASE = KnowledgeBase(Config.KNOWLEDGE_PATH, Config.KNOWLEDGE_FRESHNESS_SECONDS, Config.KNOWLEDGE_MATCH_THRESHOLD)
+    return _KNOWLEDGE_BASE
+
+
+def _seed_message(finding: dict):
+    from langchain_core.messages import HumanMessage
+
+    output = finding["output"]
+    body, trailer = split_trailing_json(output)
+    if trailer is not None:
+        # This work is already done: suggest finishing rather than a new round of the same workers
+        output = f"{body}\n{json.dumps({**trailer, 'next': 'FINISH'})}"
+    stamp = time.strftime("%Y-%m-%d", time.localtime(finding["fetched_at"]))
+    return HumanMessage(
+        content=f"(Stored findings from an earlier run; sources fetched {stamp})\n{output}",
+        name=finding["worker"],
+        additional_kwargs={"knowledge": {"run_id": finding["run_id"], "fetched_at": finding["fetched_at"]}},
+    )
+
+
+def initial_state(prompt: str) -> dict:
+    """Graph input for a new run on ``prompt``, seeded with fresh stored findings when the niche is known."""
+    from langchain_core.messages import HumanMessage
+
+    state = {"messages": [HumanMessage(content=prompt)]}
+    kb = get_knowledge_base()
+    if kb is None or not Config.KNOWLEDGE_SEED:
+        return state
+    findings = kb.fresh_findings(prompt)
+    if findings:
+        logger.info("Known niche: reusing stored findings of %s", ", ".join(f["worker"] for f in findings))
+        state["messages"] += [_seed_message(f) for f in findings]
+        state["visited"] = [f["worker"] for f in findings]
+    return state
+
+
+def remember_run(messages: Sequence, report: str) -> None:
+    """Store the run that produced ``report`` in the knowledge base; failures are logged, not raised."""
+    kb = get_knowledge_base()
+    if kb is None:
+        return
+    try:
+        kb.record_run(_current_run()[0] or uuid.uuid4().hex[:12], messages, report)
+    except Exception as e:
+        logger.warning("Could not store run in the knowledge base: %s", e)
+
+
+def forget_run(run_id: str) -> None:
+    """Release what the knowledge base tracked for ``run_id``; call when a run ends, finished or not."""
+    kb = get_knowledge_base()
+    if kb is not None:
+        kb.forget_run(run_id)
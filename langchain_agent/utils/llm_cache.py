@@ -0,0 +1,193 @@
+"""Content-addressed response cache for chat model calls.
+
+Plugs into LangChain's ``BaseCache`` interface, so the key already covers the
+serialized messages and the model's ``llm_string`` (provider type, model name,
+temperature and any bound kwargs such as tools or a structured-output format).
+Entries live in a bounded in-memory LRU tier in front of an SQLite tier that is
+kept under ``max_bytes`` by evicting the least recently used rows.
+
+Caching is opt-in per call site: wrap the shared model with
+``cached_llm(llm, scope)`` and list the scope in ``Config.LLM_CACHE_SCOPES``.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, Generation
+
+from langchain_agent.utils.config import Config
+
+# Only model outputs are ever stored, so restrict deserialization to those classes
+_CACHED_TYPES = [Generation, ChatGeneration, ChatGenerationChunk, AIMessage, AIMessageChunk]
+
+
+def dump_generations(generations: RETURN_VAL_TYPE) -> str:
+    """Serialize model outputs for storage (the inverse of :func:`load_generations`)."""
+    return dumps(list(generations))
+
+
+def load_generations(serialized: str) -> RETURN_VAL_TYPE:
+    """Deserialize stored model outputs, refusing any class other than generations and AI messages."""
+    return loads(serialized, allowed_objects=_CACHED_TYPES)
+
+
+def mark_cache_hit(generations: RETURN_VAL_TYPE, tier: str) -> RETURN_VAL_TYPE:
+    """Return copies of cached generations whose messages record the cache tier in ``response_metadata``."""
+    marked = []
+    for generation in generations:
+        message = getattr(generation, "message", None)
+        if message is not None:
+            metadata = {**message.response_metadata, "llm_cache": tier}
+            generation = generation.model_copy(update={"message": message.model_copy(update={"response_metadata": metadata})})
+        marked.append(generation)
+    return marked
+
+
+class TieredLLMCache(BaseCache):
+    """Two-tier (memory + SQLite) LLM response cache with size-based eviction."""
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, memory_entries: int = 256):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, RETURN_VAL_TYPE]" = OrderedDict()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_access ON llm_cache(last_access)")
+
+    @staticmethod
+    def make_key(prompt: str, llm_string: str) -> str:
+        """Hash the model configuration and serialized messages into a cache key."""
+        return hashlib.sha256(f"{llm_string}\x00{prompt}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, value: RETURN_VAL_TYPE) -> None:
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        key = self.make_key(prompt, llm_string)
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return mark_cache_hit(value, "memory")
+
+            row = self._conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+            value = load_generations(row[0])
+            self._remember(key, value)
+            self.disk_hits += 1
+            return mark_cache_hit(value, "disk")
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        key = self.make_key(prompt, llm_string)
+        serialized = dump_generations(return_val)
+        with self._lock:
+            self._remember(key, list(return_val))
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (key, serialized, len(serialized), time.time()),
+                )
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        if self.max_bytes <= 0:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY last_access ASC").fetchall():
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._memory.pop(key, None)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._memory.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return per-tier hit counters, misses and the on-disk footprint."""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_LLM_CACHE: Optional[TieredLLMCache] = None
+_LLM_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> Optional[TieredLLMCache]:
+    """Return the process-wide LLM cache, or None when it is disabled in Config."""
+    global _LLM_CACHE
+    if not Config.LLM_CACHE_ENABLED:
+        return None
+    if _LLM_CACHE is None:
+        with _LLM_CACHE_LOCK:
+            if _LLM_CACHE is None:
+                _LLM_CACHE = TieredLLMCache(
+                    Config.LLM_CACHE_PATH,
+                    max_bytes=Config.LLM_CACHE_MAX_BYTES,
+                    memory_entries=Config.LLM_CACHE_MEMORY_ENTRIES,
+                )
+    return _LLM_CACHE
+
+
+def cached_llm(llm: BaseChatModel, scope: str) -> BaseChatModel:
+    """Return ``llm`` with the response cache attached when ``scope`` is opted in.
+
+    Scopes are call-site names such as ``router`` or a tool name; see
+    ``Config.LLM_CACHE_SCOPES``. Opted-out scopes get ``llm`` back unchanged, as
+    does every scope while a record/replay cassette is attached to the model.
+    """
+    if Config.CASSETTE_MODE != "off":
+        return llm
+    cache = get_llm_cache()
+    if cache is None or scope not in Config.LLM_CACHE_SCOPES:
+        return llm
+    return llm.model_copy(update={"cache": cache})
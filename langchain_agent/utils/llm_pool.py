@@ -0,0 +1,431 @@
+"""Chat model pool that spreads calls over several model servers.
+
+:class:`PooledChatModel` is a ``BaseChatModel`` wrapping one chat model per
+endpoint (e.g. several Ollama boxes serving the same model). Each call goes to
+the healthy endpoint with the fewest requests in flight that is below its
+concurrency cap. A failed call is retried on a different endpoint. An endpoint
+that fails ``eject_after`` times in a row is ejected for ``eject_seconds``.
+After that it is probed (``GET <url><health_path>``) before it takes traffic
+again.
+
+Latency-critical call sites (see ``Config.LLM_HEDGE_SCOPES``) can hedge: if
+the first endpoint has not answered after ``hedge_after`` seconds, the same
+request is sent to a second endpoint and the first answer wins.
+
+Tool binding and structured output are delegated to the endpoint model class,
+so provider-specific formats (Ollama ``format``, OpenAI ``response_format``)
+are unchanged. Only the call itself is routed through the pool. Streamed calls
+stream from the acquired endpoint's model; they fail over only until the first
+token has been sent, and are never hedged.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage
+from langchain_core.outputs import ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableBinding, RunnableSequence
+from pydantic import ConfigDict
+
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.logger import setup_logger
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+
+class NoHealthyEndpoint(RuntimeError):
+    """Raised when every endpoint is ejected or has already failed this call."""
+
+
+@dataclass
+class Endpoint:
+    """One model server and its load/health bookkeeping (guarded by the pool lock)."""
+
+    url: str
+    model: BaseChatModel
+    max_concurrency: int
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until > 0.0
+
+
+class LLMPool:
+    """Endpoint selection, concurrency caps and health tracking shared by every copy of a pooled model."""
+
+    def __init__(
+        self,
+        endpoints: Sequence[Endpoint],
+        eject_after: int = 2,
+        eject_seconds: float = 30.0,
+        health_path: str = "/api/tags",
+        health_interval: float = 15.0,
+        probe: Optional[Callable[[str], bool]] = None,
+    ):
+        if not endpoints:
+            raise ValueError("LLMPool needs at least one endpoint")
+        self.endpoints: List[Endpoint] = list(endpoints)
+        self.eject_after = max(1, eject_after)
+        self.eject_seconds = eject_seconds
+        self.health_path = health_path
+        self.health_interval = health_interval
+        self.probe = probe or self._http_probe
+        self.hedges = 0
+
+        self._cond = threading.Condition()
+        self._health_thread: Optional[threading.Thread] = None
+
+    def _http_probe(self, url: str) -> bool:
+        import requests
+
+        try:
+            return requests.get(url.rstrip("/") + self.health_path, timeout=2).ok
+        except requests.RequestException:
+            return False
+
+    def _candidates(self, exclude: set) -> List[Endpoint]:
+        now = time.monotonic()
+        # An ejected endpoint whose cooldown has passed takes traffic again when no prober is running
+        passive = self.health_interval <= 0
+        return [
+            e for e in self.endpoints
+            if e.url not in exclude and (not e.ejected or (passive and e.ejected_until <= now))
+        ]
+
+    def _pick(self, exclude: set) -> Optional[Endpoint]:
+        """Return the least-loaded eligible endpoint with a free slot (claiming it), or None."""
+        candidates = self._candidates(exclude)
+        if not candidates:
+            raise NoHealthyEndpoint(f"No healthy LLM endpoint left (tried {sorted(exclude) or 'none'})")
+        free = [e for e in candidates if e.outstanding < e.max_concurrency]
+        if not free:
+            return None
+        endpoint = min(free, key=lambda e: (e.outstanding / e.max_concurrency, e.requests))
+        endpoint.outstanding += 1
+        endpoint.requests += 1
+        return endpoint
+
+    def acquire(self, exclude: set = frozenset(), timeout: Optional[float] = None) -> Optional[Endpoint]:
+        """Claim a slot on the best endpoint, waiting for one to free up; None on timeout."""
+        self._ensure_health_thread()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                endpoint = self._pick(exclude)
+                if endpoint is not None:
+                    return endpoint
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def try_acquire(self, exclude: set = frozenset()) -> Optional[Endpoint]:
+        """Claim a free slot on an eligible endpoint without waiting; None when there is none."""
+        with self._cond:
+            try:
+                return self._pick(exclude)
+            except NoHealthyEndpoint:
+                return None
+
+    async def aacquire(self, exclude: set = frozenset()) -> Endpoint:
+        """Async :meth:`acquire`; polls so a waiting coroutine never blocks the event loop."""
+        self._ensure_health_thread()
+        delay = 0.005
+        while True:
+            with self._cond:
+                endpoint = self._pick(exclude)
+            if endpoint is not None:
+                return endpoint
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+    def release(self, endpoint: Endpoint, error: Optional[BaseException] = None) -> None:
+        """Free the slot and record the outcome; repeated failures eject the endpoint."""
+        with self._cond:
+            endpoint.outstanding -= 1
+            if error is None:
+                endpoint.consecutive_failures = 0
+                endpoint.ejected_until = 0.0
+            else:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.consecutive_failures >= self.eject_after and not endpoint.ejected:
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+                    logger.warning("Ejecting LLM endpoint %s for %.0fs after %d failures: %s", endpoint.url, self.eject_seconds, endpoint.consecutive_failures, error)
+            self._cond.notify_all()
+
+    def record_hedge(self) -> None:
+        """Count a call that was also sent to a second endpoint."""
+        with self._cond:
+            self.hedges += 1
+
+    def check_health(self) -> None:
+        """Probe ejected endpoints whose cooldown has passed and readmit the ones that answer."""
+        now = time.monotonic()
+        with self._cond:
+            due = [e for e in self.endpoints if e.ejected and e.ejected_until <= now]
+        for endpoint in due:
+            healthy = self.probe(endpoint.url)
+            with self._cond:
+                if healthy:
+                    endpoint.ejected_until = 0.0
+                    endpoint.consecutive_failures = 0
+                    logger.info("LLM endpoint %s is healthy again", endpoint.url)
+                else:
+                    endpoint.ejected_until = time.monotonic() + self.eject_seconds
+                self._cond.notify_all()
+
+    def _ensure_health_thread(self) -> None:
+        if self.health_interval <= 0 or self._health_thread is not None:
+            return
+        with self._cond:
+            if self._health_thread is None:
+                self._health_thread = threading.Thread(target=self._health_loop, name="llm-pool-health", daemon=True)
+                self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        while True:
+            time.sleep(self.health_interval)
+            try:
+                self.check_health()
+            except Exception:
+                logger.exception("LLM endpoint health check failed")
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-endpoint requests, failures, in-flight calls and ejection state."""
+        with self._cond:
+            return [
+                {"url": e.url, "requests": e.requests, "failures": e.failures, "outstanding": e.outstanding, "ejected": e.ejected}
+                for e in self.endpoints
+            ]
+
+
+def _first_success(done, pending):
+    """Pick the finished attempt to return: a successful one, or the failure once nothing is pending."""
+    for attempt in done:
+        if attempt.exception() is None:
+            return attempt
+    return None if pending else next(iter(done))
+
+
+# Hedged calls run their first attempt here so the caller can start a second one while it is in flight
+_HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="llm-hedge")
+
+
+class PooledChatModel(BaseChatModel):
+    """Chat model that routes each call through an :class:`LLMPool`."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    pool: LLMPool
+    # Endpoints tried per call before giving up
+    max_attempts: int = 3
+    # Seconds to wait before hedging onto a second endpoint (0 disables hedging)
+    hedge_after: float = 0.0
+
+    @property
+    def _primary(self) -> BaseChatModel:
+        return self.pool.endpoints[0].model
+
+    @property
+    def _llm_type(self) -> str:
+        # Same cache keys as a single endpoint: the servers are interchangeable
+        return self._primary._llm_type
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return self._primary._identifying_params
+
+    def bind_tools(self, tools, **kwargs: Any):
+        return self.bind(**self._primary.bind_tools(tools, **kwargs).kwargs)
+
+    def with_structured_output(self, schema, **kwargs: Any):
+        structured = self._primary.with_structured_output(schema, **kwargs)
+        first = structured.first if isinstance(structured, RunnableSequence) else None
+        if isinstance(first, RunnableBinding) and first.bound is self._primary:
+            return RunnableSequence(self.bind(**first.kwargs), *structured.steps[1:])
+        return super().with_structured_output(schema, **kwargs)
+
+    def _call(self, endpoint: Endpoint, messages, stop, run_manager, **kwargs) -> ChatResult:
+        try:
+            result = endpoint.model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except BaseException as e:
+            self.pool.release(endpoint, e)
+            raise
+        self.pool.release(endpoint)
+        return result
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        tried: set = set()
+        last_error: Optional[BaseException] = None
+        for _ in range(max(1, self.max_attempts)):
+            try:
+                endpoint = self.pool.acquire(tried)
+            except NoHealthyEndpoint:
+                break
+            tried.add(endpoint.url)
+            try:
+                if self.hedge_after > 0:
+                    return self._hedged(endpoint, tried, messages, stop, run_manager, **kwargs)
+                return self._call(endpoint, messages, stop, run_manager, **kwargs)
+            except Exception as e:
+                last_error = e
+                logger.warning("LLM call to %s failed, trying another endpoint: %s", endpoint.url, e)
+        raise last_error or NoHealthyEndpoint("No healthy LLM endpoint available")
+
+    def _hedged(self, endpoint: Endpoint, tried: set, messages, stop, run_manager, **kwargs) -> ChatResult:
+        first = _HEDGE_EXECUTOR.submit(self._call, endpoint, messages, stop, run_manager, **kwargs)
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+        backup_endpoint = self.pool.try_acquire(tried)
+        if backup_endpoint is None:
+            return first.result()
+        tried.add(backup_endpoint.url)
+        self.pool.record_hedge()
+        # The backup does not stream tokens to the run, so a streamed answer is never interleaved
+        backup = _HEDGE_EXECUTOR.submit(self._call, backup_endpoint, messages, stop, None, **kwargs)
+        pending = {first, backup}
+        while True:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winner = _first_success(done, pending)
+            if winner is not None:
+                return winner.result()
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        tried: set = set()
+        last_error: Optional[BaseException] = None
+        for _ in range(max(1, self.max_attempts)):
+            try:
+                endpoint = self.pool.acquire(tried)
+            except NoHealthyEndpoint:
+                break
+            tried.add(endpoint.url)
+            streamed = False
+            try:
+                for chunk in endpoint.model._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    streamed = True
+                    yield chunk
+            except Exception as e:
+                self.pool.release(endpoint, e)
+                if streamed:
+                    raise  # the caller already has part of the answer; another endpoint would repeat it
+                last_error = e
+                logger.warning("LLM stream from %s failed, trying another endpoint: %s", endpoint.url, e)
+                continue
+            except BaseException:
+                # The consumer stopped reading (GeneratorExit): not the endpoint's fault
+                self.pool.release(endpoint)
+                raise
+            self.pool.release(endpoint)
+            return
+        raise last_error or NoHealthyEndpoint("No healthy LLM endpoint available")
+
+    async def _acall(self, endpoint: Endpoint, messages, stop, run_manager, **kwargs) -> ChatResult:
+        try:
+            result = await endpoint.model._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+        except BaseException as e:
+            self.pool.release(endpoint, None if isinstance(e, asyncio.CancelledError) else e)
+            raise
+        self.pool.release(endpoint)
+        return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> ChatResult:
+        tried: set = set()
+        last_error: Optional[BaseException] = None
+        for _ in range(max(1, self.max_attempts)):
+            try:
+                endpoint = await self.pool.aacquire(tried)
+            except NoHealthyEndpoint:
+                break
+            tried.add(endpoint.url)
+            try:
+                if self.hedge_after > 0:
+                    return await self._ahedged(endpoint, tried, messages, stop, run_manager, **kwargs)
+                return await self._acall(endpoint, messages, stop, run_manager, **kwargs)
+            except Exception as e:
+                last_error = e
+                logger.warning("LLM call to %s failed, trying another endpoint: %s", endpoint.url, e)
+        raise last_error or NoHealthyEndpoint("No healthy LLM endpoint available")
+
+    async def _ahedged(self, endpoint: Endpoint, tried: set, messages, stop, run_manager, **kwargs) -> ChatResult:
+        first = asyncio.ensure_future(self._acall(endpoint, messages, stop, run_manager, **kwargs))
+        done, _ = await asyncio.wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+        backup_endpoint = self.pool.try_acquire(tried)
+        if backup_endpoint is None:
+            return await first
+        tried.add(backup_endpoint.url)
+        self.pool.record_hedge()
+        backup = asyncio.ensure_future(self._acall(backup_endpoint, messages, stop, None, **kwargs))
+        pending = {first, backup}
+        try:
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = _first_success(done, pending)
+                if winner is not None:
+                    return winner.result()
+        finally:
+            # Cancelling the loser frees its endpoint slot right away
+            for task in pending:
+                task.cancel()
+
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        tried: set = set()
+        last_error: Optional[BaseException] = None
+        for _ in range(max(1, self.max_attempts)):
+            try:
+                endpoint = await self.pool.aacquire(tried)
+            except NoHealthyEndpoint:
+                break
+            tried.add(endpoint.url)
+            streamed = False
+            try:
+                async for chunk in endpoint.model._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    streamed = True
+                    yield chunk
+            except Exception as e:
+                self.pool.release(endpoint, e)
+                if streamed:
+                    raise
+                last_error = e
+                logger.warning("LLM stream from %s failed, trying another endpoint: %s", endpoint.url, e)
+                continue
+            except BaseException:
+                # Cancelled, or the consumer closed the stream
+                self.pool.release(endpoint)
+                raise
+            self.pool.release(endpoint)
+            return
+        raise last_error or NoHealthyEndpoint("No healthy LLM endpoint available")
+
+
+def build_pool(urls: Sequence[str], make_model: Callable[[str], BaseChatModel]) -> PooledChatModel:
+    """Create a pooled model with one ``make_model(url)`` client per endpoint, configured from Config."""
+    endpoints = [Endpoint(url=url, model=make_model(url), max_concurrency=max(1, Config.LLM_ENDPOINT_MAX_CONCURRENCY)) for url in urls]
+    pool = LLMPool(
+        endpoints,
+        eject_after=Config.LLM_EJECT_AFTER_FAILURES,
+        eject_seconds=Config.LLM_EJECT_SECONDS,
+        health_path=Config.LLM_HEALTH_PATH,
+        health_interval=Config.LLM_HEALTH_CHECK_INTERVAL,
+    )
+    return PooledChatModel(pool=pool, max_attempts=Config.LLM_POOL_ATTEMPTS)
+
+
+def hedged_llm(llm: BaseChatModel, scope: str) -> BaseChatModel:
+    """Return ``llm`` with hedging enabled when it is pooled and ``scope`` is in ``Config.LLM_HEDGE_SCOPES``."""
+    if not isinstance(llm, PooledChatModel) or Config.LLM_HEDGE_AFTER_SECONDS <= 0 or scope not in Config.LLM_HEDGE_SCOPES:
+        return llm
+    return llm.model_copy(update={"hedge_after": Config.LLM_HEDGE_AFTER_SECONDS})
@@ -1,6 +1,42 @@
-"""Lightweight logging helper to provide consistent, configurable logging across the project."""
+"""Lightweight logging helper to provide consistent, configurable logging across the project.
+
+Loggers returned by :func:`setup_logger` share one ``QueueHandler``. A call
+only captures the record and its run id and puts it on an in-memory queue;
+formatting and all I/O happen on a single background ``QueueListener``
+thread, which writes to stderr and, when ``Config.LOG_FILE`` is set, as JSON
+lines to a size-rotated file. Because arguments are formatted on that thread,
+pass values that are not mutated after the call (as with any deferred logging).
+
+A message longer than ``Config.LOG_MAX_CHARS`` is cut short and tagged with the
+length and SHA-1 of the full text. When ``Config.LOG_PAYLOAD_DIR`` is set, the
+full text is also written there once, as ``<sha1>.txt``.
+
+Records carry a correlation id (``run_id``): the id set with
+:func:`log_context`, or else the ``thread_id`` of the LangGraph run the calling
+code belongs to.
+"""
+import atexit
+import hashlib
+import json
 import logging
+import logging.handlers
 import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from langchain_agent.utils.config import Config
+
+_RUN_ID: ContextVar[Optional[str]] = ContextVar("log_run_id", default=None)
+
+_TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(run_tag)s%(message)s"
+
+_QUEUE_HANDLER: Optional[logging.Handler] = None
+_LISTENER: Optional["_Listener"] = None
+_SETUP_LOCK = threading.Lock()
 
 
 def setup_logger(name: str = "saas_research", level: str | None = None) -> logging.Logger:
@@ -16,9 +52,148 @@ def setup_logger(name: str = "saas_research", level: str | None = None) -> loggi
     logger.setLevel(numeric_level)
 
     if not logger.handlers:
-        fmt = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        handler = logging.StreamHandler()
-        handler.setFormatter(logging.Formatter(fmt))
-        logger.addHandler(handler)
+        logger.addHandler(_queue_handler())
 
     return logger
+
+
+@contextmanager
+def log_context(run_id: Optional[str]) -> Iterator[None]:
+    """Tag every record logged inside the block (and in tasks and graph runs it starts) with ``run_id``."""
+    token = _RUN_ID.set(run_id)
+    try:
+        yield
+    finally:
+        _RUN_ID.reset(token)
+
+
+def current_run_id() -> Optional[str]:
+    """The correlation id for a record logged now: :func:`log_context`, else the enclosing graph run's thread id."""
+    run_id = _RUN_ID.get()
+    if run_id:
+        return run_id
+    # Only consulted once LangChain is loaded, so importing this module stays cheap
+    runnable_config = sys.modules.get("langchain_core.runnables.config")
+    config = runnable_config.var_child_runnable_config.get() if runnable_config is not None else None
+    if not config:
+        return None
+    return (config.get("configurable") or {}).get("thread_id") or (config.get("metadata") or {}).get("thread_id")
+
+
+def flush_logs(timeout: float = 5.0) -> bool:
+    """Wait until every record queued so far has been written; False on timeout."""
+    if _LISTENER is None or _QUEUE_HANDLER is None:
+        return True
+    marker = _FlushMarker()
+    _QUEUE_HANDLER.queue.put_nowait(marker)
+    return marker.done.wait(timeout)
+
+
+def cap_message(message: str, max_chars: int, payload_dir: str = "") -> str:
+    """Cut ``message`` to ``max_chars`` and reference the full text by its SHA-1 (saved under ``payload_dir`` if set)."""
+    if max_chars <= 0 or len(message) <= max_chars:
+        return message
+    digest = hashlib.sha1(message.encode("utf-8", "replace")).hexdigest()
+    if payload_dir:
+        path = os.path.join(payload_dir, f"{digest}.txt")
+        if not os.path.exists(path):
+            try:
+                os.makedirs(payload_dir, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(message)
+            except OSError:
+                pass
+    return f"{message[:max_chars]}... [truncated {len(message) - max_chars} of {len(message)} chars, sha1 {digest[:16]}]"
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records without formatting them; the listener thread does that."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.run_id = current_run_id()
+        return record
+
+
+class _FlushMarker(logging.LogRecord):
+    def __init__(self):
+        super().__init__("saas_research.flush", logging.CRITICAL, __file__, 0, "", None, None)
+        self.done = threading.Event()
+
+
+class _Listener(logging.handlers.QueueListener):
+    def __init__(self, records: queue.SimpleQueue, *handlers: logging.Handler):
+        super().__init__(records, *handlers, respect_handler_level=True)
+
+    def handle(self, record: logging.LogRecord) -> None:
+        if isinstance(record, _FlushMarker):
+            record.done.set()
+            return
+        try:
+            # Merge arguments once and cap the result, so every handler formats the short text
+            record.msg = cap_message(record.getMessage(), Config.LOG_MAX_CHARS, Config.LOG_PAYLOAD_DIR)
+            record.args = None
+        except Exception:
+            pass
+        record.run_tag = f"[{record.run_id}] " if getattr(record, "run_id", None) else ""
+        super().handle(record)
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, run id, message and any traceback."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "run_id": getattr(record, "run_id", None),
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _handlers() -> list:
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(_TEXT_FORMAT))
+    handlers = [console]
+    if Config.LOG_FILE:
+        os.makedirs(os.path.dirname(Config.LOG_FILE) or ".", exist_ok=True)
+        rotating = logging.handlers.RotatingFileHandler(
+            Config.LOG_FILE, maxBytes=Config.LOG_FILE_MAX_BYTES, backupCount=Config.LOG_FILE_BACKUPS, encoding="utf-8"
+        )
+        rotating.setFormatter(JsonLinesFormatter())
+        handlers.append(rotating)
+    return handlers
+
+
+def _start_listener() -> None:
+    global _LISTENER
+    _LISTENER = _Listener(_QUEUE_HANDLER.queue, *_handlers())
+    _LISTENER.start()
+
+
+def _restart_in_child() -> None:
+    # Records the parent had not written yet were copied with the queue; they are the parent's to write
+    _QUEUE_HANDLER.queue = queue.SimpleQueue()
+    _start_listener()
+
+
+def _stop_listener() -> None:
+    if _LISTENER is not None and _LISTENER._thread is not None:
+        _LISTENER.stop()
+
+
+def _queue_handler() -> logging.Handler:
+    global _QUEUE_HANDLER
+    with _SETUP_LOCK:
+        if _QUEUE_HANDLER is None:
+            _QUEUE_HANDLER = _QueueHandler(queue.SimpleQueue())
+            _start_listener()
+            # stop() drains the queue, so records logged just before exit are still written
+            atexit.register(_stop_listener)
+            # The listener thread does not survive fork: give a child process (e.g. a batch worker) its own
+            os.register_at_fork(after_in_child=_restart_in_child)
+    return _QUEUE_HANDLER
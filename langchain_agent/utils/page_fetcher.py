@@ -0,0 +1,276 @@
+"""Concurrent web page fetching and main-text extraction.
+
+``PageFetcher`` downloads pages over one pooled keep-alive ``requests.Session``,
+with a per-host concurrency cap, timeouts and a response size limit. HTML is
+reduced to its main text with BeautifulSoup (using lxml when it is installed),
+and the result is kept in a ``PageStore``. A stored page is served directly
+while it is younger than ``ttl_seconds``; after that it is revalidated with
+``If-None-Match``/``If-Modified-Since`` so unchanged pages are not downloaded
+again.
+
+URLs come from the model, so only ``http``/``https`` URLs are fetched and,
+unless ``allow_private`` is set, only hosts that resolve to public addresses:
+loopback, private, link-local and other reserved ranges are refused. The
+connection goes to the address that was checked, so a second DNS answer cannot
+redirect it, and redirects are followed by hand so every hop is checked.
+"""
+import ipaddress
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import select_proxy
+
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.logger import setup_logger
+from langchain_agent.utils.page_store import PageStore
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+# Elements that never hold a page's main content
+_BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "nav", "header", "footer", "aside", "form", "svg", "iframe"]
+_TEXT_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+
+
+def _parser() -> str:
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+def extract_text(html) -> Tuple[str, str]:
+    """Return ``(title, main_text)`` for an HTML document (``str`` or ``bytes``).
+
+    Boilerplate elements are dropped and ``<article>`` or ``<main>`` is preferred
+    over the whole body when present.
+    """
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, _parser())
+    title = " ".join(soup.title.get_text().split()) if soup.title else ""
+    for tag in soup(_BOILERPLATE_TAGS):
+        tag.decompose()
+    root = soup.find("article") or soup.find("main") or soup.body or soup
+    lines = (" ".join(line.split()) for line in root.get_text("\n").splitlines())
+    return title, "\n".join(line for line in lines if line)
+
+
+def _resolve(host: str) -> List[str]:
+    """Return every address ``host`` resolves to."""
+    return [info[4][0] for info in socket.getaddrinfo(host, None)]
+
+
+def check_url(url: str, allow_private: bool = False) -> Optional[str]:
+    """Raise ``ValueError`` unless ``url`` is http(s) and (without ``allow_private``) its host is public.
+
+    Returns the validated address to connect to, or None when ``allow_private`` skips the check.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError("only http(s) URLs can be fetched")
+    if allow_private:
+        return None
+    try:
+        addresses = _resolve(parts.hostname)
+    except OSError as e:
+        raise ValueError(f"cannot resolve {parts.hostname}: {e}") from e
+    checked = []
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split("%", 1)[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"{parts.hostname} resolves to non-public address {ip}")
+        checked.append(str(ip))
+    if not checked:
+        raise ValueError(f"cannot resolve {parts.hostname}: no addresses")
+    return checked[0]
+
+
+class _PinnedAdapter(HTTPAdapter):
+    """Connect to the address :func:`check_url` validated instead of resolving the host again.
+
+    Resolving once closes the DNS-rebinding gap between the check and the
+    connection. The URL keeps its hostname, so the ``Host`` header, TLS SNI and
+    certificate verification all still use the name. Requests sent through a
+    proxy are checked but not pinned, since the proxy does its own resolution.
+    """
+
+    def __init__(self, allow_private: bool = False, **kwargs):
+        self.allow_private = allow_private
+        super().__init__(**kwargs)
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None, cert=None):
+        address = check_url(request.url, self.allow_private)
+        if address is None or select_proxy(request.url, proxies):
+            return super().get_connection_with_tls_context(request, verify, proxies=proxies, cert=cert)
+        host_params, pool_kwargs = self.build_connection_pool_key_attributes(request, verify, cert)
+        parts = urlsplit(request.url)
+        request.headers.setdefault("Host", parts.netloc.rsplit("@", 1)[-1])
+        if host_params["scheme"] == "https":
+            pool_kwargs = {**pool_kwargs, "server_hostname": parts.hostname, "assert_hostname": parts.hostname}
+        return self.poolmanager.connection_from_host(**{**host_params, "host": address}, pool_kwargs=pool_kwargs)
+
+
+@dataclass
+class FetchedPage:
+    url: str
+    title: str
+    text: str
+    # fetched, cached (served from the store), revalidated (304 from the server) or error
+    status: str
+    error: Optional[str] = None
+
+
+class PageFetcher:
+    """Fetch pages concurrently over a pooled session and keep their text in a ``PageStore``."""
+
+    def __init__(
+        self,
+        store: Optional[PageStore] = None,
+        timeout: float = 10.0,
+        max_per_host: int = 2,
+        max_workers: int = 8,
+        max_bytes: int = 2 * 1024 * 1024,
+        ttl_seconds: int = 7 * 24 * 60 * 60,
+        user_agent: str = "saas-researcher/0.1",
+        allow_private: bool = False,
+        max_redirects: int = 5,
+    ):
+        self.store = store
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.allow_private = allow_private
+        self.max_redirects = max_redirects
+        self.counts = {"fetched": 0, "cached": 0, "revalidated": 0, "error": 0}
+
+        self.session = requests.Session()
+        adapter = _PinnedAdapter(allow_private, pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+
+        self._lock = threading.Lock()
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+
+    def _host_limit(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._host_limits[host]
+
+    def _done(self, page: FetchedPage) -> FetchedPage:
+        with self._lock:
+            self.counts[page.status] += 1
+        return page
+
+    def _download(self, url: str, headers: dict) -> Tuple[requests.Response, bytes]:
+        """GET ``url``, following redirects only to allowed URLs; returns the closed response and its body.
+
+        The session's adapter checks (and pins) the address of every hop.
+        """
+        for _ in range(self.max_redirects + 1):
+            with self._host_limit(urlsplit(url).netloc.lower()):
+                response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True, allow_redirects=False)
+                try:
+                    if response.is_redirect:
+                        url = urljoin(url, response.headers["Location"])
+                        continue
+                    body = bytearray()
+                    if response.status_code == 200:
+                        for chunk in response.iter_content(64 * 1024):
+                            body.extend(chunk)
+                            if len(body) > self.max_bytes:
+                                raise ValueError(f"response larger than {self.max_bytes} bytes")
+                    return response, bytes(body)
+                finally:
+                    response.close()
+        raise ValueError(f"more than {self.max_redirects} redirects")
+
+    def fetch(self, url: str) -> FetchedPage:
+        """Return the main text of ``url``, from the store when it is fresh enough."""
+        try:
+            # Scheme only here; addresses are checked when the URL (or a redirect) is actually requested
+            check_url(url, allow_private=True)
+        except ValueError as e:
+            return self._done(FetchedPage(url, "", "", "error", str(e)))
+
+        stored = self.store.get(url) if self.store is not None else None
+        if stored is not None and time.time() - stored.fetched_at < self.ttl_seconds:
+            return self._done(FetchedPage(url, stored.title, stored.text, "cached"))
+
+        headers = {}
+        if stored is not None and stored.etag:
+            headers["If-None-Match"] = stored.etag
+        if stored is not None and stored.last_modified:
+            headers["If-Modified-Since"] = stored.last_modified
+
+        try:
+            response, body = self._download(url, headers)
+            if response.status_code == 304 and stored is not None:
+                self.store.touch(url)
+                return self._done(FetchedPage(url, stored.title, stored.text, "revalidated"))
+            response.raise_for_status()
+
+            content_type = response.headers.get("Content-Type", "text/html").split(";")[0].strip().lower()
+            if content_type not in _TEXT_TYPES:
+                raise ValueError(f"unsupported content type {content_type}")
+            if content_type == "text/plain":
+                title, text = "", body.decode(response.encoding or "utf-8", errors="replace")
+            else:
+                title, text = extract_text(body)
+        except Exception as e:
+            logger.warning("Fetching %s failed: %s", url, e)
+            return self._done(FetchedPage(url, "", "", "error", str(e)))
+
+        if self.store is not None:
+            self.store.put(url, title, text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        return self._done(FetchedPage(url, title, text, "fetched"))
+
+    def fetch_many(self, urls: List[str]) -> List[FetchedPage]:
+        """Fetch ``urls`` concurrently and return the pages in input order."""
+        if len(urls) <= 1:
+            return [self.fetch(url) for url in urls]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls)), thread_name_prefix="fetch") as pool:
+            return list(pool.map(self.fetch, urls))
+
+    def stats(self) -> Dict[str, int]:
+        """Return per-status fetch counters."""
+        with self._lock:
+            return dict(self.counts)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_PAGE_FETCHER: Optional[PageFetcher] = None
+_PAGE_FETCHER_LOCK = threading.Lock()
+
+
+def get_page_fetcher() -> PageFetcher:
+    """Return the process-wide page fetcher configured from Config."""
+    global _PAGE_FETCHER
+    if _PAGE_FETCHER is None:
+        with _PAGE_FETCHER_LOCK:
+            if _PAGE_FETCHER is None:
+                _PAGE_FETCHER = PageFetcher(
+                    PageStore(Config.PAGE_STORE_PATH, max_bytes=Config.PAGE_STORE_MAX_BYTES),
+                    timeout=Config.FETCH_TIMEOUT_SECONDS,
+                    max_per_host=Config.FETCH_MAX_PER_HOST,
+                    max_workers=Config.FETCH_WORKERS,
+                    max_bytes=Config.FETCH_MAX_BYTES,
+                    ttl_seconds=Config.PAGE_TTL_SECONDS,
+                    allow_private=Config.FETCH_ALLOW_PRIVATE,
+                )
+    return _PAGE_FETCHER
@@ -0,0 +1,110 @@
+"""Local content store for fetched web pages.
+
+Extracted page text is zlib-compressed and kept in SQLite, keyed by URL,
+together with the ``ETag``/``Last-Modified`` validators the server sent so a
+stale page can be revalidated with a conditional request instead of being
+downloaded again. The table is kept under ``max_bytes`` of compressed text by
+evicting the least recently fetched pages.
+"""
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class StoredPage:
+    url: str
+    title: str
+    text: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+
+class PageStore:
+    """SQLite-backed store of compressed page text keyed by URL."""
+
+    def __init__(self, path: str, max_bytes: int = 128 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " title TEXT NOT NULL,"
+            " content BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_fetched ON pages(fetched_at)")
+
+    def get(self, url: str) -> Optional[StoredPage]:
+        """Return the stored page for ``url``, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, content, etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        text = zlib.decompress(row[1]).decode("utf-8")
+        return StoredPage(url, row[0], text, row[2], row[3], row[4])
+
+    def put(self, url: str, title: str, text: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Store (or replace) a page and evict the oldest pages beyond ``max_bytes``."""
+        content = zlib.compress(text.encode("utf-8"), 6)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pages (url, etag, last_modified, title, content, size, fetched_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, title, content, len(content), time.time()),
+                )
+                if self.max_bytes > 0:
+                    self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pages").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._conn.execute("SELECT url, size FROM pages ORDER BY fetched_at").fetchall():
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def touch(self, url: str) -> None:
+        """Mark a stored page as freshly validated (after a 304 response)."""
+        with self._lock:
+            self._conn.execute("UPDATE pages SET fetched_at = ? WHERE url = ?", (time.time(), url))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of stored pages and their compressed size in bytes."""
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pages").fetchone()
+        return {"pages": count, "bytes": size}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
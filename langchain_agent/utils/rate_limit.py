@@ -0,0 +1,135 @@
+"""Rate limiting, retry with backoff and request coalescing for upstream calls.
+
+- :class:`TokenBucket` spaces out requests to ``rate`` per second with bursts
+  of up to ``burst``. Callers reserve a token and sleep until it is due, so
+  sync and async callers share one bucket without polling.
+- :func:`backoff_delay` gives exponential backoff with full jitter, and
+  :func:`is_throttle_error` recognizes rate-limit responses and timeouts
+  worth retrying.
+- :class:`SingleFlight` lets identical in-flight requests share one upstream
+  call: the first caller runs it, and later callers wait for its result (or
+  its exception). A cancelled async caller never takes its followers with it.
+"""
+import asyncio
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from typing import Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Substrings of exception class names/messages that mean "slow down" (DDGS raises RatelimitException
+# or reports "202 Ratelimit"/429), plus timeouts, which throttled backends often produce instead
+_THROTTLE_MARKERS = ("ratelimit", "rate limit", "rate-limit", "too many requests", "429", "timeout", "timed out")
+
+
+class TokenBucket:
+    """Thread-safe token bucket; ``rate <= 0`` disables limiting."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds the caller must wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is a queue of reservations; each waits for its token to refill
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> float:
+        """Block until a token is available; returns the time waited."""
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def aacquire(self) -> float:
+        """Async :meth:`acquire`."""
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """Whether ``error`` looks like throttling (or a timeout) and is worth retrying after a pause."""
+    text = f"{type(error).__name__} {error}".lower()
+    return isinstance(error, TimeoutError) or any(marker in text for marker in _THROTTLE_MARKERS)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution.
+
+    Sync callers share a ``concurrent.futures.Future``; async callers share an
+    ``asyncio`` future scoped to their event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._loop_calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, asyncio.Future]]" = weakref.WeakKeyDictionary()
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> Tuple[T, bool]:
+        """Return ``(result, shared)``; ``shared`` is True when another caller's execution was reused."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result(), True
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+        return future.result(), False
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Async :meth:`do`. If the leader is cancelled, its followers run ``fn`` again rather than failing."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                calls = self._loop_calls.setdefault(loop, {})
+                future = calls.get(key)
+                leader = future is None
+                if leader:
+                    future = calls[key] = loop.create_future()
+            if leader:
+                break
+            # asyncio.wait propagates the follower's own cancellation but not the shared future's
+            await asyncio.wait((future,))
+            if not future.cancelled():
+                return future.result(), True
+            # The leader was cancelled and dropped the key: take over (or join whoever did first)
+        try:
+            future.set_result(await fn())
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Nobody may be waiting; retrieving the exception keeps asyncio from logging it
+            future.exception()
+        finally:
+            with self._lock:
+                calls.pop(key, None)
+        return future.result(), False
@@ -0,0 +1,119 @@
+"""The fixed sections of the final report, written concurrently and stitched together.
+
+Instead of one model call that writes the whole report from the whole history,
+each section of ``REPORT_SECTIONS`` gets its own call that sees the user's
+request plus only the worker outputs it draws on (compacted to the
+``report_section`` context budget). Sections that span every topic (the
+executive summary, next steps and recommendation) see digests of all worker
+outputs instead. The calls run concurrently, so synthesis takes about as long
+as the slowest section, and :func:`merge_sections` assembles the drafts into
+the report without another model call.
+"""
+from typing import List, NamedTuple, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage
+
+from langchain_agent.lib.prompts.supervisor import REPORT_SECTION_PROMPT
+from langchain_agent.utils.compaction import acompact_messages, compact_messages, digest, is_worker_output
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.logger import setup_logger
+
+logger = setup_logger(__name__, level=Config.LOG_LEVEL)
+
+DEFAULT_TITLE = "SaaS Research Report"
+
+
+class ReportSection(NamedTuple):
+    key: str
+    title: str
+    # Workers whose outputs the section sees in full; empty means digests of every worker output
+    workers: Tuple[str, ...]
+    guidance: str
+
+
+REPORT_SECTIONS: Tuple[ReportSection, ...] = (
+    ReportSection(
+        "executive_summary", "Executive Summary", (),
+        "Start with a `# Title` line (a one-line summary of the idea), then the `## Executive Summary` heading and "
+        "3-5 sentences on the recommended idea, the opportunity and the verdict.",
+    ),
+    ReportSection("market_size", "Market Size & Opportunity", ("market",), "Give TAM/SAM/SOM estimates, growth trends and the figures behind them."),
+    ReportSection(
+        "competitors", "Competitors & Differentiation", ("research", "market"),
+        "Name the top competitors with their pricing and weaknesses, and how the idea stands apart from them.",
+    ),
+    ReportSection("pain_points", "Customer Pain Points", ("research", "saas_finder"), "List the customer pain points, with evidence from reviews or research."),
+    ReportSection(
+        "monetization", "Monetization & Willingness to Pay", ("saas_finder", "market"),
+        "Describe the pricing, the evidence for willingness to pay and the revenue model.",
+    ),
+    ReportSection(
+        "bootstrap", "Bootstrap Feasibility / Needed Resources", ("saas_finder",),
+        "Assess whether a small team can build and launch it, and the skills, time and money it needs.",
+    ),
+    ReportSection("next_steps", "Actionable Next Steps", (), "List 3-5 concrete next steps, most important first."),
+    ReportSection("recommendation", "Final Recommendation", (), "Say whether to build, validate or wait, and why, in 2-4 sentences."),
+)
+
+
+def _section_inputs(section: ReportSection, messages: Sequence[BaseMessage]) -> Tuple[list, list, list]:
+    """Split the history into the request, the section's own worker outputs and every worker output."""
+    messages = list(messages)
+    request = messages[:1] if messages and isinstance(messages[0], HumanMessage) and not is_worker_output(messages[0]) else []
+    outputs = [m for m in messages if is_worker_output(m)]
+    return request, [m for m in outputs if m.name in section.workers], outputs
+
+
+def _section_prompt(section: ReportSection, view: list) -> list:
+    heading = "# Title (one-line idea summary)\n## Executive Summary" if section.key == "executive_summary" else f"## {section.title}"
+    return [{"role": "system", "content": REPORT_SECTION_PROMPT.format(heading=heading, guidance=section.guidance)}] + view
+
+
+def _digests(request: list, outputs: list) -> list:
+    # Summary sections, or a section whose workers never ran: every worker's findings, digested
+    return request + [HumanMessage(content=digest(m), name=m.name) for m in outputs]
+
+
+def section_messages(section: ReportSection, messages: Sequence[BaseMessage]) -> list:
+    """The prompt for one section: its instructions, the user's request and the worker outputs it needs."""
+    request, relevant, outputs = _section_inputs(section, messages)
+    view = compact_messages(request + relevant, "report_section") if relevant else _digests(request, outputs)
+    return _section_prompt(section, view)
+
+
+async def asection_messages(section: ReportSection, messages: Sequence[BaseMessage]) -> list:
+    """Async :func:`section_messages`; a compaction summary is awaited rather than blocking the event loop."""
+    request, relevant, outputs = _section_inputs(section, messages)
+    view = await acompact_messages(request + relevant, "report_section") if relevant else _digests(request, outputs)
+    return _section_prompt(section, view)
+
+
+def _section_body(draft: str) -> Tuple[str, List[str]]:
+    """Split a draft into its ``# `` title line (if any) and its body lines without the section heading."""
+    lines = [line for line in draft.strip().splitlines() if not line.strip().startswith("```")]
+    title, body = "", []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("# "):
+            title = title or stripped[2:].strip()
+        elif stripped.startswith("## ") and not any(b.strip() for b in body):
+            continue  # the section's own heading, whatever the model called it
+        elif stripped.startswith("## "):
+            body.append("#" + stripped)  # keep a stray sub-heading below the section level
+        else:
+            body.append(line)
+    return title, body
+
+
+def merge_sections(drafts: Sequence[str], request: str = "") -> str:
+    """Assemble section drafts (in ``REPORT_SECTIONS`` order) into one Markdown report with canonical headings."""
+    title, parts = "", []
+    for section, draft in zip(REPORT_SECTIONS, drafts):
+        draft_title, body = _section_body(draft or "")
+        title = title or draft_title
+        text = "\n".join(body).strip() or "_Not available._"
+        parts.append(f"## {section.title}\n\n{text}")
+    if not title:
+        first_line = request.strip().splitlines()[0] if request.strip() else ""
+        title = first_line[:80] or DEFAULT_TITLE
+    return f"# {title}\n\n" + "\n\n".join(parts) + "\n"
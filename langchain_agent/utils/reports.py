@@ -0,0 +1,44 @@
+"""Helpers to locate, extract and persist final research reports."""
+import hashlib
+import os
+import re
+from typing import Any, Optional
+
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.response_utils import extract_messages
+
+
+def normalize_niche(niche: str) -> str:
+    """Return the form of a niche that identifies its report: lower-cased, with whitespace collapsed."""
+    return " ".join(niche.lower().split())
+
+
+def report_path(niche: str, reports_dir: Optional[str] = None) -> str:
+    """Return the deterministic Markdown report path for a niche.
+
+    The file name is a readable slug plus a short hash of the normalized niche
+    (see :func:`normalize_niche`), so distinct niches never collide and a re-run
+    finds the report written by a previous one.
+    """
+    key = normalize_niche(niche)
+    slug = re.sub(r"[^a-z0-9]+", "-", key).strip("-")[:60] or "niche"
+    digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(reports_dir or Config.REPORTS_DIR, f"{slug}-{digest}.md")
+
+
+def final_report_text(result: Any) -> str:
+    """Return the content of the last ``final_report`` message in a graph result, or ''."""
+    for message in reversed(extract_messages(result)):
+        if message.get("name") == "final_report":
+            return message.get("content") or ""
+    return ""
+
+
+def save_report(path: str, content: str) -> str:
+    """Write a report atomically so a crash never leaves a half-written file behind."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+    return path
@@ -1,5 +1,7 @@
 """Helpers to normalize LLM/agent responses into a predictable messages list."""
-from typing import Any, List, Dict, Optional
+import json
+import re
+from typing import Any, List, Dict, Optional, Tuple
 from langchain_core.messages import HumanMessage
 
 
@@ -84,24 +86,219 @@ def get_text(result: Any) -> str:
     return str(result)
 
 
-def parse_trailing_json(text: str) -> Optional[Dict]:
-    """Attempt to parse a trailing JSON object from a block of text.
+# Characters that change scanner state inside an object / inside a string of an object
+_OBJECT_EVENTS = re.compile(r'[{}"]')
+_STRING_EVENTS = re.compile(r'["\\\n]')
+
+
+class JsonObjectScanner:
+    """Single-pass scanner that finds balanced JSON objects in free text.
+
+    Text can be fed in pieces (for example streamed tokens) with :meth:`feed`;
+    total work is linear in the length of the text. Braces are counted outside
+    JSON strings only, and quotes only inside an open object, so prose around
+    the JSON does not confuse the scan. A raw newline inside a string cannot be
+    JSON, so it abandons the open candidate (a stray ``{"`` in prose).
 
-    Returns the parsed dict if successful, otherwise None.
+    Only top-level objects that parse as JSON dicts are reported. An unclosed
+    ``{`` in prose nests everything after it; :meth:`trailing` still recovers a
+    final object from the innermost closed span in that case. That recovery is
+    best effort: an unclosed ``{`` followed by a stray ``"`` on the same line
+    (``' {"{"s": "x}"}'``) leaves the scan inside a string and hides the
+    trailing object. For a complete text, :func:`parse_trailing_json` and
+    :func:`split_trailing_json` scan backwards from the end instead, which has
+    no such blind spot.
     """
-    import re
-    import json
 
-    if not text:
-        return None
+    def __init__(self):
+        self.objects: List[Dict] = []
+        self._offset = 0  # absolute position of the next character fed
+        self._parts: List[str] = []  # text of the open candidate from earlier chunks, from its outermost "{"
+        self._parts_start = 0
+        self._stack: List[int] = []  # absolute positions of the open "{"s
+        self._in_string = False
+        self._escape = False
+        self._last: Optional[Tuple[int, int]] = None  # span of the last reported object
+        self._last_closed: Optional[Tuple[int, int]] = None  # span of the last closed brace pair at any depth
+        self._clean_after_last = False
+        self._clean_after_closed = False
 
-    # Find the last JSON object in the text (greedy match to the last closing brace)
-    match = re.search(r"(\{.*\})\s*$", text, flags=re.S)
-    if not match:
-        return None
+    def feed(self, chunk: str) -> List[Dict]:
+        """Scan the next piece of text; returns the objects completed within it."""
+        found: List[Dict] = []
+        if not chunk:
+            return found
+        pos, n, base = 0, len(chunk), self._offset
+        while pos < n:
+            if not self._stack:
+                brace = chunk.find("{", pos)
+                end = n if brace == -1 else brace
+                if (self._clean_after_last or self._clean_after_closed) and chunk[pos:end].strip():
+                    self._clean_after_last = self._clean_after_closed = False
+                if brace == -1:
+                    break
+                self._stack.append(base + brace)
+                self._parts = []
+                self._parts_start = base + brace
+                self._clean_after_last = self._clean_after_closed = False
+                pos = brace + 1
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                match = _STRING_EVENTS.search(chunk, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                char = match.group()
+                if char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                else:
+                    self._abandon()
+            else:
+                match = _OBJECT_EVENTS.search(chunk, pos)
+                end = n if match is None else match.start()
+                if self._clean_after_closed and chunk[pos:end].strip():
+                    self._clean_after_closed = False
+                if match is None:
+                    break
+                pos = match.end()
+                char = match.group()
+                if char == '"':
+                    self._in_string = True
+                    self._clean_after_closed = False
+                elif char == "{":
+                    self._stack.append(base + match.start())
+                    self._clean_after_closed = False
+                elif char == "}":
+                    self._close(base + match.start(), chunk, base, found)
+        if self._stack:
+            # Keep the open candidate's text from this chunk; one copy per chunk keeps the scan linear
+            self._parts.append(chunk[max(self._parts_start - base, 0):])
+        self._offset += n
+        return found
+
+    def _text(self, start: int, end: int, chunk: str, base: int) -> str:
+        """Text between absolute positions ``start`` and ``end``; ``chunk`` (starting at ``base``) is being scanned."""
+        if start >= base:
+            return chunk[start - base:end - base]
+        return "".join(self._parts)[start - self._parts_start:] + chunk[:end - base]
+
+    def _abandon(self) -> None:
+        self._stack.clear()
+        self._parts = []
+        self._in_string = False
+
+    def _close(self, end: int, chunk: str, base: int, found: List[Dict]) -> None:
+        start = self._stack.pop()
+        self._last_closed = (start, end + 1)
+        self._clean_after_closed = True
+        if self._stack:
+            return
+        parsed = _loads_dict(self._text(start, end + 1, chunk, base))
+        self._parts = []
+        if parsed is not None:
+            self.objects.append(parsed)
+            found.append(parsed)
+            self._last = (start, end + 1)
+            self._clean_after_last = True
 
-    candidate = match.group(1)
+    def trailing(self) -> Optional[Dict]:
+        """The object the text fed so far ends with (trailing whitespace allowed), or None."""
+        return self._trailing()[1]
+
+    def _trailing(self) -> Tuple[Optional[int], Optional[Dict]]:
+        if self._last is not None and self._clean_after_last:
+            return self._last[0], self.objects[-1]
+        if self._stack and self._last_closed is not None and self._clean_after_closed:
+            start, end = self._last_closed
+            parsed = _loads_dict("".join(self._parts)[start - self._parts_start:end - self._parts_start])
+            if parsed is not None:
+                return start, parsed
+        return None, None
+
+
+def _loads_dict(candidate: str) -> Optional[Dict]:
     try:
-        return json.loads(candidate)
-    except Exception:
+        parsed = json.loads(candidate)
+    except ValueError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _escaped(text: str, quote: int) -> bool:
+    """Whether the ``"`` at ``quote`` is preceded by an odd number of backslashes."""
+    run = quote
+    while run > 0 and text[run - 1] == "\\":
+        run -= 1
+    return (quote - run) % 2 == 1
+
+
+def _trailing_span(text: str) -> Tuple[Optional[int], Optional[Dict]]:
+    """Find the object ``text`` ends with by matching its last ``}`` backwards; ``(start, object)`` or ``(None, None)``.
+
+    Inside a valid JSON object every unescaped ``"`` delimits a string, so walking
+    back from the final ``}`` with string and brace tracking reaches exactly its
+    opening ``{``, whatever unbalanced braces or quotes the prose before it
+    holds. Each region is searched once, so the pass is linear.
+    """
+    end = len(text.rstrip())
+    if not end or text[end - 1] != "}":
+        return None, None
+    depth, pos = 0, end
+    # Position of the nearest earlier occurrence of each event character
+    last = {char: text.rfind(char, 0, end) for char in '{}"'}
+    while True:
+        pos = max(last.values())
+        if pos < 0:
+            return None, None
+        char = text[pos]
+        last[char] = text.rfind(char, 0, pos)
+        if char == "}":
+            depth += 1
+        elif char == "{":
+            depth -= 1
+            if depth == 0:
+                parsed = _loads_dict(text[pos:end])
+                return (pos, parsed) if parsed is not None else (None, None)
+        else:
+            # A closing quote: skip back over the string to its opening quote
+            quote = last['"']
+            while quote >= 0 and _escaped(text, quote):
+                quote = text.rfind('"', 0, quote)
+            if quote < 0:
+                return None, None
+            last['"'] = text.rfind('"', 0, quote)
+            for brace in "{}":
+                if last[brace] > quote:
+                    last[brace] = text.rfind(brace, 0, quote)
+
+
+def parse_trailing_json(text: str) -> Optional[Dict]:
+    """Parse the JSON object a block of text ends with (trailing whitespace allowed).
+
+    Returns the parsed dict if successful, otherwise None. Runs in linear time,
+    scanning back from the end of the text, so braces and quotes in the prose
+    before the object do not matter.
+    """
+    if not text:
         return None
+    return _trailing_span(text)[1]
+
+
+def split_trailing_json(text: str) -> Tuple[str, Optional[Dict]]:
+    """Split text into its body (right-stripped) and trailing JSON object; ``(text, None)`` when there is none."""
+    start, trailer = _trailing_span(text or "")
+    if trailer is None:
+        return text, None
+    return text[:start].rstrip(), trailer
+
+
+def extract_json_objects(text: str) -> List[Dict]:
+    """Every top-level JSON object embedded in ``text``, in order (e.g. all worker trailers in a transcript)."""
+    scanner = JsonObjectScanner()
+    scanner.feed(text or "")
+    return scanner.objects
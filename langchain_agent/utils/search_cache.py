@@ -0,0 +1,195 @@
+"""Disk-backed, TTL-aware cache for web search results.
+
+Entries are keyed on the tool name plus the normalized query and live in a
+small SQLite database so they survive across runs. A bounded in-memory front
+serves hot keys without touching the disk; the on-disk table is kept under
+``max_entries`` by evicting the least recently used rows. Reads record their
+access time in memory and write it back in batches of ``touch_batch``, on the
+next ``set`` and on ``close`` (the process-wide cache closes at exit).
+"""
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from langchain_agent.utils.config import Config
+
+
+def normalize_query(query: str) -> str:
+    """Lower-case and collapse whitespace so trivially different queries share a key."""
+    return " ".join((query or "").lower().split())
+
+
+class SearchCache:
+    """SQLite-backed search result cache with TTL, LRU eviction and hit/miss counters."""
+
+    def __init__(self, path: str, ttl_seconds: int = 86400, max_entries: int = 5000, memory_entries: int = 512, touch_batch: int = 64):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.touch_batch = max(1, touch_batch)
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._closed = False
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " key TEXT PRIMARY KEY,"
+            " tool TEXT NOT NULL,"
+            " query TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_access ON search_cache(last_access)")
+
+    @staticmethod
+    def make_key(tool: str, query: str) -> str:
+        """Return the cache key for a tool/query pair."""
+        raw = f"{tool}\x00{normalize_query(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, result: str, created_at: float) -> None:
+        self._memory[key] = (result, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _write_touches(self) -> None:
+        # Caller holds the lock (and, from ``set``, an open transaction)
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE search_cache SET last_access = ? WHERE key = ?",
+                [(ts, k) for k, ts in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _touch(self, key: str, now: float) -> None:
+        self._touched[key] = now
+        if len(self._touched) >= self.touch_batch:
+            self._conn.execute("BEGIN")
+            try:
+                self._write_touches()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def get(self, tool: str, query: str) -> Optional[str]:
+        """Return the cached result for ``tool``/``query`` or None on a miss or expired entry."""
+        key = self.make_key(tool, query)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry[1], now):
+                self._memory.move_to_end(key)
+                self._touch(key, now)
+                self.hits += 1
+                return entry[0]
+
+            row = self._conn.execute(
+                "SELECT result, created_at FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._expired(row[1], now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self.misses += 1
+                return None
+
+            self._touch(key, now)
+            self._remember(key, row[0], row[1])
+            self.hits += 1
+            return row[0]
+
+    def set(self, tool: str, query: str, result: str) -> None:
+        """Store a result and evict the least recently used rows beyond ``max_entries``."""
+        key = self.make_key(tool, query)
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._write_touches()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, tool, query, result, created_at, last_access)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, tool, normalize_query(query), result, now, now),
+                )
+                if self.max_entries > 0:
+                    self._conn.execute(
+                        "DELETE FROM search_cache WHERE key IN ("
+                        " SELECT key FROM search_cache ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._remember(key, result, now)
+
+    def clear(self) -> None:
+        """Drop every cached entry and reset the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM search_cache")
+            self._memory.clear()
+            self._touched.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM search_cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and the current number of stored entries."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self)}
+
+    def close(self) -> None:
+        """Write back pending access times and close the database; later calls do nothing."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                self._write_touches()
+            finally:
+                self._conn.close()
+
+
+_SEARCH_CACHE: Optional[SearchCache] = None
+_SEARCH_CACHE_LOCK = threading.Lock()
+
+
+def get_search_cache() -> Optional[SearchCache]:
+    """Return the process-wide search cache, or None when caching is bypassed in Config."""
+    global _SEARCH_CACHE
+    if not Config.SEARCH_CACHE_ENABLED:
+        return None
+    if _SEARCH_CACHE is None:
+        with _SEARCH_CACHE_LOCK:
+            if _SEARCH_CACHE is None:
+                _SEARCH_CACHE = SearchCache(
+                    Config.SEARCH_CACHE_PATH,
+                    ttl_seconds=Config.SEARCH_CACHE_TTL_SECONDS,
+                    max_entries=Config.SEARCH_CACHE_MAX_ENTRIES,
+                )
+                atexit.register(_SEARCH_CACHE.close)
+    return _SEARCH_CACHE
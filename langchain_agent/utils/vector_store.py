@@ -0,0 +1,226 @@
+"""Append-only vector index on a NumPy memory map.
+
+Vectors are L2-normalized float32 rows in ``<dir>/vectors.f32`` (memory-mapped,
+grown by doubling), and the matching chunk text and metadata are JSON lines in
+``<dir>/chunks.jsonl``. The number of metadata lines is the number of valid
+rows, so a crash between the two writes leaves at most an unused vector slot.
+Search is an exact dot product over the rows of one namespace (a research run),
+or over all rows when no namespace is given.
+
+Adding a chunk that is near-identical (cosine similarity at or above
+``dedupe_threshold``) to a chunk already in its namespace (or earlier in the
+same batch) is skipped. Appends take an exclusive file lock and pick up rows
+written by other processes first, so batch workers in a process pool can share
+one store. The file lock is ``fcntl.flock``, which only exists on POSIX; on
+other platforms (Windows) only threads of one process are serialized, so a
+store must not be shared by several processes there.
+"""
+import json
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: no cross-process lock
+    fcntl = None
+
+_DTYPE = np.float32
+_ITEM = np.dtype(_DTYPE).itemsize
+
+
+@dataclass
+class Hit:
+    """One search result."""
+
+    score: float
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+class VectorStore:
+    """Memory-mapped, namespace-aware vector index with similarity dedupe."""
+
+    def __init__(self, directory: str, model: str = "", dedupe_threshold: float = 0.95):
+        self.directory = directory
+        self.model = model
+        self.dedupe_threshold = dedupe_threshold
+        self.added = 0
+        self.duplicates = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._vectors_path = os.path.join(directory, "vectors.f32")
+        self._chunks_path = os.path.join(directory, "chunks.jsonl")
+        self._meta_path = os.path.join(directory, "meta.json")
+        self._lock = threading.Lock()
+        self._dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._chunks: List[dict] = []
+        self._namespaces: Dict[str, int] = {}
+        self._row_ns = np.zeros(0, dtype=np.int32)
+        self._offset = 0
+
+        meta = self._read_meta()
+        if meta and meta.get("model", "") != model:
+            # Vectors from another embedding model are not comparable: start over
+            for path in (self._vectors_path, self._chunks_path, self._meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            meta = None
+        if meta:
+            self._dim = int(meta["dim"])
+        with self._locked():
+            self._refresh()
+
+    def __len__(self) -> int:
+        return len(self._chunks)
+
+    # -- storage -----------------------------------------------------------
+
+    def _read_meta(self) -> Optional[dict]:
+        if not os.path.exists(self._meta_path):
+            return None
+        with open(self._meta_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    @contextmanager
+    def _locked(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.directory, ".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _capacity(self) -> int:
+        if self._dim is None or not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // (self._dim * _ITEM)
+
+    def _map(self) -> None:
+        capacity = self._capacity()
+        self._vectors = np.memmap(self._vectors_path, dtype=_DTYPE, mode="r+", shape=(capacity, self._dim)) if capacity else None
+
+    def _ensure_capacity(self, rows: int) -> None:
+        capacity = self._capacity()
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_capacity * self._dim * _ITEM)
+        self._map()
+
+    def _refresh(self) -> None:
+        """Load chunk metadata appended since the last read (by this or another process)."""
+        if self._dim is None:
+            meta = self._read_meta()
+            if not meta:
+                return
+            self._dim = int(meta["dim"])
+        if not os.path.exists(self._chunks_path):
+            return
+        with open(self._chunks_path, encoding="utf-8") as f:
+            f.seek(self._offset)
+            lines = f.readlines()
+            # Only complete lines; a partially written last line is picked up next time
+            if lines and not lines[-1].endswith("\n"):
+                lines.pop()
+            self._offset += sum(len(line.encode("utf-8")) for line in lines)
+        new = [json.loads(line) for line in lines if line.strip()]
+        if new:
+            self._chunks.extend(new)
+            self._row_ns = np.concatenate([self._row_ns, np.array([self._ns_id(c.get("ns", "")) for c in new], dtype=np.int32)])
+        if self._vectors is None or len(self._vectors) < len(self._chunks):
+            self._map()
+
+    def _ns_id(self, namespace: str) -> int:
+        return self._namespaces.setdefault(namespace, len(self._namespaces))
+
+    # -- public API --------------------------------------------------------
+
+    def add(self, vectors: Sequence[Sequence[float]], texts: Sequence[str], metadatas: Sequence[dict], namespace: str = "") -> int:
+        """Append chunks (skipping near-duplicates within ``namespace``); returns how many were stored."""
+        if not texts:
+            return 0
+        matrix = np.asarray(vectors, dtype=_DTYPE)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+
+        with self._locked():
+            self._refresh()
+            if self._dim is None:
+                self._dim = matrix.shape[1]
+                with open(self._meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"dim": self._dim, "model": self.model}, f)
+            elif matrix.shape[1] != self._dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match the store ({self._dim})")
+
+            existing = self._namespace_rows(namespace)
+            stored_best = (existing @ matrix.T).max(axis=0) if len(existing) else np.zeros(len(matrix), dtype=_DTYPE)
+            within_batch = matrix @ matrix.T
+            keep: List[int] = []
+            for i in range(len(matrix)):
+                if stored_best[i] >= self.dedupe_threshold or (keep and within_batch[i, keep].max() >= self.dedupe_threshold):
+                    self.duplicates += 1
+                    continue
+                keep.append(i)
+            if not keep:
+                return 0
+
+            start = len(self._chunks)
+            self._ensure_capacity(start + len(keep))
+            self._vectors[start:start + len(keep)] = matrix[keep]
+            self._vectors.flush()
+            records = [{"ns": namespace, "text": texts[i], **metadatas[i]} for i in keep]
+            with open(self._chunks_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            self._refresh()
+            self.added += len(keep)
+            return len(keep)
+
+    def _namespace_rows(self, namespace: Optional[str]) -> np.ndarray:
+        count = len(self._chunks)
+        if not count or self._vectors is None:
+            return np.zeros((0, self._dim or 0), dtype=_DTYPE)
+        if namespace is None:
+            return self._vectors[:count]
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            return np.zeros((0, self._dim), dtype=_DTYPE)
+        return self._vectors[:count][self._row_ns == ns]
+
+    def search(self, vector: Sequence[float], k: int = 5, namespace: Optional[str] = None, min_score: float = 0.0) -> List[Hit]:
+        """Return the ``k`` most similar chunks in ``namespace`` (all namespaces when None)."""
+        query = np.asarray(vector, dtype=_DTYPE)
+        query = query / (np.linalg.norm(query) or 1)
+        with self._lock:
+            count = len(self._chunks)
+            if not count or self._vectors is None or k <= 0:
+                return []
+            rows = np.arange(count) if namespace is None else np.flatnonzero(self._row_ns == self._namespaces.get(namespace, -1))
+            if not len(rows):
+                return []
+            scores = self._vectors[:count][rows] @ query
+            top = np.argsort(-scores)[:k] if len(rows) <= k else np.argpartition(-scores, k)[:k]
+            top = top[np.argsort(-scores[top])]
+            hits = []
+            for i in top:
+                if scores[i] < min_score:
+                    continue
+                record = dict(self._chunks[rows[i]])
+                hits.append(Hit(score=float(scores[i]), text=record.pop("text"), metadata=record))
+            return hits
+
+    def stats(self) -> Dict[str, int]:
+        return {"chunks": len(self._chunks), "added": self.added, "duplicates": self.duplicates, "namespaces": len(self._namespaces)}
@@ -1,62 +1,274 @@
-from langchain_agent.agents.base_agent import build_research_graph
 from langchain_agent.utils.config import Config
 import os
-from langchain_core.messages import HumanMessage
 import argparse
-from langchain_agent.utils.logger import setup_logger
+import asyncio
+from contextlib import contextmanager
+from langchain_agent.utils.logger import log_context, setup_logger
+from langchain_agent.utils.search_cache import get_search_cache
+from langchain_agent.utils.checkpoint import RunAlreadyFinished, aget_checkpointer, apending_run_prompt, get_checkpointer, new_run_id, pending_run_prompt, run_config
+
+# LangGraph, LangChain and the model clients are imported inside the functions that
+# need them, so `main.py --help` and argument errors return without loading them.
 
 
 def parse_args():
     p = argparse.ArgumentParser(description="Run the SaaS researcher graph")
     p.add_argument("--log-level", default=None, help="Logging level (DEBUG, INFO, WARNING, ERROR)")
+    p.add_argument("--async", dest="use_async", action="store_true", help="Run the graph with ainvoke so tools and LLM calls execute concurrently")
+    p.add_argument("--mode", choices=["router", "planner"], default=None, help="Orchestration mode (default: ORCHESTRATION_MODE from config)")
+    p.add_argument("--stream", action="store_true", help="Stream node transitions, tool calls and report tokens to the console as they happen")
+    p.add_argument("--run-id", default=None, help="Checkpoint thread id; re-run with the same id to resume an interrupted run")
+    p.add_argument("--batch", metavar="FILE", default=None, help="Research every niche in FILE (one per line, '-' for stdin) instead of prompting")
+    p.add_argument("--workers", type=int, default=Config.BATCH_WORKERS, help="Number of concurrent batch workers")
+    p.add_argument("--executor", choices=["thread", "process"], default=Config.BATCH_EXECUTOR, help="Batch worker pool type")
+    cassette = p.add_mutually_exclusive_group()
+    cassette.add_argument("--record", metavar="CASSETTE", default=None, help="Record every model and search call of this run to CASSETTE (.jsonl.gz)")
+    cassette.add_argument("--replay", metavar="CASSETTE", default=None, help="Answer model and search calls from CASSETTE instead of the live backends")
+    p.add_argument("--serve", action="store_true", help="Run the HTTP research service (job queue with live progress streaming) instead of prompting")
+    p.add_argument("--host", default=Config.SERVER_HOST, help="Address the HTTP service listens on")
+    p.add_argument("--port", type=int, default=Config.SERVER_PORT, help="Port of the HTTP service (0 picks a free port)")
+    p.add_argument("--refresh", action="store_true", help="Research the niche from scratch instead of reusing fresh findings and search results stored by earlier runs")
+    p.add_argument("--no-graph-image", dest="graph_image", action="store_false", default=Config.GRAPH_IMAGE_ENABLED, help="Skip rendering the graph PNG (it is otherwise re-rendered only when the graph changes)")
     return p.parse_args()
 
+
+def log_cache_stats(logger):
+    from langchain_agent.utils.evidence import get_evidence_ingestor
+    from langchain_agent.utils.llm_cache import get_llm_cache
+
+    search_cache = get_search_cache()
+    if search_cache is not None:
+        logger.info("Search cache stats: %s", search_cache.stats())
+    llm_cache = get_llm_cache()
+    if llm_cache is not None:
+        logger.info("LLM cache stats: %s", llm_cache.stats())
+    for settings, llm in list(Config._LLM_INSTANCES.items()):
+        pool = getattr(llm, "pool", None)
+        if pool is not None:
+            logger.info("LLM endpoint stats for %s: %s (%d hedged calls)", dict(settings)["model"], pool.stats(), pool.hedges)
+    ingestor = get_evidence_ingestor()
+    if ingestor is not None:
+        ingestor.flush(timeout=30)
+        logger.info("Evidence store stats: %s", ingestor.stats())
+
+
+def configure_cassette(args):
+    """Apply --record/--replay to Config before any model or search client is created."""
+    if args.record or args.replay:
+        Config.CASSETTE_MODE = "record" if args.record else "replay"
+        Config.CASSETTE_PATH = args.record or args.replay
+
+
+def log_cassette_report(logger):
+    from langchain_agent.utils.cassette import get_cassette
+
+    cassette = get_cassette()
+    if cassette is not None:
+        cassette.close()
+        print(cassette.report())
+        if cassette.misses:
+            logger.warning("Replay diverged from cassette %s: %d calls were not recorded", cassette.path, len(cassette.misses))
+
+
+def run_batch_mode(args, logger):
+    from langchain_agent.batch import format_summary, read_niches, run_batch, write_summary
+
+    niches = read_niches(args.batch)
+    logger.info("Starting batch of %d niches", len(niches))
+    results = run_batch(niches, workers=args.workers, executor=args.executor, mode=args.mode)
+    print(format_summary(results))
+    logger.info("Batch summary written to: %s", write_summary(results))
+    log_cache_stats(logger)
+
+
+def run_server_mode(args, logger):
+    from langchain_agent.server import serve
+
+    def ready(url):
+        print(f"Serving research jobs on {url}", flush=True)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.mode, ready=ready))
+    except KeyboardInterrupt:
+        logger.info("Research service stopped")
+    log_cache_stats(logger)
+
+
 def main():
     args = parse_args()
 
     # Ensure config/dirs and initialize logger
     Config.validate()
     logger = setup_logger("saas_research", level=args.log_level or Config.LOG_LEVEL)
+    configure_cassette(args)
+    if args.refresh:
+        Config.KNOWLEDGE_SEED = False
+
+    if Config.METRICS_PORT:
+        from langchain_agent.utils.instrumentation import start_metrics_server
+
+        start_metrics_server(Config.METRICS_PORT)
+
+    if args.serve:
+        try:
+            run_server_mode(args, logger)
+        finally:
+            log_cassette_report(logger)
+        return
+
+    if args.batch:
+        try:
+            run_batch_mode(args, logger)
+        finally:
+            log_cassette_report(logger)
+        return
 
     logger.info("Starting research graph run")
 
     try:
+        from langchain_agent.agents.base_agent import build_research_graph
+
         logger.info("Building research graph...")
-        research_graph = build_research_graph()
+        research_graph = build_research_graph(args.mode)
 
-        graph_image_path = os.path.join(Config.GRAPHS_DIR, "research_graph.png")
-        logger.info("Rendering graph to PNG: %s", graph_image_path)
-        png_bytes = research_graph.get_graph().draw_mermaid_png()
-        with open(graph_image_path, "wb") as f:
-            f.write(png_bytes)
+        if args.graph_image:
+            from langchain_agent.utils.graph_image import save_graph_image
 
-        logger.info("Graph visualization saved to: %s", os.path.abspath(graph_image_path))
+            graph_image_path = save_graph_image(research_graph, os.path.join(Config.GRAPHS_DIR, "research_graph.png"))
+            if graph_image_path:
+                logger.info("Graph visualization saved to: %s", os.path.abspath(graph_image_path))
 
     except Exception as e:
         logger.exception("Failed to build or save graph: %s", e)
         raise
 
     try:
-        user_prompt = input("Enter the niche or industry to which you about to research: ")
-        logger.info("Invoking research graph with initial prompt")
-        invoke_result = research_graph.invoke({"messages": [HumanMessage(content=user_prompt)]})
-        logger.info("Invocation completed")
-        logger.debug("Invocation result: %s", invoke_result)
-
-        # If graph returns any messages, log them step by step
-        if isinstance(invoke_result, dict) and "messages" in invoke_result:
-            for i, msg in enumerate(invoke_result["messages"]):
-                content = getattr(msg, "content", str(msg))
-                name = getattr(msg, "name", None)
-                logger.info("Message %d from %s: %s", i, name or "unknown", content)
+        if args.use_async:
+            asyncio.run(arun_research(research_graph, args, logger))
         else:
-            logger.info("No messages returned by invocation; raw result: %s", invoke_result)
+            with get_checkpointer() as checkpointer:
+                run_research(research_graph.copy(update={"checkpointer": checkpointer}), args, logger)
+        log_cache_stats(logger)
 
+    except RunAlreadyFinished as e:
+        logger.error("%s", e)
+        raise SystemExit(2)
     except Exception as e:
         logger.exception("Error during graph invocation: %s", e)
         raise
+    finally:
+        log_cassette_report(logger)
+
+
+def _start_or_resume(run_id, resume_prompt, logger):
+    """Return (user_prompt, graph_input); graph_input is None when resuming a checkpointed run."""
+    if resume_prompt is not None:
+        logger.info("Resuming run %s from its last completed step", run_id)
+        return resume_prompt, None
+    from langchain_agent.utils.knowledge_base import initial_state
+
+    user_prompt = input("Enter the niche or industry to which you about to research: ")
+    return user_prompt, initial_state(user_prompt)
+
+
+def _report_result(invoke_result, user_prompt, logger):
+    from langchain_agent.utils.reports import final_report_text, report_path, save_report
+
+    logger.info("Invocation completed")
+    logger.debug("Invocation result keys: %s", list(invoke_result) if isinstance(invoke_result, dict) else type(invoke_result).__name__)
+
+    # If graph returns any messages, log them step by step
+    if isinstance(invoke_result, dict) and "messages" in invoke_result:
+        for i, msg in enumerate(invoke_result["messages"]):
+            content = getattr(msg, "content", str(msg))
+            name = getattr(msg, "name", None)
+            logger.info("Message %d from %s: %s", i, name or "unknown", content)
+    else:
+        logger.info("No messages returned by invocation; raw result: %s", invoke_result)
+
+    if isinstance(invoke_result, dict) and invoke_result.get("router_stats"):
+        stats = invoke_result["router_stats"]
+        logger.info(
+            "Router: %d steps, %d fast-path decisions (router LLM calls saved), %d LLM router calls",
+            invoke_result.get("steps", 0), stats.get("fast_path", 0), stats.get("llm_calls", 0),
+        )
+
+    report = final_report_text(invoke_result)
+    if report:
+        logger.info("Report saved to: %s", save_report(report_path(user_prompt), report))
+
+
+@contextmanager
+def traced_run(run_id, logger):
+    """Yield the callback handlers for a run; prints its timing/token summary when the run ends."""
+    if not Config.TRACE_ENABLED:
+        yield None
+        return
+    from langchain_agent.utils.instrumentation import RunTracer
+
+    tracer = RunTracer(run_id, os.path.join(Config.TRACE_DIR, f"{run_id}.jsonl"))
+    try:
+        with tracer.activate():
+            yield [tracer]
+    finally:
+        tracer.close()
+        print(tracer.format_summary())
+        logger.info("Run trace written to: %s", tracer.trace_path)
+
+
+@contextmanager
+def forgetting_run(run_id):
+    """Release the knowledge base's per-run bookkeeping when the run ends, even if it never reached its report."""
+    try:
+        yield
+    finally:
+        from langchain_agent.utils.knowledge_base import forget_run
+
+        forget_run(run_id)
+
+
+def run_research(research_graph, args, logger):
+    from langchain_agent.streaming import stream_research
+    from langchain_agent.utils.reports import report_path
+
+    run_id = args.run_id or new_run_id()
+    user_prompt, graph_input = _start_or_resume(run_id, pending_run_prompt(research_graph, run_id), logger)
+    logger.info("Run id: %s (pass --run-id %s to resume this run if it is interrupted)", run_id, run_id)
+
+    with traced_run(run_id, logger) as callbacks, log_context(run_id), forgetting_run(run_id):
+        config = run_config(run_id, callbacks)
+        if args.stream:
+            report_file = report_path(user_prompt)
+            logger.info("Streaming research graph run; report will be written to %s", report_file)
+            if not stream_research(research_graph, user_prompt, report_file, config=config, resume=graph_input is None):
+                logger.warning("Run finished without streaming a final report")
+            return
+
+        logger.info("Invoking research graph with initial prompt")
+        _report_result(research_graph.invoke(graph_input, config=config), user_prompt, logger)
+
+
+async def arun_research(research_graph, args, logger):
+    from langchain_agent.streaming import astream_research
+    from langchain_agent.utils.reports import report_path
+
+    async with aget_checkpointer() as checkpointer:
+        research_graph = research_graph.copy(update={"checkpointer": checkpointer})
+        run_id = args.run_id or new_run_id()
+        user_prompt, graph_input = _start_or_resume(run_id, await apending_run_prompt(research_graph, run_id), logger)
+        logger.info("Run id: %s (pass --run-id %s to resume this run if it is interrupted)", run_id, run_id)
 
+        with traced_run(run_id, logger) as callbacks, log_context(run_id), forgetting_run(run_id):
+            config = run_config(run_id, callbacks)
+            if args.stream:
+                report_file = report_path(user_prompt)
+                logger.info("Streaming research graph run; report will be written to %s", report_file)
+                if not await astream_research(research_graph, user_prompt, report_file, config=config, resume=graph_input is None):
+                    logger.warning("Run finished without streaming a final report")
+                return
 
+            logger.info("Invoking research graph with initial prompt")
+            _report_result(await research_graph.ainvoke(graph_input, config=config), user_prompt, logger)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from benchmarks.fakes import ScriptedChatModel
+from langchain_agent.tools import analysis
+from langchain_agent.tools.analysis import evaluate_idea
+from langchain_agent.utils import concurrency, llm_cache
+from langchain_agent.utils.config import Config
+
+IDEAS = [f"Scheduling assistant for {trade}" for trade in ("dentists", "plumbers", "tutors", "vets", "salons")]
+
+
+class CountingEvaluator:
+    """Stands in for the structured-output model: records prompts and peak concurrency, fails on request."""
+
+    def __init__(self, fail_on=()):
+        self.prompts = []
+        self.fail_on = fail_on
+        self.current = self.peak = 0
+        self._lock = threading.Lock()
+
+    def _evaluate(self, prompt):
+        self.prompts.append(prompt)
+        if any(word in prompt for word in self.fail_on):
+            raise ValueError("malformed structured output")
+        return {"pain_killer": True, "pain_killer_reasoning": "urgent", "bootstrappable": True,
+                "bootstrapping_reasoning": "small team", "willingness_to_pay": "medium", "payment_reasoning": "budgets exist"}
+
+    def _enter(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def _exit(self):
+        with self._lock:
+            self.current -= 1
+
+    def invoke(self, prompt):
+        self._enter()
+        time.sleep(0.02)
+        self._exit()
+        return self._evaluate(prompt)
+
+    async def ainvoke(self, prompt):
+        self._enter()
+        await asyncio.sleep(0.02)
+        self._exit()
+        return self._evaluate(prompt)
+
+
+@pytest.fixture
+def evaluator(monkeypatch):
+    fake = CountingEvaluator(fail_on=("plumbers",))
+    monkeypatch.setattr(analysis, "_idea_evaluator", lambda: fake)
+    monkeypatch.setattr(Config, "TOOL_CONCURRENCY", {"analysis": 2})
+    monkeypatch.setattr(concurrency, "_SLOTS", {})
+    return fake
+
+
+def test_ideas_are_evaluated_together_once_each(evaluator):
+    report = evaluate_idea.invoke({"ideas": IDEAS + ["scheduling  assistant for DENTISTS"]})
+    assert len(evaluator.prompts) == 5  # the respelled duplicate is not evaluated again
+    assert report.count("## Idea") == 6 and "- Willingness to pay: medium - budgets exist" in report
+    assert "## Idea 2: Scheduling assistant for plumbers\nError in evaluate_idea" in report
+    assert report.count("Pain killer: Yes") == 5
+    # Every evaluation holds an "analysis" slot
+    assert evaluator.peak == 2
+
+
+def test_async_tool_holds_the_analysis_limit(evaluator):
+    report = asyncio.run(evaluate_idea.ainvoke({"ideas": IDEAS}))
+    assert len(evaluator.prompts) == 5 and evaluator.peak == 2
+    assert report.count("Pain killer: Yes") == 4
+    assert evaluate_idea.invoke({"ideas": ["  "]}) == "Error in evaluate_idea: no idea given"
+
+
+class CountingModel(ScriptedChatModel):
+    calls: list = []
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self.calls.append(1)
+        return super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+
+def test_repeat_evaluations_come_from_the_llm_cache_only_when_opted_in(tmp_path, monkeypatch):
+    model = CountingModel(calls=[])
+    monkeypatch.setattr(Config, "get_chat_llm", staticmethod(lambda role=None: model))
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
+    monkeypatch.setattr(llm_cache, "_LLM_CACHE", None)
+
+    def evaluate_twice():
+        analysis._idea_evaluator.cache_clear()
+        analysis.evaluate_ideas(IDEAS[:2])
+        assert all(analysis.evaluate_ideas([idea.replace(" ", "  ") for idea in IDEAS[:2]]))
+
+    evaluate_twice()
+    assert len(model.calls) == 2
+
+    # With the scope opted out nothing is remembered between calls
+    monkeypatch.setattr(Config, "LLM_CACHE_SCOPES", frozenset())
+    evaluate_twice()
+    assert len(model.calls) == 6
+    analysis._idea_evaluator.cache_clear()
@@ -0,0 +1,112 @@
+import json
+import os
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, StateGraph
+
+from benchmarks.fakes import ScriptedChatModel
+from langchain_agent import batch
+from langchain_agent.utils import agents
+from langchain_agent.utils.agents import State, make_supervisor_node, make_worker_node
+from langchain_agent.utils.checkpoint import get_checkpointer, run_config
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.knowledge_base import initial_state
+from langchain_agent.utils.reports import report_path, save_report
+
+MEMBERS = ["saas_finder", "market", "research"]
+
+
+def _agent(name, calls):
+    def run(state):
+        # The first message is the worker's system prompt; the niche comes next
+        calls.append((state["messages"][1].content, name))
+        trailer = {"summary": f"{name} done", "findings": [], "next": "FINISH", "confidence": "high"}
+        return {"messages": list(state["messages"]) + [AIMessage(content=f"{name} findings\n{json.dumps(trailer)}")]}
+
+    return RunnableLambda(run)
+
+
+@pytest.fixture
+def graph(tmp_path, monkeypatch):
+    calls = []
+    builder = StateGraph(State)
+    supervisor = make_supervisor_node(ScriptedChatModel(), MEMBERS)
+
+    def flaky_supervisor(state):
+        # Worker failures are reported back to the supervisor; a broken graph is what fails a niche
+        if "broken" in state["messages"][0].content:
+            raise RuntimeError("supervisor crashed")
+        return supervisor.invoke(state)
+
+    builder.add_node("supervisor", RunnableLambda(flaky_supervisor), destinations=(*MEMBERS, END))
+    for name in MEMBERS:
+        builder.add_node(name, make_worker_node(name, _agent(name, calls), "system"), destinations=("supervisor",))
+    builder.add_edge(START, "supervisor")
+    # research_niche attaches its own checkpointer for each run
+    compiled = builder.compile()
+    compiled.calls = calls
+
+    monkeypatch.setattr(Config, "CHECKPOINT_PATH", str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setattr(Config, "TRACE_ENABLED", False)
+    monkeypatch.setattr(Config, "REPORTS_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(agents, "remember_run", lambda messages, report: None)
+    monkeypatch.setattr(batch, "_get_graph", lambda mode: compiled)
+    return compiled
+
+
+def test_report_path_normalizes_the_niche_once():
+    assert report_path("  CRM for   Dentists ") == report_path("crm for dentists")
+    assert report_path("CRM for dentists") != report_path("CRM for vets")
+    assert os.path.basename(report_path("CRM for dentists")).startswith("crm-for-dentists-")
+
+
+def test_read_niches_drops_comments_and_duplicates(tmp_path):
+    source = tmp_path / "niches.txt"
+    source.write_text("# niches\nCRM for dentists\n\ncrm  for DENTISTS\nInvoicing for plumbers\n", encoding="utf-8")
+    assert batch.read_niches(str(source)) == ["CRM for dentists", "Invoicing for plumbers"]
+
+
+def test_batch_skips_finished_niches_and_reports_failures(graph, tmp_path):
+    save_report(report_path("CRM for dentists"), "# Earlier report")
+    niches = ["CRM for dentists", "Invoicing for plumbers", "broken niche"]
+
+    results = batch.run_batch(niches, workers=2)
+    assert [(r["niche"], r["status"]) for r in results] == [
+        ("CRM for dentists", "skipped"), ("Invoicing for plumbers", "finished"), ("broken niche", "failed"),
+    ]
+    assert "supervisor crashed" in results[2]["error"]
+    assert {niche for niche, _ in graph.calls} == {"Invoicing for plumbers"}
+    with open(results[1]["report_path"], encoding="utf-8") as f:
+        assert f.read().startswith("# ")
+    assert not os.path.exists(results[2]["report_path"])
+
+    summary = batch.format_summary(results)
+    assert summary.splitlines()[0].split() == ["niche", "status", "seconds"]
+    assert "Invoicing for plumbers  finished" in summary
+    assert summary.splitlines()[-1] == "failed: 1, finished: 1, skipped: 1"
+    with open(batch.write_summary(results), encoding="utf-8") as f:
+        assert json.load(f) == results
+
+    # Re-running the batch only retries the niche that failed
+    calls = len(graph.calls)
+    assert [r["status"] for r in batch.run_batch(niches, workers=2)] == ["skipped", "skipped", "failed"]
+    assert len(graph.calls) == calls
+
+
+def test_interrupted_niche_resumes_from_its_checkpoint(graph):
+    niche = "Invoicing for plumbers"
+    thread_id = f"batch-{os.path.splitext(os.path.basename(report_path(niche)))[0]}"
+    with get_checkpointer() as checkpointer:
+        graph.copy(update={"checkpointer": checkpointer}).invoke(initial_state(niche), config=run_config(thread_id), interrupt_after=["saas_finder"])
+    assert [name for _, name in graph.calls] == ["saas_finder"]
+
+    record = batch.research_niche(niche)
+    assert record["status"] == "finished" and os.path.exists(record["report_path"])
+    assert [name for _, name in graph.calls] == ["saas_finder", "market", "research"]  # saas_finder is not re-run
+
+    # A finished thread whose report was deleted starts over instead of replaying the old state
+    os.remove(record["report_path"])
+    assert batch.research_niche(niche)["status"] == "finished"
+    assert [name for _, name in graph.calls][3:] == MEMBERS
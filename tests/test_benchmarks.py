@@ -0,0 +1,18 @@
+import json
+
+from benchmarks.run import format_results, main
+
+
+def test_benchmark_runs_router_scenario_offline(tmp_path):
+    output = tmp_path / "bench.json"
+    assert main(["--scenarios", "router", "--llm-latency", "0", "--search-latency", "0", "--output", str(output)]) == 0
+
+    report = json.loads(output.read_text())
+    (entry,) = report["scenarios"]
+    (run,) = entry["runs"]
+    assert run["final_report"] and run["steps"] > 0
+    assert run["llm_calls"] > 0 and run["prompt_tokens"] > 0
+    assert run["prompt_tokens_per_hop"]
+
+    table = format_results(report["scenarios"], baseline=report)
+    assert "router" in table and "(+0)" in table
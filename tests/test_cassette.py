@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from langchain_agent.utils.cassette import Cassette, CassetteMiss
+
+
+def _model(cassette, *replies):
+    return GenericFakeChatModel(messages=iter([AIMessage(content=r) for r in replies]), cache=cassette)
+
+
+def _prompt(text):
+    # LangGraph gives every message a fresh uuid, so ids must not affect matching
+    return [HumanMessage(content=text, id=str(object()))]
+
+
+def test_record_then_replay_serves_calls_in_order(tmp_path):
+    path = str(tmp_path / "session.jsonl.gz")
+    recorder = Cassette(path, mode="record")
+    llm = _model(recorder, "first", "second", "other")
+    assert [llm.invoke(_prompt("q")).content for _ in range(2)] == ["first", "second"]
+    assert llm.invoke(_prompt("different")).content == "other"
+    assert recorder.search("web_search", "Dental  Clinics", lambda: "results") == "results"
+    recorder.close()
+    assert recorder.recorded == 4
+
+    player = Cassette(path, mode="replay")
+    llm = _model(player)  # raises StopIteration if the live model were called
+    assert [llm.invoke(_prompt("q")).content for _ in range(3)] == ["first", "second", "second"]
+    assert llm.invoke(_prompt("different")).response_metadata["llm_cache"] == "cassette"
+    assert asyncio.run(player.asearch("web_search", "dental clinics", lambda: None)) == "results"
+    assert player.misses == [] and player.unused() == 0
+    assert "replayed 5 calls, 0 misses" in player.report()
+
+
+def test_replay_reports_divergence(tmp_path):
+    path = str(tmp_path / "session.jsonl.gz")
+    recorder = Cassette(path, mode="record")
+    _model(recorder, "answer").invoke(_prompt("q"))
+    recorder.close()
+
+    strict = Cassette(path, mode="replay")
+    with pytest.raises(CassetteMiss):
+        _model(strict).invoke(_prompt("a new prompt"))
+
+    lenient = Cassette(path, mode="replay", strict=False)
+    assert _model(lenient, "live").invoke(_prompt("a new prompt")).content == "live"
+    assert lenient.search("web_search", "new query", lambda: "live results") == "live results"
+    assert [(m["kind"], m["request"]) for m in lenient.misses] == [("llm", "a new prompt"), ("search", "new query")]
+    assert lenient.unused() == 1
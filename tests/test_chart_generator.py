@@ -0,0 +1,68 @@
+import threading
+
+import pytest
+
+from langchain_agent.tools.chart_generator import ChartGenerator
+
+
+def test_all_chart_types_render(tmp_path):
+    charts = ChartGenerator(str(tmp_path), fmt="svg")
+    paths = [
+        charts.create_bar_chart({"a": 1, "b": 2}, "Bar", "x", "y", "bar.png"),
+        charts.create_pie_chart({"a": 1, "b": 2}, "Pie", "pie"),
+        charts.create_line_chart({"s": [1, 2, 3]}, "Line", "x", "y", "line.png"),
+        charts.create_comparison_chart(["q1", "q2"], {"s1": [1, 2], "s2": [3, 4]}, "Cmp", "x", "y", "cmp"),
+    ]
+    assert [p.rsplit("/", 1)[-1] for p in paths] == ["bar.svg", "pie.svg", "line.svg", "cmp.svg"]
+    for p in paths:
+        with open(p, encoding="utf-8") as f:
+            assert "<svg" in f.read()
+    assert charts.renders == 4
+
+
+def test_identical_chart_is_not_rendered_twice(tmp_path):
+    charts = ChartGenerator(str(tmp_path), dpi=50)
+    first = charts.create_bar_chart({"a": 1}, "Same", "x", "y", "one.png")
+    second = charts.create_bar_chart({"a": 1}, "Same", "x", "y", "two.png")
+    charts.create_bar_chart({"a": 2}, "Same", "x", "y", "three.png")
+    assert charts.renders == 2 and charts.cache_hits == 1
+    with open(first, "rb") as f1, open(second, "rb") as f2:
+        assert f1.read() == f2.read()
+
+
+def test_chart_cache_keeps_the_most_recently_used(tmp_path):
+    charts = ChartGenerator(str(tmp_path), dpi=30, max_cached=2)
+    for value in (1, 2, 1, 3):  # chart 1 is used again before chart 3 arrives
+        charts.create_bar_chart({"a": value}, "Capped", "x", "y", f"chart{value}.png")
+    assert charts.renders == 3 and charts.cache_hits == 1
+    assert len(list(charts.cache_dir.iterdir())) == 2
+
+    charts.create_bar_chart({"a": 1}, "Capped", "x", "y", "again.png")
+    assert charts.cache_hits == 2
+    charts.create_bar_chart({"a": 2}, "Capped", "x", "y", "again.png")  # evicted, so drawn again
+    assert charts.renders == 4
+
+
+def test_concurrent_rendering_from_threads(tmp_path):
+    charts = ChartGenerator(str(tmp_path), dpi=50)
+    errors = []
+
+    def draw(i):
+        try:
+            charts.create_bar_chart({"a": i % 4, "b": 1}, "Threaded", "x", "y", f"chart{i}.png")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=draw, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+    assert charts.renders == 4 and charts.cache_hits == 4
+    assert len(list(tmp_path.glob("chart*.png"))) == 8
+
+
+def test_unsupported_format_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ChartGenerator(str(tmp_path), fmt="bmp")
@@ -0,0 +1,90 @@
+import argparse
+import json
+import logging
+import sqlite3
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, START, StateGraph
+
+import main
+from benchmarks.fakes import ScriptedChatModel
+from langchain_agent.utils import agents
+from langchain_agent.utils.agents import State, make_supervisor_node, make_worker_node
+from langchain_agent.utils.checkpoint import RunAlreadyFinished, get_checkpointer, pending_run_prompt, reset_finished_run, run_config
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.knowledge_base import initial_state
+
+MEMBERS = ["saas_finder", "market", "research"]
+PROMPT = "CRM for dental clinics"
+
+
+def _agent(name, calls):
+    def run(state):
+        calls.append(name)
+        trailer = {"summary": f"{name} done", "findings": [], "next": "FINISH", "confidence": "high"}
+        return {"messages": list(state["messages"]) + [AIMessage(content=f"{name} findings\n{json.dumps(trailer)}")]}
+
+    return RunnableLambda(run)
+
+
+def _graph(checkpointer, calls):
+    builder = StateGraph(State)
+    builder.add_node("supervisor", make_supervisor_node(ScriptedChatModel(), MEMBERS), destinations=(*MEMBERS, END))
+    for name in MEMBERS:
+        builder.add_node(name, make_worker_node(name, _agent(name, calls), "system"), destinations=("supervisor",))
+    builder.add_edge(START, "supervisor")
+    return builder.compile(checkpointer=checkpointer)
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "TRACE_ENABLED", False)
+    monkeypatch.setattr(Config, "REPORTS_DIR", str(tmp_path / "reports"))
+    monkeypatch.setattr(agents, "remember_run", lambda messages, report: None)
+    monkeypatch.setattr("builtins.input", lambda prompt="": pytest.fail("a resumed run must not prompt"))
+    return tmp_path
+
+
+def test_interrupted_run_resumes_from_its_last_step_and_cannot_be_reused(isolated):
+    calls = []
+    with get_checkpointer(str(isolated / "checkpoints.sqlite")) as checkpointer:
+        graph = _graph(checkpointer, calls)
+        graph.invoke(initial_state(PROMPT), config=run_config("run-1"), interrupt_after=["market"])
+        assert calls == ["saas_finder", "market"]
+        assert pending_run_prompt(graph, "run-1") == PROMPT
+        assert pending_run_prompt(graph, "unknown") is None
+
+        args = argparse.Namespace(run_id="run-1", stream=False)
+        main.run_research(graph, args, logging.getLogger("test"))
+        assert calls == ["saas_finder", "market", "research"]  # finished workers are not re-run
+        state = graph.get_state(run_config("run-1")).values
+        assert state["messages"][-1].name == "final_report"
+        assert list((isolated / "reports").iterdir())
+
+        # Reusing the finished id would jump straight to FINISH with the old state
+        with pytest.raises(RunAlreadyFinished):
+            main.run_research(graph, args, logging.getLogger("test"))
+        assert reset_finished_run(graph, "run-1")
+        assert pending_run_prompt(graph, "run-1") is None and not reset_finished_run(graph, "run-1")
+    # Leaving the block closes the connection
+    with pytest.raises(sqlite3.ProgrammingError):
+        checkpointer.conn.execute("SELECT 1")
+
+
+def test_async_run_resumes_a_checkpointed_run(isolated, monkeypatch):
+    import asyncio
+
+    path = isolated / "checkpoints.sqlite"
+    monkeypatch.setattr(Config, "CHECKPOINT_PATH", str(path))
+    calls = []
+    with get_checkpointer(str(path)) as checkpointer:
+        graph = _graph(checkpointer, calls)
+        graph.invoke(initial_state(PROMPT), config=run_config("run-2"), interrupt_after=["saas_finder"])
+
+        args = argparse.Namespace(run_id="run-2", stream=False)
+        asyncio.run(main.arun_research(graph, args, logging.getLogger("test")))
+        assert calls == ["saas_finder", "market", "research"]
+        with pytest.raises(RunAlreadyFinished):
+            asyncio.run(main.arun_research(graph, args, logging.getLogger("test")))
@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from langchain_agent.utils.compaction import SUMMARY_NAME, ContextCompactor, estimate_tokens, is_worker_output
+
+
+def _worker_output(name, i, body_chars=2000):
+    trailer = json.dumps({"summary": f"{name} pass {i}", "findings": ["f1", "f2"], "next": "FINISH", "confidence": "low"})
+    return HumanMessage(content="x" * body_chars + "\n" + trailer, name=name)
+
+
+def _history(hops):
+    messages = [HumanMessage(content="Research CRM for dentists")]
+    workers = ["saas_finder", "market", "research"]
+    for i in range(hops):
+        messages.append(_worker_output(workers[i % 3], i))
+    return messages
+
+
+def test_compaction_keeps_request_and_fits_budget():
+    compactor = ContextCompactor({"market": 1500})
+    view = compactor.compact(_history(12), "market")
+    assert view[0].content == "Research CRM for dentists"
+    assert view[1].name == SUMMARY_NAME
+    assert estimate_tokens(view) <= 1500
+
+
+def test_compaction_prompt_size_is_flat_as_history_grows():
+    compactor = ContextCompactor({"research": 2000})
+    sizes = [estimate_tokens(compactor.compact(_history(hops), "research")) for hops in (10, 20, 40)]
+    assert max(sizes) <= 2000
+    assert max(sizes) - min(sizes) < 600
+
+
+def test_router_sees_digests_of_worker_outputs():
+    view = ContextCompactor({"supervisor": 100000}).compact(_history(3), "supervisor")
+    assert [m.content.splitlines()[0] for m in view[1:]] == ["[saas_finder] saas_finder pass 0", "[market] market pass 1", "[research] research pass 2"]
+
+
+def test_rolling_summary_is_reused_across_hops():
+    compactor = ContextCompactor({"saas_finder": 1500})
+    history = _history(12)
+    compactor.compact(history, "saas_finder")
+    compactor.compact(history, "saas_finder")
+    assert compactor.summaries_computed == 1
+    assert compactor.summaries_reused == 1
+
+
+def test_retrieval_roles_see_digests_of_other_workers():
+    compactor = ContextCompactor({"market": 100000}, retrieval_roles=frozenset({"market"}))
+    view = compactor.compact(_history(3), "market")
+    assert [m.content.splitlines()[0] for m in view[1:] if m.name != "market"] == ["[saas_finder] saas_finder pass 0", "[research] research pass 2"]
+    assert view[2].content.startswith("x" * 100)  # its own latest output stays verbatim
+
+
+class _AsyncOnlySummarizer:
+    """A summarizer that fails if the blocking path is taken."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        raise AssertionError("async compaction must not block on invoke")
+
+    async def ainvoke(self, prompt):
+        self.calls += 1
+        return AIMessage(content="summary of earlier findings")
+
+
+def test_async_compaction_awaits_the_summarizer():
+    summarizer = _AsyncOnlySummarizer()
+    compactor = ContextCompactor({"market": 1500}, summarizer=summarizer)
+    view = asyncio.run(compactor.acompact(_history(12), "market"))
+    assert summarizer.calls == 1
+    assert view[1].name == SUMMARY_NAME and "summary of earlier findings" in view[1].content
+    # The async path shares the rolling-summary cache with the sync one
+    assert compactor.compact(_history(12), "market") == view
+    assert compactor.summaries_reused == 1
+
+
+def test_worker_outputs_exclude_request_plan_summary_and_report():
+    named = [HumanMessage(content="x", name=name) for name in (None, "planner", SUMMARY_NAME, "final_report", "market")]
+    assert [is_worker_output(m) for m in named] == [False, False, False, False, True]
+    assert not is_worker_output(AIMessage(content="x", name="market"))
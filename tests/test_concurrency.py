@@ -0,0 +1,183 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from langchain_agent.tools import analysis
+from langchain_agent.tools import web_search as ws
+from langchain_agent.utils import concurrency
+from langchain_agent.utils.concurrency import alimit, limit
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.rate_limit import TokenBucket
+
+
+class InFlight:
+    """Counts the calls running at once and remembers the peak."""
+
+    def __init__(self):
+        self.current = self.peak = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def exit(self):
+        with self._lock:
+            self.current -= 1
+
+
+class SlowModel(BaseChatModel):
+    """Echoes the prompt after ``latency`` seconds, counting concurrent calls in ``in_flight``."""
+
+    latency: float = 0.05
+    in_flight: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.in_flight.enter()
+        time.sleep(self.latency)
+        self.in_flight.exit()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"analysed {messages[-1].content}"))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.in_flight.enter()
+        await asyncio.sleep(self.latency)
+        self.in_flight.exit()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"analysed {messages[-1].content}"))])
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    monkeypatch.setattr(Config, "TOOL_CONCURRENCY", {"search": 2, "analysis": 2, "chart": 1})
+    monkeypatch.setattr(concurrency, "_SLOTS", {})
+
+
+def test_limit_caps_concurrent_sync_calls(limits):
+    in_flight = InFlight()
+
+    def call(i):
+        with limit("search", "probe"):
+            in_flight.enter()
+            time.sleep(0.05)
+            in_flight.exit()
+        return i
+
+    with ThreadPoolExecutor(6) as pool:
+        assert list(pool.map(call, range(6))) == list(range(6))
+    assert in_flight.peak == 2
+
+    assert concurrency.family_limit("chart") == 1
+    assert concurrency.family_limit("other") == Config.TOOL_CONCURRENCY_DEFAULT
+
+
+def test_alimit_caps_concurrent_async_calls(limits):
+    in_flight = InFlight()
+
+    async def call(i):
+        async with alimit("analysis", "probe"):
+            in_flight.enter()
+            await asyncio.sleep(0.05)
+            in_flight.exit()
+        return i
+
+    async def many():
+        return await asyncio.gather(*(call(i) for i in range(6)))
+
+    assert asyncio.run(many()) == list(range(6))
+    assert in_flight.peak == 2
+    # Slots are not tied to the loop that first used them
+    assert asyncio.run(many()) == list(range(6))
+    assert in_flight.peak == 2
+
+
+def test_sync_and_async_callers_share_one_cap(limits):
+    in_flight = InFlight()
+
+    def sync_call(i):
+        with limit("search", "probe"):
+            in_flight.enter()
+            time.sleep(0.05)
+            in_flight.exit()
+        return i
+
+    async def async_call(i):
+        async with alimit("search", "probe"):
+            in_flight.enter()
+            await asyncio.sleep(0.05)
+            in_flight.exit()
+        return i
+
+    async def many(offset):
+        return await asyncio.gather(*(async_call(offset + i) for i in range(4)))
+
+    with ThreadPoolExecutor(4) as pool:
+        threads = [pool.submit(sync_call, i) for i in range(4)]
+        loops = [pool.submit(asyncio.run, many(offset)) for offset in (10, 20)]
+        assert [f.result() for f in threads] == list(range(4))
+        assert [f.result() for f in loops] == [list(range(10, 14)), list(range(20, 24))]
+    assert in_flight.peak == 2
+
+
+def test_cancelled_async_waiter_gives_up_its_slot(limits):
+    async def scenario(cancel_after_release):
+        async with alimit("chart"):
+            waiter = asyncio.create_task(alimit("chart").__aenter__())
+            await asyncio.sleep(0.01)
+            if not cancel_after_release:
+                waiter.cancel()
+        # Cancelled while queued, or just after the slot was handed to it
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        # Either way the slot is not lost
+        async with alimit("chart"):
+            return True
+
+    assert asyncio.run(asyncio.wait_for(scenario(False), 1))
+    assert asyncio.run(asyncio.wait_for(scenario(True), 1))
+
+
+def test_async_analysis_tool_runs_natively_under_its_limit(limits, monkeypatch):
+    in_flight = InFlight()
+    monkeypatch.setattr(Config, "get_chat_llm", staticmethod(lambda role=None: SlowModel(in_flight=in_flight)))
+    tool = analysis._make_analysis_tool("probe_analysis", "Probe.", lambda description: f"idea: {description}")
+
+    async def many():
+        return await asyncio.gather(*(tool.ainvoke({"description": f"crm {i}"}) for i in range(5)))
+
+    assert asyncio.run(many()) == [f"analysed idea: crm {i}" for i in range(5)]
+    assert in_flight.peak == 2
+    assert tool.invoke({"description": "crm"}) == "analysed idea: crm"
+
+
+def test_async_search_tool_runs_under_the_search_limit(limits, monkeypatch):
+    in_flight = InFlight()
+
+    class _Slow:
+        def run(self, query):
+            in_flight.enter()
+            time.sleep(0.05)
+            in_flight.exit()
+            return f"results for {query}"
+
+    monkeypatch.setattr(ws, "get_search", lambda: _Slow())
+    monkeypatch.setattr(ws, "get_search_cache", lambda: None)
+    monkeypatch.setattr(ws, "get_search_limiter", lambda: TokenBucket(rate=0))
+
+    async def many():
+        # Distinct queries, so none are coalesced
+        return await asyncio.gather(*(ws.web_search.ainvoke({"query": f"crm {i}"}) for i in range(6)))
+
+    assert asyncio.run(many()) == [f"results for crm {i}" for i in range(6)]
+    assert in_flight.peak == 2
@@ -0,0 +1,77 @@
+import json
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.tools import tool
+from langgraph.graph import START, MessagesState, StateGraph
+
+from langchain_agent.utils.instrumentation import RunTracer, prometheus_text, record_cache_hit
+from langchain_agent.utils.llm_cache import TieredLLMCache
+
+
+def _reply():
+    return AIMessage(content="ok", usage_metadata={"input_tokens": 12, "output_tokens": 3, "total_tokens": 15})
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look something up."""
+    record_cache_hit("lookup")
+    return query
+
+
+def _graph(llm):
+    def model(state):
+        llm.invoke("hello")
+        lookup.invoke("q")
+        return {}
+
+    inner = StateGraph(MessagesState)
+    inner.add_node("model", model)
+    inner.add_edge(START, "model")
+    agent = inner.compile()
+
+    def market(state):
+        agent.invoke(state)
+        return {}
+
+    outer = StateGraph(MessagesState)
+    outer.add_node("market", market)
+    outer.add_edge(START, "market")
+    return outer.compile()
+
+
+def _rows(tracer):
+    return {(r["kind"], r["name"]): r for r in tracer.summary()}
+
+
+def test_tracer_records_nodes_tools_and_model_calls(tmp_path):
+    trace_path = tmp_path / "run.jsonl"
+    tracer = RunTracer("run1", str(trace_path))
+    llm = GenericFakeChatModel(messages=iter([_reply()]))
+    with tracer.activate():
+        _graph(llm).invoke({"messages": []}, config={"callbacks": [tracer]})
+    tracer.close()
+
+    rows = _rows(tracer)
+    assert rows[("node", "market")]["count"] == 1
+    assert rows[("node", "market/model")]["count"] == 1
+    assert rows[("tool", "lookup")]["cache_hits"] == 1
+    llm_rows = [r for (kind, _), r in rows.items() if kind == "llm"]
+    assert len(llm_rows) == 1 and llm_rows[0]["name"].startswith("market/model:")
+    assert (llm_rows[0]["prompt_tokens"], llm_rows[0]["completion_tokens"]) == (12, 3)
+
+    records = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert {r["kind"] for r in records} == {"node", "tool", "llm", "cache_hit"}
+    assert all(r["run_id"] == "run1" for r in records)
+    assert "market/model" in tracer.format_summary()
+    assert 'saas_research_calls_total{kind="node",name="market"}' in prometheus_text()
+
+
+def test_llm_cache_hits_are_flagged(tmp_path):
+    llm = GenericFakeChatModel(messages=iter([_reply(), _reply()]), cache=TieredLLMCache(str(tmp_path / "llm.sqlite")))
+    tracer = RunTracer("run2")
+    llm.invoke("same prompt", config={"callbacks": [tracer]})
+    llm.invoke("same prompt", config={"callbacks": [tracer]})
+    (row,) = [r for r in tracer.summary() if r["kind"] == "llm"]
+    assert row["count"] == 2 and row["cache_hits"] == 1
@@ -0,0 +1,102 @@
+import json
+import time
+
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from langchain_agent.utils import knowledge_base as kb_module
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.knowledge_base import KnowledgeBase, initial_state, niche_key
+from langchain_agent.utils.response_utils import parse_trailing_json
+
+PROMPT = "I want to build a SaaS product for appointment scheduling in dental clinics"
+
+
+def _output(worker, next_worker="market", **extra):
+    trailer = {"summary": f"{worker} summary", "findings": ["f1"], "next": next_worker, "confidence": "high", **extra}
+    return HumanMessage(content=f"{worker} report body\n{json.dumps(trailer)}", name=worker)
+
+
+def _in_worker(worker, thread_id, fn):
+    """Run ``fn`` as if called from a tool of ``worker`` during graph run ``thread_id``."""
+    config = {"configurable": {"thread_id": thread_id}, "metadata": {"checkpoint_ns": f"{worker}:task-1"}}
+    return RunnableLambda(lambda _: fn()).invoke(None, config=config)
+
+
+def _record_run(kb, run_id):
+    _in_worker("market", run_id, lambda: kb.record_source("web_search", "dental market size", "TAM $2B"))
+    _in_worker("research", run_id, lambda: kb.record_source("competitor_analysis", "dental scheduling", "Dentrix, Weave"))
+    messages = [HumanMessage(content=PROMPT), _output("market"), _output("research", "FINISH", competitors=["Weave", "Dentrix"])]
+    kb.record_run(run_id, messages, "# Report")
+
+
+def test_niche_matching_ignores_filler_words(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+    _record_run(kb, "run-1")
+    assert niche_key(PROMPT) == "appointment clinics dental scheduling"
+    assert kb.match_niche("Appointment scheduling for dental clinics") == niche_key(PROMPT)
+    assert kb.match_niche("dental clinic appointment scheduling") == niche_key(PROMPT)  # 3 of 5 words shared
+    assert kb.match_niche("project management for small teams") is None
+    assert kb.report(PROMPT) == "# Report"
+    assert [(c["niche_key"], c["worker"], c["summary"]) for c in kb.competitor("weave")] == [(niche_key(PROMPT), "research", "research summary")]
+
+
+def test_only_workers_with_fresh_sources_are_reused(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"), freshness_seconds=3600)
+    _record_run(kb, "run-1")
+    assert [f["worker"] for f in kb.fresh_findings(PROMPT)] == ["market", "research"]
+
+    # The research worker's source is now two hours old: only market's findings are reused, and the stale query is re-run
+    kb._conn.execute("UPDATE sources SET fetched_at = ? WHERE tool = 'competitor_analysis'", (time.time() - 7200,))
+    kb._conn.execute("UPDATE findings SET fetched_at = ? WHERE worker = 'research'", (time.time() - 7200,))
+    assert [f["worker"] for f in kb.fresh_findings(PROMPT)] == ["market"]
+    assert kb.fresh_source("web_search", "Dental  market size") == "TAM $2B"
+    assert kb.fresh_source("competitor_analysis", "dental scheduling") is None
+
+
+def test_initial_state_seeds_fresh_findings_and_marks_them_visited(tmp_path, monkeypatch):
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+    _record_run(kb, "run-1")
+    monkeypatch.setattr(kb_module, "get_knowledge_base", lambda: kb)
+
+    state = initial_state("dental clinics appointment scheduling")
+    assert state["visited"] == ["market", "research"]
+    assert [m.name for m in state["messages"]] == [None, "market", "research"]
+    seeded = state["messages"][1]
+    assert parse_trailing_json(seeded.content)["next"] == "FINISH"  # stored work needs no follow-up round
+    assert seeded.additional_kwargs["knowledge"]["run_id"] == "run-1"
+
+    # Re-storing a seeded output keeps the age of its original sources
+    kb.record_run("run-2", state["messages"], "# Report 2")
+    rows = dict(kb._conn.execute("SELECT run_id, fetched_at FROM findings WHERE worker = 'market'").fetchall())
+    assert rows["run-2"] == rows["run-1"]
+
+    monkeypatch.setattr(Config, "KNOWLEDGE_SEED", False)
+    assert initial_state(PROMPT) == {"messages": [HumanMessage(content=PROMPT)]}
+
+
+def test_refresh_skips_stored_search_results_but_still_records_them(tmp_path, monkeypatch):
+    import asyncio
+
+    from langchain_agent.tools import web_search as ws
+
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+    kb.record_source("web_search", "dental crm", "stored results")
+    monkeypatch.setattr(ws, "get_knowledge_base", lambda: kb)
+    monkeypatch.setattr(ws, "get_search_cache", lambda: None)
+    monkeypatch.setattr(ws, "get_search", lambda: type("Backend", (), {"run": lambda self, q: f"live {q}"})())
+
+    assert ws.web_search.invoke({"query": "dental crm"}) == "stored results"
+    assert asyncio.run(ws.web_search.ainvoke({"query": "dental crm"})) == "stored results"
+    monkeypatch.setattr(Config, "KNOWLEDGE_SEED", False)
+    assert ws.web_search.invoke({"query": "dental crm"}) == "live dental crm"
+    assert asyncio.run(ws.web_search.ainvoke({"query": "Dental CRM"})) == "live Dental CRM"
+    assert kb.fresh_source("web_search", "dental crm") == "live Dental CRM"
+
+
+def test_sources_of_runs_that_never_finish_are_released(tmp_path):
+    kb = KnowledgeBase(str(tmp_path / "kb.sqlite"))
+    _in_worker("market", "crashed", lambda: kb.record_source("web_search", "q", "r"))
+    assert set(kb._used) == {"crashed"}
+    kb.forget_run("crashed")
+    assert not kb._used
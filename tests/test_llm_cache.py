@@ -0,0 +1,37 @@
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from langchain_agent.utils.llm_cache import TieredLLMCache
+
+
+def _model(cache, *replies):
+    return GenericFakeChatModel(messages=iter([AIMessage(content=r) for r in replies]), cache=cache)
+
+
+def test_llm_cache_serves_identical_prompt_from_memory(tmp_path):
+    cache = TieredLLMCache(str(tmp_path / "llm.sqlite"))
+    model = _model(cache, "first", "second")
+    assert model.invoke("same prompt").content == "first"
+    assert model.invoke("same prompt").content == "first"
+    assert model.invoke("other prompt").content == "second"
+    assert cache.stats()["memory_hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_llm_cache_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    _model(TieredLLMCache(path), "stored").invoke("prompt")
+    cache = TieredLLMCache(path)
+    assert _model(cache, "fresh").invoke("prompt").content == "stored"
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_llm_cache_evicts_least_recently_used_by_size(tmp_path):
+    cache = TieredLLMCache(str(tmp_path / "llm.sqlite"))
+    model = _model(cache, "a", "b", "c")
+    model.invoke("one")
+    cache.max_bytes = cache.stats()["bytes"] + 1
+    model.invoke("two")
+    assert cache.stats()["entries"] == 1
+    assert model.invoke("two").content == "b"
+    assert model.invoke("one").content == "c"
@@ -0,0 +1,158 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TypedDict
+
+import pytest
+from langchain_ollama import ChatOllama
+
+from langchain_agent.utils.llm_pool import Endpoint, LLMPool, NoHealthyEndpoint, PooledChatModel
+
+
+class _OllamaStub:
+    """Minimal Ollama server: /api/chat answers with its own name, /api/tags is the health check."""
+
+    def __init__(self, name, delay=0.0, status=200):
+        self.name, self.delay, self.status = name, delay, status
+        self.bodies, self.active, self.max_active = [], 0, 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                self.send_response(stub.status)
+                self.end_headers()
+                self.wfile.write(b'{"models": []}')
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.bodies.append(body)
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                try:
+                    time.sleep(stub.delay)
+                    if stub.status != 200:
+                        self.send_response(stub.status)
+                        self.end_headers()
+                        self.wfile.write(b'{"error": "overloaded"}')
+                        return
+                    # Answers stream as two content lines (the name split after its first letter) and a final done line
+                    content = json.dumps({"next": "market"}) if "format" in body else stub.name
+                    pieces = [content] if "format" in body else [content[:1], content[1:]]
+                    lines = [{"model": "m", "created_at": "2024-01-01T00:00:00Z", "message": {"role": "assistant", "content": piece}, "done": False}
+                             for piece in pieces]
+                    lines.append({"model": "m", "created_at": "2024-01-01T00:00:00Z", "message": {"role": "assistant", "content": ""},
+                                  "done": True, "done_reason": "stop", "prompt_eval_count": 3, "eval_count": 1})
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.end_headers()
+                    self.wfile.write(b"".join(json.dumps(line).encode() + b"\n" for line in lines))
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+
+@pytest.fixture
+def stubs():
+    created = []
+
+    def make(name, **kwargs):
+        created.append(_OllamaStub(name, **kwargs))
+        return created[-1]
+
+    yield make
+    for stub in created:
+        stub.httpd.shutdown()
+
+
+def _pooled(*stubs, max_concurrency=4, **pool_kwargs):
+    endpoints = [Endpoint(url=s.url, model=ChatOllama(model="m", base_url=s.url), max_concurrency=max_concurrency) for s in stubs]
+    pool_kwargs.setdefault("health_interval", 0)
+    return PooledChatModel(pool=LLMPool(endpoints, **pool_kwargs))
+
+
+def test_least_outstanding_balancing_respects_caps(stubs):
+    a, b = stubs("a", delay=0.2), stubs("b", delay=0.2)
+    llm = _pooled(a, b, max_concurrency=1)
+    with ThreadPoolExecutor(4) as pool:
+        answers = list(pool.map(lambda i: llm.invoke(f"q{i}").content, range(4)))
+    assert sorted(answers) == ["a", "a", "b", "b"]
+    assert a.max_active == b.max_active == 1
+
+
+def test_failover_ejection_and_health_check(stubs):
+    bad, good = stubs("bad", status=500), stubs("good")
+    # Probing is "active" (the prober itself never fires in the test), so ejected endpoints wait for check_health()
+    llm = _pooled(bad, good, eject_after=2, eject_seconds=0, health_interval=3600)
+    assert [llm.invoke("hi").content for _ in range(3)] == ["good"] * 3
+    stats = {s["url"]: s for s in llm.pool.stats()}
+    assert stats[bad.url]["failures"] == 2 and stats[bad.url]["ejected"]
+    assert len(bad.bodies) == 2  # ejected after two failures, no further traffic
+
+    llm.pool.check_health()
+    assert {s["url"]: s for s in llm.pool.stats()}[bad.url]["ejected"]  # health endpoint still failing
+    bad.status = 200
+    llm.pool.check_health()
+    assert not {s["url"]: s for s in llm.pool.stats()}[bad.url]["ejected"]
+
+    bad.status = good.status = 500
+    for _ in range(2):  # each call fails on both endpoints, the second ejects them
+        with pytest.raises(Exception, match="overloaded"):
+            llm.invoke("hi")
+    with pytest.raises(NoHealthyEndpoint):
+        llm.invoke("hi")
+
+
+def test_hedged_request_returns_fastest_answer(stubs):
+    slow, fast = stubs("slow", delay=1.0), stubs("fast")
+    start = time.perf_counter()
+    # Fresh pools, so the (tied) first pick is the slow endpoint each time
+    llm = _pooled(slow, fast).model_copy(update={"hedge_after": 0.05})
+    assert llm.invoke("route").content == "fast"
+    allm = _pooled(slow, fast).model_copy(update={"hedge_after": 0.05})
+    assert asyncio.run(allm.ainvoke("route")).content == "fast"
+    assert time.perf_counter() - start < 0.9
+    assert llm.pool.hedges == allm.pool.hedges == 1
+
+
+def test_structured_output_keeps_provider_format(stubs):
+    a, b = stubs("a"), stubs("b")
+
+    class Router(TypedDict):
+        """Worker to route to next."""
+
+        next: str
+
+    router = _pooled(a, b).with_structured_output(Router)
+    assert router.invoke("where next?") == {"next": "market"}
+    assert [body.get("format", {}).get("title") for body in a.bodies + b.bodies] == ["Router"]
+
+
+def test_streaming_goes_through_the_acquired_endpoint(stubs):
+    bad, good = stubs("bad", status=500), stubs("good")
+    llm = _pooled(bad, good, eject_after=1, health_interval=3600)
+    # The failed endpoint sent no tokens, so the stream fails over instead of collapsing into one chunk
+    assert [chunk.content for chunk in llm.stream("hi") if chunk.content] == ["g", "ood"]
+    stats = {s["url"]: s for s in llm.pool.stats()}
+    assert stats[bad.url]["failures"] == 1 and stats[good.url]["requests"] == 1
+
+    async def collect():
+        return [chunk.content async for chunk in llm.astream("hi") if chunk.content]
+
+    assert asyncio.run(collect()) == ["g", "ood"]
+    # A consumer that stops early still frees the endpoint's slot
+    stream = llm.stream("hi")
+    next(stream)
+    stream.close()
+    assert all(s["outstanding"] == 0 for s in llm.pool.stats())
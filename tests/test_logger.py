@@ -0,0 +1,66 @@
+import json
+import logging
+import logging.handlers
+import queue
+import time
+
+from langchain_core.runnables import RunnableLambda
+
+from langchain_agent.utils import logger as logger_module
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.logger import JsonLinesFormatter, flush_logs, log_context, setup_logger
+
+
+def _json_logger(tmp_path, name):
+    """A logger wired to its own queue and listener that writes JSON lines to tmp_path/log.jsonl."""
+    records = queue.SimpleQueue()
+    file_handler = logging.handlers.RotatingFileHandler(tmp_path / "log.jsonl", maxBytes=1 << 20, backupCount=1, encoding="utf-8")
+    file_handler.setFormatter(JsonLinesFormatter())
+    listener = logger_module._Listener(records, file_handler)
+    log = logging.getLogger(name)
+    log.propagate = False
+    log.setLevel(logging.DEBUG)
+    log.addHandler(logger_module._QueueHandler(records))
+    listener.start()
+    return log, listener
+
+
+def test_large_payloads_are_capped_off_thread_and_referenced_by_hash(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "LOG_MAX_CHARS", 100)
+    monkeypatch.setattr(Config, "LOG_PAYLOAD_DIR", str(tmp_path / "payloads"))
+    log, listener = _json_logger(tmp_path, "test.capped")
+    payload = {"messages": ["x" * 100_000] * 50}
+
+    start = time.perf_counter()
+    for _ in range(20):
+        log.debug("agent returned result: %s", payload)
+    per_call = (time.perf_counter() - start) / 20
+    listener.stop()
+
+    assert per_call < 0.002  # formatting 5 MB synchronously takes ~20 ms per call
+    entries = [json.loads(line) for line in (tmp_path / "log.jsonl").read_text().splitlines()]
+    assert len(entries) == 20 and entries[0]["level"] == "DEBUG" and entries[0]["logger"] == "test.capped"
+    message = entries[0]["message"]
+    assert message.startswith("agent returned result: {'messages'") and len(message) < 200
+    digest = message.rsplit("sha1 ", 1)[1].rstrip("]")
+    (saved,) = (tmp_path / "payloads").iterdir()
+    assert saved.name.startswith(digest) and saved.read_text() == f"agent returned result: {payload}"
+
+
+def test_records_carry_the_run_id_of_their_context_or_graph_run(tmp_path):
+    log, listener = _json_logger(tmp_path, "test.correlated")
+    with log_context("batch-42"):
+        log.info("outer")
+    RunnableLambda(lambda _: log.info("inside a node")).invoke(None, config={"configurable": {"thread_id": "run-7"}})
+    log.warning("no run")
+    listener.stop()
+
+    entries = [json.loads(line) for line in (tmp_path / "log.jsonl").read_text().splitlines()]
+    assert [(e["message"], e["run_id"]) for e in entries] == [("outer", "batch-42"), ("inside a node", "run-7"), ("no run", None)]
+
+
+def test_setup_logger_shares_one_queue_handler():
+    first, second = setup_logger("test.one", "INFO"), setup_logger("test.two", "DEBUG")
+    assert first.handlers == second.handlers and isinstance(first.handlers[0], logging.handlers.QueueHandler)
+    assert setup_logger("test.one").handlers == first.handlers
+    assert flush_logs(timeout=5)
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+
+from benchmarks.fakes import ScriptedChatModel
+from langchain_agent.utils import agents
+from langchain_agent.utils.config import Config
+
+MEMBERS = ["saas_finder", "market", "research"]
+
+
+@pytest.fixture
+def tiers(monkeypatch):
+    created = []
+
+    def factory(settings):
+        created.append(settings)
+        return ScriptedChatModel()
+
+    settings = {role: {"provider": "", "model": "", "temperature": "", "num_ctx": ""} for role in Config.LLM_ROLE_SETTINGS}
+    settings["router"] = {"provider": "", "model": "qwen2.5:1.5b", "temperature": "0", "num_ctx": "2048"}
+    monkeypatch.setattr(Config, "LLM_ROLE_SETTINGS", settings)
+    monkeypatch.setattr(Config, "LLM_PROVIDER", "tiers")
+    monkeypatch.setattr(Config, "_LLM_INSTANCES", {})
+    monkeypatch.setattr(Config, "_LLM_PROVIDERS", {"tiers": factory})
+    return created
+
+
+def test_each_role_resolves_its_own_settings_and_client(tiers):
+    router = Config.llm_settings("router")
+    assert router == {"provider": "tiers", "model": "qwen2.5:1.5b", "temperature": 0.0, "num_ctx": 2048}
+    assert Config.llm_settings("synthesis") == {"provider": "tiers", "model": Config.OLLAMA_MODEL, "temperature": Config.TEMPERATURE, "num_ctx": Config.LLM_NUM_CTX}
+    with pytest.raises(ValueError):
+        Config.llm_settings("critic")
+
+    assert Config.get_chat_llm("router") is Config.get_chat_llm("router")
+    assert Config.get_chat_llm("router") is not Config.get_chat_llm("synthesis")
+    # Roles left on the defaults share one client
+    assert Config.get_chat_llm("worker") is Config.get_chat_llm("synthesis") is Config.get_chat_llm()
+    # The factory builds each client from its role's settings
+    assert tiers == [router, Config.llm_settings("synthesis")]
+
+    small = Config._create_provider_llm({**router, "provider": "ollama"})
+    assert (small.model, small.temperature, small.num_ctx) == ("qwen2.5:1.5b", 0.0, 2048)
+
+
+def test_supervisor_writes_the_report_with_the_synthesis_model(monkeypatch):
+    monkeypatch.setattr(agents, "remember_run", lambda messages, report: None)
+    monkeypatch.setattr(Config, "SYNTHESIS_PARALLEL", False)
+    synthesis = GenericFakeChatModel(messages=iter([AIMessage(content="# Report from the large model")]))
+    node = agents.make_supervisor_node(ScriptedChatModel(), MEMBERS, synthesis_llm=synthesis)
+
+    trailer = json.dumps({"summary": "s", "findings": [], "next": "FINISH", "confidence": "high"})
+    outputs = [HumanMessage(content=f"body\n{trailer}", name=name) for name in MEMBERS]
+    command = node.invoke({"messages": [HumanMessage(content="CRM for dentists")] + outputs, "visited": MEMBERS, "steps": 3})
+    assert command.update["messages"][0].content == "# Report from the large model"
+
+
+def test_zero_argument_factories_reject_role_overrides(tiers, monkeypatch):
+    monkeypatch.setattr(Config, "_LLM_PROVIDERS", {"tiers": lambda: ScriptedChatModel()})
+    assert isinstance(Config.get_chat_llm("worker"), ScriptedChatModel)
+    with pytest.raises(ValueError, match="ROUTER_LLM_MODEL, ROUTER_LLM_TEMPERATURE, ROUTER_LLM_NUM_CTX"):
+        Config.get_chat_llm("router")
+
+
+def test_endpoints_apply_only_to_their_provider(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_PROVIDER", "openai")
+    monkeypatch.setattr(Config, "LLM_ENDPOINTS", ["http://gpu1:8000/v1"])
+    assert Config.llm_endpoints("OpenAI") == ["http://gpu1:8000/v1"]
+    assert Config.llm_endpoints("ollama") == []
+    local = Config._create_chat_llm({"provider": "ollama", "model": "qwen2.5:1.5b", "temperature": 0.0, "num_ctx": 0})
+    assert local.base_url == Config.OLLAMA_BASE_URL
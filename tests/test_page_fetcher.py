@@ -0,0 +1,172 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from langchain_agent.tools.web_fetch import parse_urls
+from langchain_agent.utils import page_fetcher
+from langchain_agent.utils.page_fetcher import PageFetcher, extract_text
+from langchain_agent.utils.page_store import PageStore
+
+ARTICLE = b"""<html><head><title>Dental CRM Pricing</title><script>var x = 1;</script></head>
+<body><nav>Home | Blog</nav><article><h1>Pricing</h1><p>Starter plan:   $49 per month.</p></article>
+<footer>Copyright</footer></body></html>"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    requests_seen = []
+    hosts_seen = []
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.requests_seen.append(self.path)
+            cls.hosts_seen.append(self.headers.get("Host"))
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            if self.path.startswith("/slow"):
+                time.sleep(0.2)
+            if self.path in ("/redirect", "/redirect-local"):
+                self.send_response(302)
+                local = f"http://127.0.0.1:{self.server.server_address[1]}"
+                self.send_header("Location", f"{local}/article" if self.path == "/redirect-local" else "/article")
+                self.end_headers()
+                return
+            if self.path == "/missing":
+                self.send_response(404)
+                self.end_headers()
+                return
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(ARTICLE)))
+            self.end_headers()
+            self.wfile.write(ARTICLE)
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.requests_seen = []
+    _Handler.hosts_seen = []
+    _Handler.active = _Handler.max_active = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_extract_text_keeps_main_content():
+    title, text = extract_text(ARTICLE)
+    assert title == "Dental CRM Pricing"
+    assert text == "Pricing\nStarter plan: $49 per month."
+
+
+def test_fetch_stores_page_and_serves_it_from_the_store(server, tmp_path):
+    fetcher = PageFetcher(PageStore(str(tmp_path / "pages.sqlite")), allow_private=True)
+    first = fetcher.fetch(f"{server}/article")
+    second = fetcher.fetch(f"{server}/article")
+    assert (first.status, second.status) == ("fetched", "cached")
+    assert second.text == first.text and "$49 per month" in second.text
+    assert _Handler.requests_seen == ["/article"]
+
+
+def test_stale_page_is_revalidated_with_etag(server, tmp_path):
+    store = PageStore(str(tmp_path / "pages.sqlite"))
+    PageFetcher(store, allow_private=True).fetch(f"{server}/article")
+    page = PageFetcher(store, ttl_seconds=0, allow_private=True).fetch(f"{server}/article")
+    assert page.status == "revalidated"
+    assert "$49 per month" in page.text
+    assert len(_Handler.requests_seen) == 2
+
+
+def test_fetch_many_keeps_order_and_limits_per_host(server, tmp_path):
+    fetcher = PageFetcher(PageStore(str(tmp_path / "pages.sqlite")), max_per_host=2, max_workers=6, allow_private=True)
+    urls = [f"{server}/slow{i}" for i in range(6)] + [f"{server}/missing"]
+    pages = fetcher.fetch_many(urls)
+    assert [p.url for p in pages] == urls
+    assert [p.status for p in pages] == ["fetched"] * 6 + ["error"]
+    assert _Handler.max_active <= 2
+
+
+def test_parse_urls():
+    assert parse_urls("https://a.com, https://b.com\nhttps://a.com <https://c.com>") == ["https://a.com", "https://b.com", "https://c.com"]
+
+
+PUBLIC = "93.184.216.34"
+
+
+def _route_public_to_localhost(fetcher, monkeypatch):
+    """Send connections for the pinned public address to the local server; returns the addresses dialled."""
+    dialled = []
+    poolmanager = fetcher.session.get_adapter("http://").poolmanager
+    connect = poolmanager.connection_from_host
+
+    def connection_from_host(host=None, port=None, scheme="http", pool_kwargs=None):
+        dialled.append(host)
+        return connect("127.0.0.1" if host == PUBLIC else host, port, scheme, pool_kwargs)
+
+    monkeypatch.setattr(poolmanager, "connection_from_host", connection_from_host)
+    return dialled
+
+
+def test_only_public_http_urls_are_fetched(server, tmp_path, monkeypatch):
+    fetcher = PageFetcher(PageStore(str(tmp_path / "pages.sqlite")))
+    blocked = {
+        "file:///etc/passwd": "only http(s)",
+        f"{server}/article": "non-public address 127.0.0.1",
+        "http://10.0.0.5/admin": "non-public address 10.0.0.5",
+        "http://169.254.169.254/latest/meta-data": "non-public address 169.254.169.254",
+        "http://[::ffff:127.0.0.1]/": "non-public address 127.0.0.1",
+    }
+    for url, reason in blocked.items():
+        page = fetcher.fetch(url)
+        assert page.status == "error" and reason in page.error, url
+    assert _Handler.requests_seen == []
+
+    # A public first hop may not redirect into a private address
+    monkeypatch.setattr(page_fetcher, "_resolve", lambda host: [PUBLIC] if host == "public.test" else ["127.0.0.1"])
+    _route_public_to_localhost(fetcher, monkeypatch)
+    page = fetcher.fetch(server.replace("127.0.0.1", "public.test") + "/redirect-local")
+    assert page.status == "error" and "non-public address 127.0.0.1" in page.error
+    assert _Handler.requests_seen == ["/redirect-local"]
+
+
+def test_connection_is_pinned_to_the_checked_address(server, tmp_path, monkeypatch):
+    # A rebinding resolver: public for the check, loopback for anyone who asks again
+    answers = iter([[PUBLIC]])
+    monkeypatch.setattr(page_fetcher, "_resolve", lambda host: next(answers, ["127.0.0.1"]))
+    fetcher = PageFetcher(PageStore(str(tmp_path / "pages.sqlite")))
+    dialled = _route_public_to_localhost(fetcher, monkeypatch)
+
+    url = server.replace("127.0.0.1", "rebind.test") + "/article"
+    page = fetcher.fetch(url)
+    assert page.status == "fetched" and "$49 per month" in page.text
+    assert dialled == [PUBLIC]
+    # The server still sees the hostname, not the pinned address
+    assert _Handler.hosts_seen == [url.split("/")[2]]
+
+
+def test_redirects_are_followed_up_to_the_limit(server, tmp_path):
+    page = PageFetcher(PageStore(str(tmp_path / "pages.sqlite")), allow_private=True).fetch(f"{server}/redirect")
+    assert page.status == "fetched" and "$49 per month" in page.text
+    assert _Handler.requests_seen == ["/redirect", "/article"]
+    page = PageFetcher(PageStore(str(tmp_path / "other.sqlite")), allow_private=True, max_redirects=0).fetch(f"{server}/redirect")
+    assert page.status == "error" and "more than 0 redirects" in page.error
+
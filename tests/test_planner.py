@@ -0,0 +1,76 @@
+import asyncio
+import json
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import START, StateGraph
+
+from benchmarks.fakes import ScriptedChatModel
+from langchain_agent.utils import agents
+from langchain_agent.utils.agents import State, make_planner_node, make_synthesis_node, make_worker_node
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.knowledge_base import initial_state
+
+MEMBERS = ["saas_finder", "market", "research"]
+
+
+class ReportWriter(BaseChatModel):
+    """Writes a 'report' that lists the worker outputs it was given."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "report-writer"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        lines = [m.content.splitlines()[0] for m in messages if getattr(m, "name", None) in MEMBERS]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="# Report\n" + "\n".join(lines)))])
+
+
+def _worker(name, tasks):
+    def run(state):
+        tasks[name] = state["messages"][-1]
+        trailer = {"summary": f"{name} summary", "findings": [], "next": "FINISH", "confidence": "high"}
+        return {"messages": list(state["messages"]) + [AIMessage(content=f"{name} result\n{json.dumps(trailer)}")]}
+
+    return RunnableLambda(run)
+
+
+def _planner_graph(tasks):
+    builder = StateGraph(State)
+    builder.add_node("planner", make_planner_node(ScriptedChatModel(), MEMBERS), destinations=(*MEMBERS, "synthesize"))
+    for name in MEMBERS:
+        builder.add_node(name, make_worker_node(name, _worker(name, tasks), "system", goto="synthesize"), destinations=("synthesize",))
+    builder.add_node("synthesize", make_synthesis_node(ReportWriter()))
+    builder.add_edge(START, "planner")
+    return builder.compile()
+
+
+def test_planner_sends_each_worker_its_task_and_synthesizes_all_results(monkeypatch):
+    monkeypatch.setattr(agents, "remember_run", lambda messages, report: None)
+    monkeypatch.setattr(Config, "SYNTHESIS_PARALLEL", False)
+
+    for run in (lambda g, s: g.invoke(s), lambda g, s: asyncio.run(g.ainvoke(s))):
+        tasks = {}
+        result = run(_planner_graph(tasks), initial_state("CRM for dental clinics"))
+        assert set(tasks) == set(MEMBERS)
+        for name, task in tasks.items():
+            assert task.name == "planner" and task.content == f"Research the {name} angle of the request"
+
+        report = result["messages"][-1]
+        assert report.name == "final_report"
+        assert sorted(report.content.splitlines()[1:]) == sorted(f"{name} result" for name in MEMBERS)
+        # Each worker ran exactly once, in the same step
+        assert [m.name for m in result["messages"]].count("market") == 1
+
+
+def test_planner_skips_workers_seeded_from_the_knowledge_base(monkeypatch):
+    monkeypatch.setattr(agents, "remember_run", lambda messages, report: None)
+    monkeypatch.setattr(Config, "SYNTHESIS_PARALLEL", False)
+    tasks = {}
+    state = initial_state("CRM for dental clinics")
+    state["visited"] = ["market"]
+    _planner_graph(tasks).invoke(state)
+    assert set(tasks) == {"saas_finder", "research"}
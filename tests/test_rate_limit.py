@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.instrumentation import METRICS
+from langchain_agent.utils.rate_limit import SingleFlight, TokenBucket, backoff_delay, is_throttle_error
+
+
+def test_token_bucket_allows_burst_then_spaces_requests():
+    bucket = TokenBucket(rate=20, burst=2)
+    delays = [bucket.reserve() for _ in range(4)]
+    assert delays[:2] == [0.0, 0.0]
+    assert delays[2] == pytest.approx(0.05, abs=0.01) and delays[3] == pytest.approx(0.1, abs=0.01)
+    assert TokenBucket(rate=0).reserve() == 0.0
+
+
+def test_backoff_and_throttle_detection():
+    assert all(0 <= backoff_delay(attempt, 1.0, 5.0) <= min(5.0, 2 ** attempt) for attempt in range(6) for _ in range(20))
+    assert is_throttle_error(RuntimeError("https://html.duckduckgo.com/html 202 Ratelimit"))
+    assert is_throttle_error(TimeoutError())
+    assert not is_throttle_error(ValueError("bad query"))
+
+
+def test_single_flight_shares_one_execution():
+    flights, calls = SingleFlight(), []
+    gate = threading.Event()
+
+    def slow():
+        calls.append(1)
+        gate.wait(1)
+        return "result"
+
+    with ThreadPoolExecutor(4) as pool:
+        futures = [pool.submit(flights.do, "k", slow) for _ in range(4)]
+        time.sleep(0.1)
+        gate.set()
+        results = [f.result() for f in futures]
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+
+    async def aslow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "async result"
+
+    async def many():
+        return await asyncio.gather(*(flights.ado("k", aslow) for _ in range(3)))
+
+    assert [r for r, _ in asyncio.run(many())] == ["async result"] * 3
+    assert len(calls) == 2
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flights, calls = SingleFlight(), []
+
+    async def fetch():
+        calls.append(1)
+        # The leader hangs until it is cancelled; the re-run takes long enough to be shared
+        await asyncio.sleep(10 if len(calls) == 1 else 0.05)
+        return "result"
+
+    async def scenario():
+        leader = asyncio.create_task(flights.ado("k", fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flights.ado("k", fetch)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*followers)
+
+    # One follower re-runs the call; the other shares its result
+    assert sorted(asyncio.run(scenario())) == [("result", False), ("result", True)]
+    assert len(calls) == 2
+
+    # A follower that is cancelled itself leaves the leader's call running
+    async def follower_cancelled():
+        leader = asyncio.create_task(flights.ado("j", lambda: asyncio.sleep(0.05, "done")))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.ado("j", lambda: asyncio.sleep(0.05, "done")))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await leader
+
+    assert asyncio.run(follower_cancelled()) == ("done", False)
+
+
+@pytest.fixture
+def search_tools(monkeypatch):
+    from langchain_agent.tools import web_search as ws
+
+    monkeypatch.setattr(ws, "get_search_cache", lambda: None)
+    monkeypatch.setattr(ws, "get_search_limiter", lambda: TokenBucket(rate=0))
+    monkeypatch.setattr(Config, "SEARCH_BACKOFF_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(Config, "SEARCH_MAX_RETRIES", 2)
+    return ws
+
+
+def _tool_call(query):
+    return {"type": "tool_call", "name": "web_search", "args": {"query": query}, "id": "call_1"}
+
+
+def test_throttled_search_retries_then_reports_error(search_tools, monkeypatch):
+    failures = iter([RuntimeError("202 Ratelimit")] * 2)
+
+    class _Backend:
+        def run(self, query):
+            error = next(failures, None)
+            if error:
+                raise error
+            return f"results for {query}"
+
+    monkeypatch.setattr(search_tools, "get_search", lambda: _Backend())
+    before = METRICS.snapshot().get(("tool", "web_search"), {}).get("retries", 0)
+    assert search_tools.web_search.invoke({"query": "crm"}) == "results for crm"
+    assert METRICS.snapshot()[("tool", "web_search")]["retries"] - before == 2
+
+    class _Throttled:
+        def run(self, query):
+            raise RuntimeError("202 Ratelimit")
+
+    monkeypatch.setattr(search_tools, "get_search", lambda: _Throttled())
+    message = search_tools.web_search.invoke(_tool_call("crm"))
+    assert message.status == "error"
+    assert "rate-limiting" in message.content and "Do not retry" in message.content
+
+
+def test_identical_concurrent_searches_are_coalesced(search_tools, monkeypatch):
+    calls = []
+
+    class _Slow:
+        def run(self, query):
+            calls.append(query)
+            time.sleep(0.2)
+            return f"results for {query}"
+
+    monkeypatch.setattr(search_tools, "get_search", lambda: _Slow())
+    before = METRICS.snapshot().get(("tool", "web_search"), {}).get("coalesced", 0)
+    with ThreadPoolExecutor(3) as pool:
+        results = list(pool.map(lambda _: search_tools.web_search.invoke({"query": "dental crm"}), range(3)))
+    assert results == ["results for dental crm"] * 3
+    assert calls == ["dental crm"]
+    assert METRICS.snapshot()[("tool", "web_search")]["coalesced"] - before == 2
@@ -0,0 +1,82 @@
+import asyncio
+import json
+import re
+import time
+from typing import Any, List
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from langchain_agent.utils import agents
+from langchain_agent.utils.config import Config
+from langchain_agent.utils.report_sections import REPORT_SECTIONS, merge_sections, section_messages
+
+
+def _output(worker):
+    trailer = {"summary": f"{worker} summary", "findings": [f"{worker} finding"], "next": "FINISH", "confidence": "high"}
+    return HumanMessage(content=f"{worker} full report body\n{json.dumps(trailer)}", name=worker)
+
+
+MESSAGES = [HumanMessage(content="CRM for dental clinics"), _output("saas_finder"), _output("market"), _output("research")]
+
+
+class SectionWriter(BaseChatModel):
+    """Writes the section its system prompt asks for, after ``latency`` seconds; fails on ``fail_on`` headings."""
+
+    latency: float = 0.0
+    fail_on: str = ""
+
+    @property
+    def _llm_type(self) -> str:
+        return "section-writer"
+
+    def _generate(self, messages: List[BaseMessage], stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self.latency)
+        heading = re.search(r"^## (.+)$", messages[0].content, re.M).group(1)
+        if self.fail_on and self.fail_on in heading:
+            raise RuntimeError("model overloaded")
+        seen = ",".join(m.name for m in messages[1:] if m.name)
+        title = "# Dental CRM\n" if heading == "Executive Summary" else ""
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=f"{title}## {heading} (draft)\n- from {seen}"))])
+
+
+def test_each_section_sees_only_its_workers():
+    views = {s.key: section_messages(s, MESSAGES) for s in REPORT_SECTIONS}
+    market = views["market_size"]
+    assert "## Market Size & Opportunity" in market[0]["content"]
+    assert market[1].content == "CRM for dental clinics"
+    assert [m.name for m in market[2:]] == ["market"] and "full report body" in market[2].content
+
+    summary = views["executive_summary"]
+    assert [m.name for m in summary[2:]] == ["saas_finder", "market", "research"]
+    assert all("full report body" not in m.content and "summary" in m.content for m in summary[2:])
+
+    # A section whose workers never ran falls back to digests of whatever did run
+    assert [m.name for m in section_messages(REPORT_SECTIONS[1], MESSAGES[:2])[2:]] == ["saas_finder"]
+
+
+def test_merge_uses_canonical_headings_and_falls_back_to_the_request():
+    drafts = ["```markdown\n## Summary\nGood idea\n## Extra\nmore\n```"] + [""] * (len(REPORT_SECTIONS) - 1)
+    report = merge_sections(drafts, "CRM for dental clinics\nwith details")
+    assert report.startswith("# CRM for dental clinics\n\n## Executive Summary\n\nGood idea\n### Extra\nmore\n")
+    assert [line[3:] for line in report.splitlines() if line.startswith("## ")] == [s.title for s in REPORT_SECTIONS]
+    assert "_Not available._" in report and "```" not in report
+
+
+def test_sections_run_concurrently_and_survive_a_failed_section(monkeypatch):
+    monkeypatch.setattr(agents, "remember_run", lambda messages, report: None)
+    monkeypatch.setattr(Config, "SYNTHESIS_PARALLEL", True)
+    llm = SectionWriter(latency=0.2, fail_on="Bootstrap")
+
+    started = time.perf_counter()
+    report = agents.synthesize_report(llm, MESSAGES).content
+    assert time.perf_counter() - started < 0.2 * len(REPORT_SECTIONS) / 2
+
+    assert report.startswith("# Dental CRM\n\n## Executive Summary\n\n- from saas_finder,market,research")
+    assert "## Market Size & Opportunity\n\n- from market\n" in report
+    assert "## Bootstrap Feasibility / Needed Resources\n\n_Not available._" in report
+
+    started = time.perf_counter()
+    assert asyncio.run(agents.asynthesize_report(llm, MESSAGES)).content == report
+    assert time.perf_counter() - started < 0.2 * len(REPORT_SECTIONS) / 2
@@ -1,4 +1,10 @@
-from langchain_agent.utils.response_utils import parse_trailing_json
+import json
+import random
+import time
+
+from langchain_agent.utils.response_utils import JsonObjectScanner, extract_json_objects, parse_trailing_json, split_trailing_json
+
+TRAILER = {"summary": "Top idea", "findings": ["a {b}", "quote \" and \\ slash"], "next": "market", "confidence": "medium"}
 
 
 def test_parse_trailing_json_present():
@@ -12,3 +18,82 @@ def test_parse_trailing_json_missing():
     text = "No JSON here, just a sentence."
     parsed = parse_trailing_json(text)
     assert parsed is None
+
+
+def test_trailing_object_after_other_json_like_fragments():
+    body = 'Pricing uses {tiers} and a config like {"seats": 5}. Set {"a", "b"} is not JSON.\n'
+    text = body + json.dumps(TRAILER, indent=2) + "\n\n"
+    assert parse_trailing_json(text) == TRAILER
+    assert split_trailing_json(text) == (body.rstrip(), TRAILER)
+    assert extract_json_objects(text) == [{"seats": 5}, TRAILER]
+    assert parse_trailing_json(text + "And some closing prose.") is None
+    assert parse_trailing_json('{"a": 1} {"b": [1, 2]}') == {"b": [1, 2]}
+    assert parse_trailing_json('["not", "an", "object"]') is None
+
+
+def test_stray_braces_and_quotes_in_prose_do_not_hide_the_trailer():
+    trailer = json.dumps(TRAILER)
+    assert parse_trailing_json("An unclosed { brace in prose.\n" + trailer) == TRAILER
+    assert parse_trailing_json('A 5" screen {"draft\nthen the result:\n' + trailer) == TRAILER
+    assert split_trailing_json("Body { never closed\n" + trailer)[0] == "Body { never closed"
+
+
+def test_incremental_feed_matches_whole_text():
+    text = 'intro {"x": 1} more\n' + json.dumps(TRAILER) + "  "
+    for size in (1, 2, 3, 7):
+        scanner = JsonObjectScanner()
+        found = []
+        for i in range(0, len(text), size):
+            found.extend(scanner.feed(text[i:i + size]))
+        assert found == [{"x": 1}, TRAILER] == scanner.objects
+        assert scanner.trailing() == TRAILER
+
+
+def test_scanner_is_linear_on_multi_megabyte_inputs():
+    # Each of these makes the old `\{.*\}\s*$` regex backtrack from every "{": quadratic time
+    trailer = "\n" + json.dumps(TRAILER)
+    inputs = [
+        "{" * 2_000_000 + trailer,
+        "see {x} and {y, " * 250_000 + trailer,
+        ('{"k": "' + "v" * 50 + '"} noise } { ') * 50_000 + trailer,
+    ]
+    for text in inputs:
+        assert len(text) >= 2_000_000
+        start = time.perf_counter()
+        assert parse_trailing_json(text) == TRAILER
+        assert time.perf_counter() - start < 3.0
+
+    text = "see {x} and {y, " * 250_000 + "no trailer."
+    start = time.perf_counter()
+    assert parse_trailing_json(text) is None and extract_json_objects(text) == []
+    assert time.perf_counter() - start < 3.0
+
+
+def _reference_trailing(text):
+    """Brute force: the first "{" whose suffix parses as a JSON object."""
+    text = text.rstrip()
+    for start, char in enumerate(text):
+        if char == "{":
+            try:
+                parsed = json.loads(text[start:])
+            except ValueError:
+                continue
+            if isinstance(parsed, dict):
+                return text[:start].rstrip(), parsed
+    return None, None
+
+
+def test_unclosed_brace_with_a_stray_quote_does_not_hide_the_trailer():
+    assert parse_trailing_json(' {"{"s": "x}"}') == {"s": "x}"}
+    assert split_trailing_json('Body {" note\n' + json.dumps(TRAILER)) == ('Body {" note', TRAILER)
+
+    rng = random.Random(21)
+    alphabet = ' {}"a:,\\\n1[]'
+    objects = ['{"s": "x}"}', '{"a": {"b": 1}}', '{"k": "q\\"{"}', "{}", '{"n": [1, {"m": "}"}]}']
+    for _ in range(5000):
+        prose = "".join(rng.choice(alphabet) for _ in range(rng.randrange(10)))
+        tail = rng.choice(objects) if rng.random() < 0.7 else "".join(rng.choice(alphabet) for _ in range(rng.randrange(8)))
+        text = prose + tail
+        body, expected = _reference_trailing(text)
+        assert parse_trailing_json(text) == expected, text
+        assert split_trailing_json(text) == ((body, expected) if expected is not None else (text, None)), text
@@ -0,0 +1,47 @@
+import json
+
+from langchain_core.messages import HumanMessage
+
+from langchain_agent.utils.agents import fast_route, guard_route, merge_counts
+
+MEMBERS = ["saas_finder", "market", "research"]
+
+
+def _output(name, next_worker, body="analysis"):
+    return HumanMessage(content=body + "\n" + json.dumps({"summary": "s", "findings": [], "next": next_worker, "confidence": "low"}), name=name)
+
+
+def _state(visited, outputs, steps=None):
+    return {"messages": [HumanMessage(content="CRM for dentists")] + outputs, "visited": visited, "steps": len(visited) if steps is None else steps}
+
+
+def test_fast_route_covers_unvisited_workers_in_order():
+    assert fast_route(_state([], []), MEMBERS)[0] == "saas_finder"
+    assert fast_route(_state(["saas_finder"], [_output("saas_finder", "FINISH")]), MEMBERS)[0] == "market"
+
+
+def test_fast_route_enforces_step_budget():
+    assert fast_route(_state([], [], steps=15), MEMBERS, max_steps=15)[0] == "FINISH"
+
+
+def test_fast_route_follows_worker_suggestion_after_full_coverage():
+    outputs = [_output("saas_finder", "market"), _output("market", "research"), _output("research", "FINISH")]
+    assert fast_route(_state(MEMBERS, outputs), MEMBERS)[0] == "FINISH"
+    outputs[-1] = _output("research", "saas_finder")
+    assert fast_route(_state(MEMBERS, outputs), MEMBERS)[0] == "saas_finder"
+
+
+def test_fast_route_defers_loops_to_llm_and_detects_repeats():
+    outputs = [_output("saas_finder", "x"), _output("market", "x"), _output("research", "market")]
+    assert fast_route(_state(MEMBERS, outputs), MEMBERS)[0] is None
+    repeated = outputs + [_output("research", "market")]
+    assert fast_route(_state(MEMBERS + ["research"], repeated), MEMBERS)[0] == "FINISH"
+
+
+def test_guard_route_stops_third_consecutive_visit():
+    assert guard_route({"visited": ["market", "market"]}, "market") == "FINISH"
+    assert guard_route({"visited": ["research", "market"]}, "market") == "market"
+
+
+def test_merge_counts_sums_counters():
+    assert merge_counts({"fast_path": 2}, {"fast_path": 1, "llm_calls": 1}) == {"fast_path": 3, "llm_calls": 1}
@@ -0,0 +1,102 @@
+import time
+
+from langchain_agent.utils.search_cache import SearchCache
+
+
+def test_search_cache_hit_after_set(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.sqlite"))
+    assert cache.get("web_search", "CRM  for Dentists") is None
+    cache.set("web_search", "crm for dentists", "results")
+    assert cache.get("web_search", "CRM  for Dentists") == "results"
+    assert cache.get("review_analysis", "crm for dentists") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_search_cache_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SearchCache(path).set("web_search", "q", "persisted")
+    assert SearchCache(path).get("web_search", "q") == "persisted"
+
+
+def test_search_cache_ttl_expiry(tmp_path):
+    cache = SearchCache(str(tmp_path / "cache.sqlite"), ttl_seconds=1)
+    cache.set("web_search", "q", "stale")
+    time.sleep(1.1)
+    assert cache.get("web_search", "q") is None
+    assert len(cache) == 0
+
+
+def test_search_cache_lru_eviction(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SearchCache(path, max_entries=2)
+    cache.set("web_search", "a", "1")
+    cache.set("web_search", "b", "2")
+    cache.get("web_search", "a")
+    cache.set("web_search", "c", "3")
+    assert len(cache) == 2
+    fresh = SearchCache(path)
+    assert fresh.get("web_search", "a") == "1"
+    assert fresh.get("web_search", "b") is None
+
+
+def test_read_access_times_reach_disk_without_a_set(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+
+    def last_access(key_query):
+        cache = SearchCache(path)
+        key = cache.make_key("web_search", key_query)
+        return cache._conn.execute("SELECT last_access FROM search_cache WHERE key = ?", (key,)).fetchone()[0]
+
+    writer = SearchCache(path)
+    for query in ("a", "b", "c"):
+        writer.set("web_search", query, query)
+    written = last_access("a")
+
+    # A full batch of reads is written back as soon as it fills up
+    reader = SearchCache(path, touch_batch=2)
+    reader.get("web_search", "a")
+    assert last_access("a") == written
+    reader.get("web_search", "b")
+    assert last_access("a") > written
+
+    # The rest are written on close, and closing twice is harmless
+    reader.get("web_search", "c")
+    before = last_access("c")
+    reader.close()
+    reader.close()
+    assert last_access("c") > before
+
+
+def test_every_search_tool_runs_end_to_end_against_a_stub_backend(tmp_path, monkeypatch):
+    import asyncio
+
+    from langchain_agent.tools import web_search as ws
+
+    queries = []
+
+    class _Backend:
+        class api_wrapper:
+            @staticmethod
+            def results(query, max_results=5):
+                queries.append(query)
+                return [{"title": "T", "link": "https://example.com", "snippet": query}]
+
+        def run(self, query):
+            queries.append(query)
+            return f"results for {query}"
+
+    cache = SearchCache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(ws, "get_search", lambda: _Backend())
+    monkeypatch.setattr(ws, "get_search_cache", lambda: cache)
+    expected = [
+        (ws.web_search, "results for crm"),
+        (ws.competitor_analysis, "results for competitors in crm market SaaS products"),
+        (ws.review_analysis, "results for crm reviews user feedback complaints"),
+        (ws.market_size_research, "results for crm market size TAM SAM growth statistics 2024"),
+        (ws.find_pages, "T\nhttps://example.com\ncrm"),
+    ]
+    for tool, output in expected:
+        assert tool.invoke({"query": "crm"}) == output
+        assert asyncio.run(tool.ainvoke({"query": "crm"})) == output  # answered from the search cache
+    assert len(queries) == len(expected)
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import urllib.request
+
+import pytest
+
+from benchmarks.run import PROMPT, ROOT, offline_env
+from langchain_agent.server import CANCELLED, FINISHED, JobScheduler, QueueFull, ResearchServer
+
+
+class GatedRunner:
+    """Job runner that streams two tokens and finishes when its job's gate is opened."""
+
+    def __init__(self):
+        self.gates = {}
+        self.started = []
+
+    async def __call__(self, job):
+        self.started.append(job.prompt)
+        gate = self.gates.setdefault(job.prompt, asyncio.Event())
+        job.publish("token", {"text": "# Report "})
+        await gate.wait()
+        job.publish("token", {"text": job.prompt})
+        return f"# Report {job.prompt}"
+
+    def release(self, prompt):
+        self.gates.setdefault(prompt, asyncio.Event()).set()
+
+
+async def _settle():
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+def test_scheduler_runs_by_priority_within_its_bounds():
+    async def scenario():
+        runner = GatedRunner()
+        scheduler = JobScheduler(runner, concurrency=1, max_queued=2)
+        scheduler.start()
+        first = scheduler.submit("first")
+        await _settle()
+        low, high = scheduler.submit("low"), scheduler.submit("high", priority=5)
+        with pytest.raises(QueueFull):
+            scheduler.submit("overflow")
+        assert (scheduler.position(high), scheduler.position(low)) == (1, 2)
+        assert scheduler.metrics()["queued"] == 2 and scheduler.metrics()["running"] == 1
+
+        scheduler.cancel(low.id)
+        runner.release("first")
+        runner.release("high")
+        await _settle()
+        assert runner.started == ["first", "high"]
+        assert (first.status, high.status, low.status) == (FINISHED, FINISHED, CANCELLED)
+        assert high.report == "# Report high"
+        assert scheduler.metrics()["totals"] == {"finished": 2, "failed": 0, "cancelled": 1}
+
+        running = scheduler.submit("slow")
+        await _settle()
+        scheduler.cancel(running.id)
+        await _settle()
+        assert running.status == CANCELLED and [e.data["status"] for e in running.events if e.name == "status"] == ["queued", "running", "cancelled"]
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+
+async def _request(port, method, path, body=None, headers=""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: x\r\nContent-Length: {len(payload)}\r\n{headers}\r\n".encode() + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), content.decode()
+
+
+def _sse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_http_api_streams_events_and_reports_queue_metrics():
+    async def scenario():
+        runner = GatedRunner()
+        scheduler = JobScheduler(runner, concurrency=1, max_queued=1)
+        scheduler.start()
+        server = await asyncio.start_server(ResearchServer(scheduler).handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        status, body = await _request(port, "POST", "/jobs", {"prompt": "dental scheduling"})
+        job = json.loads(body)
+        assert status == 202 and job["status"] == "queued"
+        assert (await _request(port, "POST", "/jobs", {"priority": 1}))[0] == 400
+        await _settle()
+        assert (await _request(port, "POST", "/jobs", {"prompt": "waits"}))[0] == 202
+        assert (await _request(port, "POST", "/jobs", {"prompt": "rejected"}))[0] == 429
+
+        stream = asyncio.create_task(_request(port, "GET", f"/jobs/{job['id']}/events"))
+        await _settle()
+        runner.release("dental scheduling")
+        status, text = await stream
+        events = _sse_events(text)
+        assert status == 200 and [name for _, name, _ in events] == ["status", "status", "token", "token", "status"]
+        assert events[-1][2]["status"] == "finished"
+
+        # Reconnecting with Last-Event-ID replays only what came after it
+        _, text = await _request(port, "GET", f"/jobs/{job['id']}/events", headers="Last-Event-ID: 3\r\n")
+        assert [event_id for event_id, _, _ in _sse_events(text)] == [4, 5]
+
+        _, body = await _request(port, "GET", f"/jobs/{job['id']}")
+        assert json.loads(body)["report"] == "# Report dental scheduling"
+        waiting = [j for j in json.loads((await _request(port, "GET", "/jobs"))[1])["jobs"] if j["prompt"] == "waits"][0]
+        assert json.loads((await _request(port, "DELETE", f"/jobs/{waiting['id']}"))[1])["status"] == "cancelled"
+        _, metrics = await _request(port, "GET", "/metrics")
+        assert "saas_research_jobs_queued 0" in metrics and 'saas_research_jobs_total{status="finished"} 1' in metrics
+        assert (await _request(port, "GET", "/jobs/unknown"))[0] == 404
+
+        server.close()
+        await scheduler.stop()
+
+    asyncio.run(scenario())
+
+
+def test_service_runs_jobs_against_the_stub_model(tmp_path):
+    env = offline_env(str(tmp_path), overrides={"SERVER_CONCURRENCY": "2"})
+    proc = subprocess.Popen(
+        [sys.executable, "main.py", "--serve", "--port", "0", "--mode", "planner"],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    try:
+        line = proc.stdout.readline()
+        assert line.startswith("Serving research jobs on "), line
+        url = line.split()[-1]
+
+        def call(method, path, body=None):
+            data = json.dumps(body).encode() if body is not None else None
+            request = urllib.request.Request(url + path, data=data, method=method, headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.read().decode()
+
+        jobs = [json.loads(call("POST", "/jobs", {"prompt": prompt}))["id"] for prompt in (PROMPT, "CRM for independent gyms")]
+        events = _sse_events(call("GET", f"/jobs/{jobs[0]}/events"))
+        names = {name for _, name, _ in events}
+        assert {"status", "progress", "token"} <= names and events[-1][2]["status"] == "finished"
+        report = "".join(data["text"] for _, name, data in events if name == "token")
+        assert json.loads(call("GET", f"/jobs/{jobs[0]}"))["report"] == report
+        assert _sse_events(call("GET", f"/jobs/{jobs[1]}/events"))[-1][2]["status"] == "finished"
+        assert os.path.exists(json.loads(call("GET", f"/jobs/{jobs[1]}"))["report_path"])
+        assert 'saas_research_jobs_total{status="finished"} 2' in call("GET", "/metrics")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
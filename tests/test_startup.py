@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+from langchain_agent.utils.graph_image import save_graph_image
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules that must only be imported when a chart, search or model call actually happens
+HEAVY_MODULES = ["matplotlib", "langchain_community", "duckduckgo_search", "ddgs", "langchain.agents"]
+
+
+def _loaded_modules(code: str, tmp_path) -> set:
+    env = dict(os.environ, PYTHONPATH=ROOT, OUTPUT_DIR=str(tmp_path), CHARTS_DIR=str(tmp_path / "charts"))
+    out = subprocess.run([sys.executable, "-c", code + "\nimport sys; print('\\n'.join(sys.modules))"], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return set(out.stdout.split())
+
+
+def test_help_does_not_import_langchain(tmp_path):
+    modules = _loaded_modules("import sys; sys.argv = ['main.py', '--help']\nimport runpy\ntry:\n    runpy.run_path('main.py', run_name='__main__')\nexcept SystemExit:\n    pass", tmp_path)
+    assert not {m for m in modules if m.split(".")[0] in ("langgraph", "langchain_core", "langchain")}
+
+
+def test_building_graphs_is_lazy(tmp_path):
+    modules = _loaded_modules("from langchain_agent.agents.base_agent import build_research_graph\nbuild_research_graph('router')\nbuild_research_graph('planner')", tmp_path)
+    assert not [m for m in HEAVY_MODULES if m in modules]
+    assert not (tmp_path / "charts").exists()
+
+
+class _FakeDrawable:
+    def __init__(self, mermaid):
+        self.mermaid = mermaid
+        self.renders = 0
+
+    def draw_mermaid(self):
+        return self.mermaid
+
+    def draw_mermaid_png(self):
+        self.renders += 1
+        return b"png"
+
+
+class _FakeGraph:
+    def __init__(self, mermaid):
+        self.drawable = _FakeDrawable(mermaid)
+
+    def get_graph(self):
+        return self.drawable
+
+
+def test_graph_image_rendered_only_when_structure_changes(tmp_path):
+    path = str(tmp_path / "graph.png")
+    graph = _FakeGraph("graph TD; a-->b")
+    assert save_graph_image(graph, path) == path
+    assert save_graph_image(graph, path) == path
+    assert graph.drawable.renders == 1
+
+    changed = _FakeGraph("graph TD; a-->c")
+    save_graph_image(changed, path)
+    assert changed.drawable.renders == 1
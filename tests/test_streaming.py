@@ -0,0 +1,68 @@
+import io
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, ToolMessage
+
+from langchain_agent.streaming import ProgressRenderer
+
+REPORT_TAGS = {"tags": ["final_report"]}
+
+# (namespace, mode, chunk) items as ``graph.stream(..., stream_mode=STREAM_MODES, subgraphs=True)`` yields them
+RECORDED = [
+    ((), "tasks", {"id": "1", "name": "supervisor", "input": {}, "triggers": ["__start__"]}),
+    ((), "tasks", {"id": "1", "name": "supervisor", "error": None, "result": [], "interrupts": []}),
+    ((), "updates", {"supervisor": {"next": "market"}}),
+    ((), "tasks", {"id": "2", "name": "market", "input": {}, "triggers": ["branch:to:market"]}),
+    (("market:2",), "tasks", {"id": "3", "name": "agent", "input": {}, "triggers": ["start:agent"]}),
+    (("market:2",), "messages", (AIMessageChunk(content="thinking"), {"tags": []})),
+    (("market:2",), "updates", {"agent": {"messages": [
+        AIMessage(content="", tool_calls=[{"name": "market_size_research", "args": {"query": "dental CRM"}, "id": "c1"}]),
+    ]}}),
+    (("market:2",), "updates", {"tools": {"messages": [ToolMessage(content="TAM $2B", name="market_size_research", tool_call_id="c1")]}}),
+    ((), "updates", {"market": {"messages": [HumanMessage(content="market findings", name="market")]}}),
+    ((), "tasks", {"id": "4", "name": "supervisor", "input": {}, "triggers": ["branch:to:supervisor"]}),
+    ((), "messages", (AIMessageChunk(content="# Dental"), REPORT_TAGS)),
+    ((), "messages", (AIMessageChunk(content=" CRM\n"), REPORT_TAGS)),
+    ((), "updates", {"supervisor": {"messages": [HumanMessage(content="# Dental CRM\n", name="final_report")]}}),
+]
+
+
+def test_recorded_stream_renders_progress_and_the_report(tmp_path):
+    out = io.StringIO()
+    report_file = tmp_path / "reports" / "dental.md"
+    with ProgressRenderer(out, str(report_file)) as renderer:
+        for item in RECORDED:
+            renderer.handle(*item)
+
+    assert out.getvalue() == (
+        "▶ supervisor started\n"
+        "✔ supervisor finished → market\n"
+        "▶ market started\n"
+        "  [market] tool call: market_size_research({'query': 'dental CRM'})\n"
+        "  [market] tool result: market_size_research (7 chars)\n"
+        "✔ market finished\n"
+        "▶ supervisor started\n"
+        "\n# Dental CRM\n"
+        "\n✔ supervisor finished\n"
+    )
+    # Streamed tokens are not repeated when the finished report arrives as an update
+    assert renderer.report == "# Dental CRM\n"
+    assert report_file.read_text(encoding="utf-8") == "# Dental CRM\n"
+    assert not (tmp_path / "reports" / "dental.md.partial").exists()
+
+
+def test_unstreamed_report_is_emitted_from_the_update(tmp_path):
+    # A cached synthesis call produces no tokens, only the finished message
+    items = [item for item in RECORDED if item[1] != "messages"]
+    out = io.StringIO()
+    with ProgressRenderer(out) as renderer:
+        for item in items:
+            renderer.handle(*item)
+    assert renderer.report == "# Dental CRM\n"
+    assert out.getvalue().endswith("✔ market finished\n▶ supervisor started\n\n# Dental CRM\n\n✔ supervisor finished\n")
+
+    # A run without a report leaves neither the report nor its partial file behind
+    report_file = tmp_path / "empty.md"
+    with ProgressRenderer(io.StringIO(), str(report_file)) as renderer:
+        for item in items[:3]:
+            renderer.handle(*item)
+    assert renderer.report == "" and not list(tmp_path.iterdir())
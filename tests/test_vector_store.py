@@ -0,0 +1,75 @@
+import numpy as np
+from langchain_core.tools import StructuredTool, ToolException
+
+from benchmarks.fakes import HashingEmbeddings
+from langchain_agent.utils.evidence import EvidenceIngestor, chunk_text
+from langchain_agent.utils.vector_store import VectorStore
+
+DOCS = [
+    "Dental clinics lose 10-15% of appointments to no-shows every month",
+    "Incumbent scheduling tools charge $99 to $299 per month per location",
+    "Reviews complain about missing SMS reminders and slow support",
+]
+
+
+def test_search_ranks_by_similarity_within_namespace(tmp_path):
+    emb = HashingEmbeddings()
+    store = VectorStore(str(tmp_path), model=emb.model)
+    assert store.add(emb.embed_documents(DOCS), DOCS, [{"source": "web_search"}] * 3, namespace="run-a") == 3
+    store.add(emb.embed_documents(DOCS[:1]), DOCS[:1], [{"source": "web_search"}], namespace="run-b")
+
+    hits = store.search(emb.embed_query("what do incumbent tools charge per month"), k=2, namespace="run-a")
+    assert [h.text for h in hits][0] == DOCS[1] and len(hits) == 2
+    assert hits[0].score >= hits[1].score and hits[0].metadata == {"ns": "run-a", "source": "web_search"}
+    assert [h.text for h in store.search(emb.embed_query("pricing"), k=5, namespace="run-b")] == DOCS[:1]
+    assert store.search(emb.embed_query("pricing"), namespace="unknown") == []
+    assert len(store.search(emb.embed_query("pricing"), k=10)) == 4
+
+
+def test_near_duplicates_are_dropped_per_namespace(tmp_path):
+    emb = HashingEmbeddings()
+    store = VectorStore(str(tmp_path), model=emb.model, dedupe_threshold=0.95)
+    texts = [DOCS[0], DOCS[0].upper(), DOCS[1]]  # same words, so identical bag-of-words vectors
+    assert store.add(emb.embed_documents(texts), texts, [{}] * 3, namespace="a") == 2
+    assert store.add(emb.embed_documents(DOCS), DOCS, [{}] * 3, namespace="a") == 1
+    assert store.add(emb.embed_documents(DOCS), DOCS, [{}] * 3, namespace="b") == 3
+    assert store.stats() == {"chunks": 6, "added": 6, "duplicates": 3, "namespaces": 2}
+
+
+def test_store_persists_grows_and_resets_on_model_change(tmp_path):
+    rng = np.random.default_rng(0)
+    store = VectorStore(str(tmp_path), model="m1")
+    vectors = rng.normal(size=(1500, 64))
+    store.add(vectors, [f"doc {i}" for i in range(1500)], [{}] * 1500, namespace="a")
+    assert len(store) == 1500 and len(store._vectors) >= 1500
+
+    reopened = VectorStore(str(tmp_path), model="m1")
+    assert len(reopened) == 1500
+    assert reopened.search(vectors[1234], k=1, namespace="a")[0].text == "doc 1234"
+
+    assert len(VectorStore(str(tmp_path), model="m2")) == 0
+
+
+def _rate_limited(query: str) -> str:
+    raise ToolException("Search failed: rate limited")
+
+
+def test_ingestor_embeds_tool_output_in_batches_and_skips_errors(tmp_path):
+    emb = HashingEmbeddings()
+    ingestor = EvidenceIngestor(VectorStore(str(tmp_path), model=emb.model), emb, batch_size=64, chunk_chars=200, chunk_overlap=20)
+    report = " ".join(DOCS * 4)
+    search = StructuredTool.from_function(lambda query: report, name="web_search", description="Search.")
+    failing = StructuredTool.from_function(_rate_limited, name="find_pages", description="Find.", handle_tool_error=True)
+    config = {"callbacks": [ingestor], "metadata": {"thread_id": "run-1"}}
+    search.invoke({"query": "dental no-shows"}, config=config)
+    error = failing.invoke({"name": "find_pages", "args": {"query": "x"}, "id": "1", "type": "tool_call"}, config=config)
+    assert error.status == "error"
+    assert ingestor.flush(timeout=5)
+
+    stats = ingestor.stats()
+    assert stats["embedded"] == len(chunk_text(report, 200, 20)) and stats["duplicates"] > 0
+    assert emb.calls <= 2
+    hits = ingestor.search("SMS reminders", k=1, namespace="run-1")
+    assert "SMS reminders" in hits[0].text and hits[0].metadata["source"] == "web_search"
+    assert hits[0].metadata["ref"] == "dental no-shows"
+    assert all(len(c) <= 200 for c in chunk_text(report, 200, 20))